@@ -8,110 +8,311 @@ loads environment variables, and registers commands.
 import os
 import sys
 import logging
-import logging.config
-import pandas as pd
-from dotenv import load_dotenv
-from tabulate import tabulate
-from app.command import CommandHandler
-from app.pluggin.add import AddCommand
-from app.pluggin.subtract import SubtractCommand
-from app.pluggin.multiply import MultiplyCommand
-from app.pluggin.divide import DivideCommand
-from app.pluggin.mean import MeanCommand
-from app.pluggin.history import HistoryCommand
-
-
-class App:
-    """Main application class to manage command execution."""
+import time
+from functools import partial
+from app.batch import DEFAULT_CHUNK_SIZE, read_commands, run_batch, run_items
+from app.command import CommandHandler, ParallelCommandHandler  # pylint: disable=unused-import
+from app.compiler import CommandCompiler
+from app.history import HistoryBuffer
+from app.history.journal import HistoryJournal
+from app.history.store import HistoryStore
+from app.pipeline import evaluate_pipeline, is_pipeline, run_pipeline
+from app.render import TEXT_MODE, create_renderer
+from app.runtime import Runtime
+
+
+class App(Runtime):
+    """Main application class to manage command execution.
+
+    On top of the process-wide Runtime, the App keeps the history of the
+    REPL or batch run and persists it. Servers open a Session per client
+    instead.
+    """
 
     def __init__(self):
         """Initialize the application, configure logging, and load environment variables."""
-        os.makedirs('logs', exist_ok=True)
-        self.configure_logging()
-        load_dotenv()
-        self.settings = dict(os.environ)
-        self.settings.setdefault('ENVIRONMENT', 'PRODUCTION')
-        self.command_handler = CommandHandler()
-        # Initialize an empty DataFrame for history
-        self.history_df = pd.DataFrame(columns=["Command"])
-        self.register_commands()
+        super().__init__()
+        # Ring buffer holding the most recent commands
+        self.history = HistoryBuffer(self.history_size)
+        self.journal = self.create_history_journal()
+        self.history_store = self.create_history_store()
+        self.shared_history = self.create_shared_history()
         self.load_startup_history()
 
+    @property
+    def history_df(self):
+        """DataFrame view of the command history, built only when requested."""
+        return self.history.to_dataframe()
+
+    def create_history_journal(self):
+        """Open the append-only history journal when HISTORY_JOURNAL names a file."""
+        path = self.settings.get('HISTORY_JOURNAL')
+        if not path:
+            return None
+        return HistoryJournal(
+            path,
+            fsync=self.settings.get('HISTORY_JOURNAL_FSYNC', 'interval'),
+            flush_every=self.settings.get('HISTORY_JOURNAL_FLUSH', 1),
+            compact_every=self.settings.get('HISTORY_JOURNAL_COMPACT', 1000),
+        )
+
+    def create_history_store(self):
+        """Open the indexed history database when HISTORY_DB names a file."""
+        path = self.settings.get('HISTORY_DB')
+        if not path:
+            return None
+        return HistoryStore(path, flush_every=self.settings.get('HISTORY_DB_FLUSH', 100))
+
+    def create_shared_history(self):
+        """Open the shared memory history named by HISTORY_SHARED, creating it if needed."""
+        name = self.settings.get('HISTORY_SHARED')
+        if not name:
+            return None
+        # Imported here since only multi-process deployments use it
+        from app.history.shared import DEFAULT_CAPACITY, SharedHistory  # pylint: disable=import-outside-toplevel
+        return SharedHistory(name, capacity=self.settings.get('HISTORY_SHARED_SIZE') or DEFAULT_CAPACITY)
+
     def load_startup_history(self):
-        """Optionally load history at startup from a CSV file."""
+        """Optionally load history at startup from the journal, the database or a CSV file."""
         history_command = self.command_handler.commands.get("history")
         if history_command:
-            print(history_command.load_history("history.csv"))  # Load history automatically on startup
-
-    def configure_logging(self):
-        """Configure logging for the application from a config file."""
-        logging_conf_path = 'logging.conf'  # Path to your logging config file
-
-        if os.path.exists(logging_conf_path):
-            logging.config.fileConfig(logging_conf_path, disable_existing_loggers=False)
-            logging.info("Logging configured from file: %s", logging_conf_path)
-        else:
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s',
-                handlers=[
-                    logging.FileHandler('logs/app.log'),  # Fallback if config file does not exist
-                    logging.StreamHandler()
-                ]
-            )
-            logging.info("Default logging configuration applied.")
-
-    def load_environment_variables(self):
-        """Load environment variables into the application's settings."""
-        settings = dict(os.environ)  # This method is no longer needed since it's already done in __init__
-        logging.info("Environment variables loaded.")
-        return settings
-
-    def get_environment_variable(self, key):
-        """Get a specific environment variable from the settings."""
-        return self.settings.get(key)
-
-    def register_commands(self):
-        """Register all command classes with the command handler."""
-        self.command_handler.register_command("add", AddCommand())
-        self.command_handler.register_command("subtract", SubtractCommand())
-        self.command_handler.register_command("multiply", MultiplyCommand())
-        self.command_handler.register_command("divide", DivideCommand())
-        self.command_handler.register_command("mean", MeanCommand())
-        self.command_handler.register_command("history", HistoryCommand(self.history_df))
+            if self.journal is not None and os.path.getsize(self.journal.path) > 0:
+                print(history_command.replay_journal())
+            elif self.history_store is not None:
+                print(history_command.load_store())
+            elif self.shared_history is not None and len(self.shared_history):
+                print(history_command.load_shared())
+            else:
+                print(history_command.load_history("history.csv"))  # Load history automatically on startup
 
     def display_menu(self):
         """Display available commands in the menu."""
         print("Available Commands:")
-        print("1. add                        - Add two numbers")
+        print("1. add, sum                   - Add numbers or @file sources")
         print("2. subtract                   - Subtract two numbers")
-        print("3. multiply                   - Multiply two numbers")
+        print("3. multiply, product          - Multiply numbers or @file sources")
         print("4. divide                     - Divide two numbers")
         print("5. mean                       - Calculate mean of provided numbers")
-        print("6. history                    - History of maximum 10 commands")
+        print(f"6. history                    - History of maximum {self.history.capacity} commands (show --last N, search PREFIX)")
+        print("7. cache                      - Result cache statistics (cache stats, cache clear)")
+        print("8. variance, stddev, median   - Statistics of numbers or @file sources")
+        print("9. quantile, minmax, histogram - Percentiles (p=50,95,99), extremes and bins (bins=10)")
+        print("10. eval                      - Evaluate an expression: eval (a+b)*c a=1 b=2 c=3")
+        print("11. compute                   - Column-wise CSV: compute in.csv out.csv divide a b")
+        print("12. stats                     - Command metrics (stats json, stats dump, stats profile start)")
         print("Type 'exit' to exit the application.")
         print("Dummy Format: add 3 4")
+        print("Chain commands with |, where _ is the previous result: add 3 4 | multiply _ 2")
 
     def handle_command_input(self, cmd_input):
         """Handle the execution of commands based on user input."""
+        output = self.process_command(cmd_input)
+        if output is not None:
+            print(output)
+
+    def process_command(self, cmd_input, evaluate=False):
+        """Execute one command line and return the text to display for it.
+
+        With ``evaluate``, a command that computes a value returns its
+        CommandResult instead, whose message is only formatted when read.
+        """
+        if is_pipeline(cmd_input):
+            return self.process_pipeline(cmd_input, evaluate)
         parts = cmd_input.split()
+        if not parts:
+            return None
         command = parts[0]
         args = parts[1:]
 
         if command in self.command_handler.commands:
             try:
-                result = self.command_handler.execute_command(command, *args)
-                print(result)
+                started = time.perf_counter()
+                if evaluate:
+                    result = self.command_handler.evaluate_command(command, *args)
+                else:
+                    result = self.command_handler.execute_command(command, *args)
+                latency = time.perf_counter() - started
                 # Add command to history (the add_to_history method will update in place)
                 history_command = self.command_handler.commands.get("history")
-                history_command.add_to_history(cmd_input)
+                history_command.add_to_history(cmd_input, result, latency)
+                return result
 
             except Exception as e:
                 logging.error("Error executing command: %s", e)
-                print(f"Error: {e}")
+                return f"Error: {e}"
+        logging.error("Unknown command: %s", command)
+        return f"No such command: {command}"
+
+    def process_pipeline(self, cmd_input, evaluate=False):
+        """Execute a pipelined line such as ``add 2 3 | multiply _ 4`` and return its final message.
+
+        With ``evaluate``, the CommandResult of the last stage is returned instead.
+        """
+        try:
+            started = time.perf_counter()
+            if evaluate:
+                result = evaluate_pipeline(self.command_handler, cmd_input)
+            else:
+                result = run_pipeline(self.command_handler, cmd_input)
+            latency = time.perf_counter() - started
+        except Exception as e:
+            logging.error("Error executing command: %s", e)
+            return f"Error: {e}"
+        self.command_handler.commands.get("history").add_to_history(cmd_input, result, latency)
+        return result
+
+    def process_chunk(self, lines, engine=None, parallel=None, evaluate=False):
+        """Execute a chunk of command lines and return their outputs in order.
+
+        Args:
+            lines (list[str]): Command lines to execute.
+            engine (BulkEngine): Optional vectorized engine for arithmetic commands.
+            parallel (ParallelCommandHandler): Optional worker pool for the
+                remaining stateless commands.
+            evaluate (bool): Return the CommandResult of every command that
+                computes a value instead of its message (the engine must be structured).
+
+        Lines that neither can handle go through ``process_command``.
+        """
+        if engine is None and parallel is None:
+            return [self.process_command(line, evaluate) for line in lines]
+
+        commands = self.command_handler.commands
+        if engine is not None:
+            outputs = engine.execute_lines(lines, commands)
         else:
-            logging.error("Unknown command: %s", command)
-            print(f"No such command: {command}")
+            outputs = [None] * len(lines)
+        handled = [output is not None for output in outputs]
+
+        if parallel is not None:
+            pending, calls = [], []
+            for index, line in enumerate(lines):
+                parts = line.split()
+                if (outputs[index] is None and parts and parts[0] in commands
+                        and not commands.has_capability(parts[0], "stateful") and not is_pipeline(line)):
+                    pending.append(index)
+                    calls.append((parts[0], parts[1:]))
+            for index, result in zip(pending, parallel.execute_many(calls, evaluate)):
+                if isinstance(result, Exception):
+                    logging.error("Error executing command: %s", result)
+                    outputs[index] = f"Error: {result}"
+                else:
+                    outputs[index] = result
+                    handled[index] = True
+
+        history_command = commands.get("history")
+        for index, line in enumerate(lines):
+            if handled[index]:
+                history_command.add_to_history(line, outputs[index])
+            elif outputs[index] is None:
+                outputs[index] = self.process_command(line, evaluate)
+        return outputs
+
+    def run_batch(self, stream, output=None, chunk_size=DEFAULT_CHUNK_SIZE, mode=None, workers=None, output_mode=None):
+        """Execute every command from a stream without the interactive prompt.
+
+        Args:
+            stream (io.TextIOBase): Source of command lines, one command per line.
+            output (io.TextIOBase): Destination for the results (defaults to stdout).
+            chunk_size (int): Number of lines executed between two buffered writes.
+            mode (str): ``"float"`` or ``"decimal"`` to compute arithmetic commands
+                with the vectorized bulk engine, or None to run them one by one.
+            workers (int): Number of worker processes for stateless commands,
+                or None to run them in this process.
+            output_mode (str): ``"text"`` (the default), ``"value"``, ``"jsonl"`` or ``"csv"``.
+
+        Returns:
+            BatchReport: Number of lines processed and the throughput.
+
+        Raises:
+            ValueError: If the output mode is unknown.
+        """
+        renderer = create_renderer(output_mode or TEXT_MODE)
+        evaluate = renderer.needs_values
+        engine = None
+        if mode:
+            # NumPy is only imported when the vectorized engine is requested
+            from app.bulk import BulkEngine  # pylint: disable=import-outside-toplevel
+            engine = BulkEngine(mode, structured=evaluate, metrics=self.command_handler.metrics)
+        parallel = None
+        if workers:
+            parallel = ParallelCommandHandler(max_workers=workers, chunk_size=max(1, chunk_size // workers))
+            parallel.commands = self.command_handler.commands
+            parallel.metrics = self.command_handler.metrics
+        logging.info("Batch run started.")
+        try:
+            report = run_batch(
+                lambda chunk: self.process_chunk(chunk, engine, parallel, evaluate), stream, output, chunk_size, renderer,
+            )
+            logging.info("Batch run finished: %s", report)
+        finally:
+            if parallel is not None:
+                parallel.close()
+            self.shutdown()
+        return report
+
+    def compile_commands(self, stream, file):
+        """Compile the command lines of a stream into a binary record file.
+
+        Args:
+            stream (io.TextIOBase): Source of command lines.
+            file (io.BufferedIOBase): Destination opened in binary mode.
+
+        Returns:
+            int: Number of records written.
+        """
+        compiler = CommandCompiler(self.command_handler)
+        records = (compiler.compile(line) for line in read_commands(stream))
+        return compiler.write_records(records, file)
+
+    def process_records(self, records, compiler, evaluate=False):
+        """Execute a chunk of compiled records and return their outputs in order.
+
+        With ``evaluate``, records computing a value return their CommandResult instead of its message.
+        """
+        execute = compiler.evaluate if evaluate else compiler.execute
+        history_command = self.command_handler.commands.get("history")
+        outputs = []
+        for record in records:
+            if compiler.command(record.opcode) is None:
+                logging.error("Unknown command: %s", compiler.names[record.opcode])
+                outputs.append(f"No such command: {compiler.names[record.opcode]}")
+                continue
+            try:
+                outputs.append(execute(record))
+                history_command.add_to_history(record.text, outputs[-1])
+            except Exception as e:
+                logging.error("Error executing command: %s", e)
+                outputs.append(f"Error: {e}")
+        return outputs
+
+    def run_compiled(self, file, output=None, chunk_size=DEFAULT_CHUNK_SIZE, output_mode=None):
+        """Replay a file written by ``compile_commands`` without tokenizing its lines.
+
+        Args:
+            file (io.BufferedIOBase): Compiled record file opened in binary mode.
+            output (io.TextIOBase): Destination for the results (defaults to stdout).
+            chunk_size (int): Number of records executed between two buffered writes.
+            output_mode (str): ``"text"`` (the default), ``"value"``, ``"jsonl"`` or ``"csv"``.
+
+        Returns:
+            BatchReport: Number of records processed and the throughput.
+
+        Raises:
+            ValueError: If the output mode is unknown.
+        """
+        renderer = create_renderer(output_mode or TEXT_MODE)
+        compiler = CommandCompiler(self.command_handler)
+        logging.info("Compiled batch run started.")
+        try:
+            report = run_items(
+                lambda chunk: self.process_records(chunk, compiler, renderer.needs_values),
+                compiler.read_records(file), output, chunk_size, renderer,
+            )
+            logging.info("Compiled batch run finished: %s", report)
+        finally:
+            self.shutdown()
+        return report
 
     def get_float_input(self, prompt, is_multiple=False):
         """Get float input from the user."""
@@ -129,12 +330,14 @@ class App:
         if self.history_df.empty:
             print("No command history available.")
         else:
+            from tabulate import tabulate  # pylint: disable=import-outside-toplevel
             print("\nCommand History:")
             print(tabulate(self.history_df.values, headers=["Command"], tablefmt="fancy_grid"))
 
     def start(self):
         """Start the REPL for command input."""
         self.display_menu()  # Show the command menu at startup
+        self.start_plugin_reload()
         logging.info("Application started.")
 
         try:
@@ -150,12 +353,59 @@ class App:
         except KeyboardInterrupt:
             logging.info("Application interrupted and exiting gracefully.")
         finally:
-            # Automatically save history on exit
-            history_command = self.command_handler.commands.get("history")
-            if history_command:
-                history_command.save_history("history.csv")
-            logging.info("Application shutdown.")
+            self.shutdown()
+
+    def serve(self, host="127.0.0.1", port=8888, path=None, max_connections=100):
+        """Run the calculator as a network service until SIGINT or SIGTERM.
+
+        Every connection gets its own history, which is appended to
+        history.csv when the connection closes or the server shuts down.
+        """
+        # Imported here so the REPL does not pay for asyncio
+        import asyncio  # pylint: disable=import-outside-toplevel
+        import signal  # pylint: disable=import-outside-toplevel
+        from app.server import CalculatorServer  # pylint: disable=import-outside-toplevel
 
+        server = CalculatorServer(
+            self.command_handler, host, port, path, max_connections,
+            history_size=self.history.capacity, history_file="history.csv",
+        )
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, lambda: asyncio.ensure_future(server.stop()))
+            await server.start()
+            self.start_plugin_reload()
+            print(f"Serving on {server.address}")
+            await server.serve_forever()
+
+        try:
+            asyncio.run(run())
+        finally:
+            self.shutdown(save_history=False)
+
+    def shutdown(self, save_history=True):
+        """Save the history and release resources before the application exits."""
+        # Automatically save history on exit
+        if self.journal is not None:
+            # Every command is already in the journal, no full rewrite is needed
+            self.journal.close()
+        if self.history_store is not None:
+            # Every command is already in the database as well
+            self.history_store.close()
+        if self.shared_history is not None:
+            if self.journal is None and self.history_store is None and not self.shared_history.closed:
+                # One process at a time appends the entries no process has written yet
+                from app.history.shared import append_history_csv  # pylint: disable=import-outside-toplevel
+                self.shared_history.flush(partial(append_history_csv, "history.csv"))
+            self.shared_history.close()
+        elif self.journal is None and self.history_store is None:
+            history_command = self.command_handler.commands.get("history")
+            if save_history and history_command:
+                # Appended, since the buffer only holds the last commands of the file
+                history_command.append_history("history.csv")
+        self.close()
 
 if __name__ == "__main__":
     app = App()
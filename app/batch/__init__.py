@@ -0,0 +1,102 @@
+"""
+This module contains the streaming pipeline used by the batch mode,
+which executes command files without going through the interactive REPL.
+"""
+
+import sys
+import time
+from itertools import islice
+from app.render import OutputBuffer, Renderer
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def read_commands(stream):
+    """Yield the stripped command lines from a stream, skipping blanks and comments.
+
+    Reading stops at the first ``exit`` line, as it does in the REPL.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.lower() == "exit":
+            return
+        yield line
+
+
+def chunked(lines, size=DEFAULT_CHUNK_SIZE):
+    """Group an iterable of lines into lists of at most ``size`` items."""
+    iterator = iter(lines)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BatchReport:
+    """Summary of a finished batch run."""
+
+    __slots__ = ("lines", "seconds")
+
+    def __init__(self, lines, seconds):
+        self.lines = lines
+        self.seconds = seconds
+
+    @property
+    def throughput(self):
+        """Number of lines processed per second."""
+        return self.lines / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return f"Processed {self.lines} lines in {self.seconds:.3f}s ({self.throughput:,.0f} lines/s)."
+
+
+def run_batch(process_chunk, stream, output=None, chunk_size=DEFAULT_CHUNK_SIZE, renderer=None):
+    """Run every command from a stream and write the results chunk by chunk.
+
+    Only one chunk of lines and results is held in memory at a time, so
+    memory use does not depend on the size of the input.
+
+    Args:
+        process_chunk (callable): Function mapping a list of command lines to
+            the list of their outputs.
+        stream (io.TextIOBase): Source of command lines.
+        output (io.TextIOBase): Destination for the results (defaults to stdout).
+        chunk_size (int): Number of lines executed between two writes.
+        renderer (Renderer): Output mode of the results (defaults to their messages).
+
+    Returns:
+        BatchReport: Number of lines processed and the elapsed time.
+    """
+    return run_items(process_chunk, read_commands(stream), output, chunk_size, renderer)
+
+
+def run_items(process_chunk, items, output=None, chunk_size=DEFAULT_CHUNK_SIZE, renderer=None):
+    """Run an iterable of commands, such as compiled records, chunk by chunk.
+
+    Args:
+        process_chunk (callable): Function mapping a list of items to the list
+            of their outputs.
+        items (iterable): Commands to execute.
+        output (io.TextIOBase): Destination for the results (defaults to stdout).
+        chunk_size (int): Number of items executed between two writes.
+        renderer (Renderer): Output mode of the results (defaults to their messages).
+            Machine modes are written through an OutputBuffer.
+
+    Returns:
+        BatchReport: Number of items processed and the elapsed time.
+    """
+    output = output or sys.stdout
+    renderer = renderer or Renderer()
+    if renderer.needs_values:
+        output = OutputBuffer(output)
+    output.write(renderer.header())
+    lines = 0
+    started = time.perf_counter()
+    for chunk in chunked(items, chunk_size):
+        output.write(renderer.render(chunk, process_chunk(chunk)))
+        lines += len(chunk)
+    output.flush()
+    return BatchReport(lines, time.perf_counter() - started)
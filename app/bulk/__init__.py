@@ -0,0 +1,278 @@
+"""
+This module contains the BulkEngine class, which executes many arithmetic
+commands at once by grouping them per command and computing each group
+in a single vectorized NumPy step.
+"""
+
+import time
+from decimal import Decimal, InvalidOperation
+from statistics import mean
+import numpy as np
+from app.command import CommandResult, ErrorMessage, capabilities_of
+from app.expression import ExpressionError, split_bindings
+from app.numeric import DEFAULT_BACKEND
+
+FLOAT_MODE = "float"
+DECIMAL_MODE = "decimal"
+MODES = (FLOAT_MODE, DECIMAL_MODE)
+
+
+class BulkEngine:
+    """Vectorized executor for binary arithmetic commands, ``eval`` and ``mean``.
+
+    Two numeric modes are available:
+
+    * ``float``: operands are parsed into float64 arrays and computed with
+      NumPy ufuncs. This is the fast mode; numbers are printed as floats.
+    * ``decimal``: operands are parsed into ``Decimal`` object arrays, so
+      results and messages are identical to the per-command path. Commands
+      configured with another numeric backend keep the per-command path.
+
+    Only commands declaring the ``vectorizable`` capability are computed
+    here. Lines the engine cannot handle (wrong arity, invalid numbers,
+    unknown commands) are reported as ``None`` so the caller can run them through
+    the regular command path and keep its exact messages.
+
+    Each group of lines computed here is recorded in the metrics as that
+    many calls of the group's average time. Groups do not go through the
+    result cache: a vectorized step costs less per line than a lookup.
+    """
+
+    def __init__(self, mode=DECIMAL_MODE, structured=False, metrics=None):
+        """Initialize the engine.
+
+        Args:
+            mode (str): Either ``"float"`` or ``"decimal"``.
+            structured (bool): Return a CommandResult for every computed value,
+                formatting its message only when it is read, instead of the message.
+            metrics (Metrics): Optional registry recording the lines computed per command.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown bulk mode: {mode}. Available modes: {', '.join(MODES)}.")
+        self.mode = mode
+        self.structured = structured
+        self.metrics = metrics
+
+    def _result(self, value, formatter, *args):
+        """Return the message of a computed value, or its CommandResult in structured mode."""
+        if self.structured:
+            return CommandResult(value, formatter, args)
+        return formatter(*args)
+
+    def execute_lines(self, lines, commands):
+        """Execute a list of command lines, grouping them by command.
+
+        Args:
+            lines (list[str]): Raw command lines.
+            commands (dict): Mapping of command names to command instances.
+
+        Returns:
+            list: The output for every line (its message, or its CommandResult
+            in structured mode), or ``None`` for lines that must go through
+            the regular command path.
+        """
+        results = [None] * len(lines)
+        groups = {}
+        for index, line in enumerate(lines):
+            parts = line.split()
+            if parts:
+                groups.setdefault(parts[0], ([], []))
+                groups[parts[0]][0].append(index)
+                groups[parts[0]][1].append(parts[1:])
+
+        for name, (indexes, rows) in groups.items():
+            command = commands.get(name)
+            if command is None or "vectorizable" not in capabilities_of(command):
+                continue
+            if self.mode == DECIMAL_MODE and not self._default_backend(command):
+                continue
+            started = time.perf_counter_ns()
+            if getattr(command, "operation", None) is not None:
+                outputs = self.execute_binary(command, rows)
+            elif getattr(command, "compile", None) is not None:
+                outputs = self.execute_expressions(command, rows)
+            elif getattr(command, "empty_error", None) is not None:
+                outputs = self.execute_mean(command, rows)
+            else:
+                continue
+            if self.metrics is not None:
+                self._record(name, outputs, time.perf_counter_ns() - started)
+            for index, output in zip(indexes, outputs):
+                results[index] = output
+        return results
+
+    def _record(self, name, outputs, elapsed):
+        """Record the lines of a group computed here; the others are recorded by the regular path."""
+        computed = [output for output in outputs if output is not None]
+        errors = sum(1 for output in computed if isinstance(output, ErrorMessage))
+        self.metrics.record_many(name, len(computed), elapsed, errors)
+
+    def execute_binary(self, command, rows):
+        """Compute a binary command for many operand pairs at once."""
+        outputs = [None] * len(rows)
+        positions = [i for i, row in enumerate(rows) if len(row) == 2]
+        if not positions:
+            return outputs
+
+        left, left_ok = self._parse([rows[i][0] for i in positions])
+        right, right_ok = self._parse([rows[i][1] for i in positions])
+        valid = left_ok & right_ok
+        zero_error = getattr(command, "zero_division_error", None)
+        if zero_error is not None:
+            zeros = valid & (right == 0)
+            for i in np.flatnonzero(zeros):
+                outputs[positions[i]] = zero_error
+            valid &= ~zeros
+
+        selected = np.flatnonzero(valid)
+        if selected.size == 0:
+            return outputs
+        a_values, b_values = left[selected], right[selected]
+        try:
+            with np.errstate(all="ignore"):
+                values = command.operation(a_values, b_values).tolist()
+        except ArithmeticError:
+            # A Decimal signal (e.g. Infinity - Infinity) aborts the whole array;
+            # compute element-wise and leave the failing pairs to the regular path
+            values = [self._apply(command.operation, a, b) for a, b in zip(a_values, b_values)]
+
+        message = command.message
+        if self.structured:
+            formatted = [
+                None if value is None else CommandResult(value, message.format, (a, b, value))
+                for a, b, value in zip(a_values.tolist(), b_values.tolist(), values)
+            ]
+        else:
+            formatted = [
+                None if value is None else message.format(a, b, value)
+                for a, b, value in zip(a_values.tolist(), b_values.tolist(), values)
+            ]
+        for i, text in zip(selected.tolist(), formatted):
+            outputs[positions[i]] = text
+        return outputs
+
+    def execute_mean(self, command, rows):
+        """Compute ``mean`` for many operand lists, grouped by their length."""
+        outputs = [None] * len(rows)
+        by_arity = {}
+        for i, row in enumerate(rows):
+            if row:
+                by_arity.setdefault(len(row), []).append(i)
+
+        for positions in by_arity.values():
+            try:
+                matrix = np.array([rows[i] for i in positions], dtype=np.float64)
+            except ValueError:
+                # Invalid numbers keep the per-command error message
+                positions = [i for i in positions if self._is_float_row(rows[i])]
+                if not positions:
+                    continue
+                matrix = np.array([[float(num) for num in rows[i]] for i in positions])
+            if self.mode == FLOAT_MODE:
+                means = matrix.mean(axis=1).tolist()
+            else:
+                means = [mean(row) for row in matrix.tolist()]
+            for i, row, value in zip(positions, matrix.tolist(), means):
+                outputs[i] = self._result(value, _mean_message, command, row, value)
+        return outputs
+
+    def execute_expressions(self, command, rows):
+        """Compute ``eval`` rows, evaluating each expression once over columns of bindings.
+
+        Rows sharing the same expression and bound names form a group whose
+        bound values are parsed into one column per variable.
+        """
+        outputs = [None] * len(rows)
+        groups = {}
+        for i, row in enumerate(rows):
+            source, bindings = split_bindings(row)
+            if source:
+                groups.setdefault((source, tuple(bindings)), []).append((i, bindings))
+
+        number = float if self.mode == FLOAT_MODE else Decimal
+        for (source, names), members in groups.items():
+            try:
+                expression = command.compile(source)
+            except ExpressionError:
+                continue  # The regular path reports the invalid expression
+            if not set(expression.variables) <= set(names):
+                continue
+
+            valid = np.ones(len(members), dtype=bool)
+            columns = {}
+            for name in names:
+                columns[name], parsed = self._parse([bindings[name] for _, bindings in members])
+                valid &= parsed
+            selected = np.flatnonzero(valid)
+            if selected.size == 0:
+                continue
+            columns = {name: column[selected] for name, column in columns.items()}
+            try:
+                with np.errstate(all="ignore"):
+                    values, zeros = expression.evaluate_columns(columns, selected.size, number)
+            except ArithmeticError:
+                continue  # A Decimal signal aborts the group; rows keep the regular path
+
+            for k, value, zero in zip(selected.tolist(), values.tolist(), zeros.tolist()):
+                i, bindings = members[k]
+                if zero:
+                    outputs[i] = command.zero_division_error
+                else:
+                    outputs[i] = self._result(value, _expression_message, command, source, bindings, value)
+        return outputs
+
+    @staticmethod
+    def _default_backend(command):
+        """Whether a command computes with its default numbers, which the decimal mode reproduces."""
+        backend = getattr(command, "backend", None)
+        return backend is None or backend is DEFAULT_BACKEND
+
+    @staticmethod
+    def _apply(operation, a, b):
+        """Apply an operation to one pair, returning ``None`` when it signals an error."""
+        try:
+            return operation(a, b)
+        except ArithmeticError:
+            return None
+
+    @staticmethod
+    def _is_float_row(row):
+        """Check whether every token of a row converts to a float."""
+        try:
+            for num in row:
+                float(num)
+        except ValueError:
+            return False
+        return True
+
+    def _parse(self, tokens):
+        """Parse operand strings into an array plus a mask of valid entries."""
+        if self.mode == FLOAT_MODE:
+            try:
+                values = np.array(tokens, dtype=np.float64)
+                return values, np.ones(len(tokens), dtype=bool)
+            except ValueError:
+                converter, fallback = float, np.nan
+        else:
+            converter, fallback = Decimal, Decimal(0)
+
+        parsed = []
+        valid = np.ones(len(tokens), dtype=bool)
+        for i, token in enumerate(tokens):
+            try:
+                parsed.append(converter(token))
+            except (ValueError, InvalidOperation):
+                parsed.append(fallback)
+                valid[i] = False
+        dtype = np.float64 if self.mode == FLOAT_MODE else object
+        return np.array(parsed, dtype=dtype), valid
+
+
+def _mean_message(command, row, value):
+    """Format the message of a mean computed in bulk."""
+    return command.message.format(', '.join(map(str, row)), value)
+
+
+def _expression_message(command, source, bindings, value):
+    """Format the message of an expression evaluated in bulk."""
+    return command.message.format(command.describe(source, bindings), value)
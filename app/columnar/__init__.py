@@ -0,0 +1,207 @@
+"""
+This module applies arithmetic column-wise to large CSV files.
+
+Input files are read in chunks of rows with pandas, so only one chunk is in
+memory at a time and files larger than RAM can be processed. The operation
+is computed for a whole chunk with NumPy and the results are streamed to the
+output file, one value per input row: a CSV file, or a NumPy ``.npy`` file
+of float64 values when the output name ends with ``.npy``. The binary output
+skips number formatting, which dominates the cost of writing CSV, and can be
+memory-mapped back with ``numpy.load(path, mmap_mode="r")``.
+"""
+
+import csv
+import os
+import struct
+import time
+from app.command import capabilities_of
+
+DEFAULT_CHUNK_ROWS = 500_000
+RESULT_COLUMN = "result"
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_HEADER_SIZE = 128  # Fixed, so the header can be rewritten once the row count is known
+
+
+class ColumnError(ValueError):
+    """Raised when an input file or one of its columns cannot be used."""
+
+
+class ComputeReport:
+    """Summary of a finished column computation."""
+
+    __slots__ = ("rows", "empty", "seconds")
+
+    def __init__(self, rows, empty, seconds):
+        self.rows = rows
+        self.empty = empty
+        self.seconds = seconds
+
+    @property
+    def throughput(self):
+        """Number of rows computed per second."""
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.seconds:.3f}s ({self.throughput:,.0f} rows/s)"
+
+
+def column_function(command, columns):
+    """Build the chunk function applying a plugin's arithmetic to columns.
+
+    Only vectorizable commands qualify. Binary commands (those with an
+    ``operation``) take exactly two columns, ``eval`` takes an expression
+    whose variables are column names and ``mean`` averages any number of
+    columns row by row.
+
+    Args:
+        command (Command): The plugin providing the arithmetic.
+        columns (list[str]): The command's arguments after the operation name.
+
+    Returns:
+        tuple: The function mapping a dict of float64 column arrays to the
+        array of results (NaN where there is no result), and the names of the
+        columns it reads.
+
+    Raises:
+        ColumnError: If the arguments do not fit the command.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    if "vectorizable" not in capabilities_of(command):
+        raise ColumnError("This command cannot be computed over columns.")
+    if getattr(command, "operation", None) is not None:
+        if len(columns) != 2:
+            raise ColumnError("Please provide exactly two columns for a binary operation.")
+        left, right = columns
+        divides = getattr(command, "zero_division_error", None) is not None
+
+        def binary(values):
+            divisor = values[right]
+            if divides:
+                divisor = np.where(divisor == 0, np.nan, divisor)
+            return command.operation(values[left], divisor)
+        return binary, [left, right]
+
+    if getattr(command, "compile", None) is not None:
+        expression = command.compile(" ".join(columns))
+        if not expression.variables:
+            raise ColumnError("Please provide an expression over column names.")
+
+        def evaluate(values):
+            size = len(values[expression.variables[0]])
+            results, zeros = expression.evaluate_columns(values, size, float)
+            return np.where(zeros, np.nan, results)
+        return evaluate, list(expression.variables)
+
+    if getattr(command, "empty_error", None) is not None:
+        if not columns:
+            raise ColumnError("Please provide at least one column to calculate the mean.")
+        return (lambda values: np.mean([values[name] for name in columns], axis=0)), list(columns)
+
+    raise ColumnError("This command cannot be computed over columns.")
+
+
+def read_columns(source, columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Return an iterator of dicts of float64 arrays, ``chunk_rows`` rows at a time.
+
+    The header is checked before returning, so errors are raised before any
+    output is written. Cells that are empty or not numbers are read as NaN.
+
+    Raises:
+        ColumnError: If the file does not exist or lacks one of the columns.
+    """
+    try:
+        with open(source, newline="", encoding="utf-8") as file:
+            header = next(csv.reader(file), [])
+    except FileNotFoundError:
+        raise ColumnError(f"Input file '{source}' not found.") from None
+    missing = [name for name in columns if name not in header]
+    if missing:
+        raise ColumnError(f"Column(s) {', '.join(missing)} not found in {source}.")
+    return _iter_chunks(source, columns, chunk_rows)
+
+
+def _iter_chunks(source, columns, chunk_rows):
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    for chunk in pd.read_csv(source, usecols=sorted(set(columns)), chunksize=chunk_rows, engine="c"):
+        values = {}
+        for name in columns:
+            column = chunk[name]
+            if column.dtype != np.float64:
+                column = pd.to_numeric(column, errors="coerce")
+            values[name] = column.to_numpy(dtype=np.float64)
+        yield values
+
+
+def write_results(file, results):
+    """Write one result per line, leaving an empty field for NaN."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    lines = list(map(repr, results.tolist()))
+    for index in np.flatnonzero(np.isnan(results)).tolist():
+        lines[index] = ""
+    file.write("\n".join(lines))
+    file.write("\n")
+
+
+def write_npy_header(file, rows):
+    """Write a version 1.0 ``.npy`` header for a 1-D float64 array of ``rows`` values."""
+    header = f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({rows},), }}"
+    size = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2
+    file.write(_NPY_MAGIC + struct.pack("<H", size) + header.ljust(size - 1).encode("latin1") + b"\n")
+
+
+def compute_csv(source, target, function, columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Apply a chunk function to the columns of a CSV file and stream the results.
+
+    The results are written to a temporary file next to the target, which
+    replaces the target once the source has been read to the end, so the
+    source may also be the target.
+
+    Args:
+        source (str): Input CSV file with a header row.
+        target (str): Output CSV file, written with a single ``result`` column,
+            or a ``.npy`` file of float64 results.
+        function (callable): Function returned by ``column_function``.
+        columns (list[str]): Columns read from the input.
+        chunk_rows (int): Number of rows read and computed at a time.
+
+    Returns:
+        ComputeReport: Number of rows, rows without a result, and the elapsed time.
+    """
+    partial = f"{target}.{os.getpid()}.tmp"
+    try:
+        report = _compute_into(source, partial, target.endswith(".npy"), function, columns, chunk_rows)
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return report
+
+
+def _compute_into(source, target, binary, function, columns, chunk_rows):
+    """Stream the results of ``compute_csv`` into ``target``."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    rows = empty = 0
+    started = time.perf_counter()
+    chunks = read_columns(source, columns, chunk_rows)
+    with open(target, "wb" if binary else "w", encoding=None if binary else "utf-8") as file:
+        if binary:
+            write_npy_header(file, 0)
+        else:
+            file.write(RESULT_COLUMN + "\n")
+        for values in chunks:
+            with np.errstate(all="ignore"):
+                results = np.asarray(function(values), dtype="<f8")
+            if binary:
+                file.write(results.tobytes())
+            else:
+                write_results(file, results)
+            rows += len(results)
+            empty += int(np.isnan(results).sum())
+        if binary:
+            file.seek(0)
+            write_npy_header(file, rows)
+    return ComputeReport(rows, empty, time.perf_counter() - started)
@@ -1,24 +1,180 @@
 """
 
-This module defines the Command abstract base class and the CommandHandler class,
-which manages command registration and execution.
+This module defines the Command abstract base class, the CommandResult returned
+by commands that produce a value, the ErrorMessage returned by commands that
+fail, and the CommandHandler class, which manages command registration and
+execution.
 """
 
+import time
 from abc import ABC, abstractmethod
 
+# Capabilities a command declares with boolean class attributes of the same name
+CAPABILITIES = ("pure", "vectorizable", "stateful")
+
 class Command(ABC):
     """Abstract base class for commands."""
 
+    # Stateful commands keep data between calls and must run in the main process.
+    stateful = False
+    # Pure commands always return the same result for the same arguments,
+    # so their results may be cached.
+    pure = False
+    # Vectorizable commands can be computed for many lines at once by the bulk engine.
+    vectorizable = False
+
     @abstractmethod
     def execute(self):
         """Execute the command."""
 
+    def is_cacheable(self, *args):
+        """Whether the result for these arguments may be cached (pure commands only)."""
+        return self.pure
+
+    def accesses_files(self, *args):
+        """Whether these arguments make the command read or write files on the server's disk."""
+        return False
+
+class ErrorMessage(str):
+    """Message of a command that failed.
+
+    It is shown like any other message, but tells the metrics (and anything
+    else reading the output) that the command failed, whatever its wording.
+    """
+
+    __slots__ = ()
+
+class CommandResult:
+    """Structured result of a command: its value and the message shown for it.
+
+    The message is only formatted when it is read, so a pipeline stage whose
+    value is passed on to the next command never pays for formatting.
+    Results of failed commands, and of commands without a value, have
+    ``value`` set to None and a ready message, an ErrorMessage for failures.
+    """
+
+    __slots__ = ("value", "_formatter", "_args", "_message")
+
+    def __init__(self, value=None, formatter=None, args=(), message=None):
+        """Initialize the result.
+
+        Args:
+            value: The computed number, or None.
+            formatter (callable): Builds the message from ``args``, usually a
+                message template's ``format`` method.
+            args (tuple): Arguments of ``formatter``.
+            message (str): The message, when it is already known.
+        """
+        self.value = value
+        self._formatter = formatter
+        self._args = args
+        self._message = message
+
+    @property
+    def message(self):
+        """The text displayed for the result."""
+        if self._message is None:
+            self._message = self._formatter(*self._args)
+        return self._message
+
+    @property
+    def failed(self):
+        """Whether the command failed, that is whether its message is an ErrorMessage."""
+        return isinstance(self._message, ErrorMessage)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"CommandResult({self.value!r}, message={self.message!r})"
+
+def capabilities_of(command):
+    """Return the set of capabilities a command declares."""
+    return frozenset(name for name in CAPABILITIES if getattr(command, name, False))
+
+class CommandRegistry(dict):
+    """Dictionary of commands that can also hold factories for lazy commands.
+
+    A command registered through a factory is only created, and its plugin
+    module only imported, the first time it is looked up.
+
+    Storing a command replaces the previous one with a single dictionary
+    assignment, so a command can be swapped while others are running: a
+    lookup returns either the old or the new command, and calls already
+    running finish with the command they started with. ``version`` counts
+    the changes, for the tables that cache commands by name.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.factories = {}
+        self.capabilities = {}
+        self.version = 0
+
+    def __missing__(self, name):
+        factory = self.factories.get(name)
+        if factory is None:
+            raise KeyError(name)
+        command = factory()
+        self[name] = command
+        # Removed after the command is stored, so concurrent lookups always find one or the other
+        self.factories.pop(name, None)
+        return command
+
+    def __setitem__(self, name, command):
+        self.capabilities[name] = capabilities_of(command)
+        super().__setitem__(name, command)
+        self.version += 1
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        self.capabilities.pop(name, None)
+        self.version += 1
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self.factories
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def names(self):
+        """Return the names of every loaded and not yet loaded command."""
+        return sorted(set(self.keys()) | set(self.factories))
+
+    def load_all(self):
+        """Create every command that is still waiting on its factory."""
+        for name in list(self.factories):
+            self.get(name)
+
+    def has_capability(self, name, capability):
+        """Whether a command declares a capability, creating it if it was not loaded yet."""
+        if name not in self.capabilities and self.get(name) is None:
+            return False
+        return capability in self.capabilities[name]
+
+    def unregister(self, name):
+        """Remove a command or its factory; unknown names are ignored."""
+        self.factories.pop(name, None)
+        if name in self.keys():
+            del self[name]
+
 class CommandHandler:
     """Class to manage command registration and execution."""
 
-    def __init__(self):
-        """Initialize the CommandHandler with an empty command registry."""
-        self.commands = {}
+    def __init__(self, cache=None, metrics=None):
+        """Initialize the CommandHandler with an empty command registry.
+
+        Args:
+            cache (ResultCache): Optional cache for the results of pure commands.
+            metrics (Metrics): Optional registry recording the calls, errors and
+                latency of every command.
+        """
+        self.commands = CommandRegistry()
+        self.cache = cache
+        self.metrics = metrics
 
     def register_command(self, name, command):
         """Register a command with a given name.
@@ -28,6 +184,19 @@ class CommandHandler:
             command (Command): The command instance to register.
         """
         self.commands[name] = command
+        self.commands.factories.pop(name, None)
+
+    def register_factory(self, name, factory):
+        """Register a command that is created by calling ``factory`` on first use.
+
+        Args:
+            name (str): The name of the command.
+            factory (callable): Function returning the command instance.
+        """
+        self.commands.factories[name] = factory
+        if name in self.commands.keys():
+            # The factory creates the command again on its next lookup
+            del self.commands[name]
 
     def execute_command(self, command_name, *args):
         """Execute a command by name, passing any arguments to it.
@@ -40,6 +209,222 @@ class CommandHandler:
             KeyError: If the command does not exist.
         """
         command = self.commands.get(command_name)
-        if command is not None:
-            return command.execute(*args)  # Pass the args to the command's execute method
-        raise KeyError(f"No such command: {command_name}")
\ No newline at end of file
+        if command is None:
+            raise KeyError(f"No such command: {command_name}")
+        if self.metrics is None:
+            return self._execute(command_name, command, args)
+
+        started = time.perf_counter_ns()
+        try:
+            result = self._execute(command_name, command, args)
+        except Exception:
+            self.metrics.record(command_name, time.perf_counter_ns() - started, True)
+            raise
+        # Plugins report most failures as ErrorMessages rather than exceptions
+        self.metrics.record(command_name, time.perf_counter_ns() - started, isinstance(result, ErrorMessage))
+        return result
+
+    def evaluate_command(self, command_name, *args, **values):
+        """Execute a command by name and return a CommandResult keeping its value.
+
+        Commands without an ``evaluate`` method are executed normally; their
+        output becomes the message of a result without value. Results are
+        not cached, since the cache holds message strings.
+
+        Args:
+            command_name (str): The name of the command to execute.
+            *args: Arguments to pass to the command, strings or numbers.
+            **values: Variables bound to numbers, for commands that accept them.
+
+        Raises:
+            KeyError: If the command does not exist.
+        """
+        command = self.commands.get(command_name)
+        if command is None:
+            raise KeyError(f"No such command: {command_name}")
+        if self.metrics is None:
+            return self._evaluate(command, args, values)
+
+        started = time.perf_counter_ns()
+        try:
+            result = self._evaluate(command, args, values)
+        except Exception:
+            self.metrics.record(command_name, time.perf_counter_ns() - started, True)
+            raise
+        self.metrics.record(command_name, time.perf_counter_ns() - started, result.failed)
+        return result
+
+    @staticmethod
+    def _evaluate(command, args, values):
+        """Run a command's ``evaluate`` method, or wrap the output of ``execute``."""
+        evaluate = getattr(command, "evaluate", None)
+        if evaluate is None:
+            output = command.execute(*args)
+            if output is None:
+                return CommandResult(message="")
+            # ErrorMessages are kept as they are, so that the result is marked as failed
+            return CommandResult(message=output if isinstance(output, str) else str(output))
+        return evaluate(*args, **values)
+
+    def _execute(self, command_name, command, args):
+        """Run a command, through the result cache when it is cacheable."""
+        if self.cache is not None and command.is_cacheable(*args):
+            return self.cache.get_or_compute((command_name, args), lambda: command.execute(*args))
+        return command.execute(*args)  # Pass the args to the command's execute method
+
+# Commands available inside a worker process, set once by _init_worker.
+_WORKER_COMMANDS = {}
+
+def _init_worker(commands):
+    """Store the picklable commands in a freshly started worker process."""
+    _WORKER_COMMANDS.update(commands)
+
+def _execute_calls(commands, calls, evaluate=False):
+    """Execute (name, args) pairs, returning each result or the exception it raised.
+
+    With ``evaluate``, every result is a CommandResult whose message is not formatted.
+
+    Returns:
+        tuple: The results and the execution time of every call in nanoseconds,
+        which the calling process records in its metrics.
+    """
+    results, latencies = [], []
+    for name, args in calls:
+        started = time.perf_counter_ns()
+        try:
+            if evaluate:
+                results.append(CommandHandler._evaluate(commands[name], args, {}))  # pylint: disable=protected-access
+            else:
+                results.append(commands[name].execute(*args))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            results.append(e)
+        latencies.append(time.perf_counter_ns() - started)
+    return results, latencies
+
+def _execute_chunk(calls, evaluate=False):
+    """Worker entry point executing a chunk of calls with the worker's commands."""
+    return _execute_calls(_WORKER_COMMANDS, calls, evaluate)
+
+class ParallelCommandHandler(CommandHandler):
+    """Command handler that spreads independent commands over a worker pool.
+
+    Stateless commands are sent to the pool in chunks; stateful commands
+    (such as ``history``) always run serially in the calling process.
+    Results are returned in input order. Worker processes get a copy of the
+    commands when the pool starts, so the pool is started again once the
+    registry has changed (for example after a plugin was reloaded).
+
+    The calls run by the pool are recorded in ``metrics`` once their chunk
+    is back. They do not go through ``cache``, which lives in the calling
+    process: looking every call up before sending it to a worker would cost
+    more than most arithmetic commands take to run.
+    """
+
+    EXECUTORS = ("process", "thread")
+
+    def __init__(self, executor="process", max_workers=None, chunk_size=256):
+        """Initialize the handler.
+
+        Args:
+            executor (str): ``"process"`` for a ProcessPoolExecutor or ``"thread"``
+                for a ThreadPoolExecutor.
+            max_workers (int): Number of workers (defaults to the number of cores).
+            chunk_size (int): Number of calls sent to a worker at once.
+        """
+        super().__init__()
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}. Available executors: {', '.join(self.EXECUTORS)}.")
+        self.executor = executor
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._version = None  # Registry version the worker processes were started with
+
+    def _get_pool(self):
+        """Start the worker pool on first use, and again when the worker processes hold outdated commands."""
+        outdated = self._version != getattr(self.commands, "version", None)
+        if self._pool is not None and self.executor == "process" and outdated:
+            self.close()
+        if self._pool is None:
+            # Imported here so that the worker machinery is only loaded when needed
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+            if self.executor == "process":
+                if isinstance(self.commands, CommandRegistry):
+                    self.commands.load_all()
+                stateless = {
+                    name: command for name, command in self.commands.items()
+                    if "stateful" not in capabilities_of(command)
+                }
+                # Read after loading, since creating a lazy command changes the version
+                self._version = getattr(self.commands, "version", None)
+                self._pool = ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=(stateless,))
+            else:
+                self._pool = ThreadPoolExecutor(self.max_workers)
+        return self._pool
+
+    def execute_many(self, calls, evaluate=False):
+        """Execute many commands, in parallel where possible.
+
+        Args:
+            calls (list[tuple[str, tuple]]): Command names with their arguments.
+            evaluate (bool): Return CommandResults keeping the values, as
+                ``evaluate_command`` does, instead of the messages.
+
+        Returns:
+            list: The result of every call in input order. A call that raised
+            an exception has the exception instance as its result.
+        """
+        calls = list(calls)
+        results = [None] * len(calls)
+        parallel, serial = [], []
+        for index, (name, _args) in enumerate(calls):
+            command = self.commands.get(name)
+            if command is None or "stateful" in capabilities_of(command):
+                serial.append(index)
+            else:
+                parallel.append(index)
+
+        if parallel:
+            pool = self._get_pool()
+            chunks = [parallel[i:i + self.chunk_size] for i in range(0, len(parallel), self.chunk_size)]
+            if self.executor == "process":
+                futures = [pool.submit(_execute_chunk, [calls[i] for i in chunk], evaluate) for chunk in chunks]
+            else:
+                futures = [
+                    pool.submit(_execute_calls, self.commands, [calls[i] for i in chunk], evaluate) for chunk in chunks
+                ]
+            for chunk, future in zip(chunks, futures):
+                chunk_results, latencies = future.result()
+                for index, result in zip(chunk, chunk_results):
+                    results[index] = result
+                if self.metrics is not None:
+                    self._record_chunk([calls[i][0] for i in chunk], chunk_results, latencies)
+
+        for index in serial:
+            name, args = calls[index]
+            try:
+                if evaluate:
+                    results[index] = self.evaluate_command(name, *args)
+                else:
+                    results[index] = self.execute_command(name, *args)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                results[index] = e
+        return results
+
+    def _record_chunk(self, names, results, latencies):
+        """Record the calls of a chunk run by the pool in the metrics."""
+        for name, result, latency in zip(names, results, latencies):
+            error = isinstance(result, (Exception, ErrorMessage)) or getattr(result, "failed", False)
+            self.metrics.record(name, latency, error)
+
+    def close(self):
+        """Shut the worker pool down."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
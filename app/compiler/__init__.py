@@ -0,0 +1,271 @@
+"""
+This module compiles command lines into compact, reusable records.
+
+Each line is tokenized once into a CommandRecord holding an opcode, the
+pre-parsed operands and the original text. Binary arithmetic commands get
+their operands parsed with the command's numeric backend at compile time
+and skip argument validation and parsing when executed. Records can be written to a binary
+file and replayed later without tokenizing the lines again; ``Decimal``
+operands are stored parsed, and only parsed again when the file is replayed
+by a command with another numeric backend.
+
+Pre-parsed records are recorded in the handler's metrics like any other
+command, but do not go through its result cache: computing them takes
+less time than looking their arguments up.
+"""
+
+import marshal
+import struct
+import time
+from decimal import Decimal
+from app.batch import chunked
+from app.command import CommandResult, ErrorMessage
+from app.pipeline import evaluate_pipeline, is_pipeline, run_pipeline
+
+MAGIC = b"CALCREC1"
+BLOCK_SIZE = 1024  # Records per marshalled block in a record file
+_BLOCK_HEADER = struct.Struct("<I")  # Byte length of the block that follows
+# How the operands of a record are stored: raw arguments, the text of parsed operands
+# (True and False in older files), or parsed Decimal operands as ints or strings
+_ARGS, _TEXT, _DECIMAL = 0, 1, 2
+
+
+class CommandRecord:
+    """One pre-parsed command line.
+
+    Attributes:
+        opcode (int): Index of the command name in the compiler's name table.
+        operands (tuple): Operands parsed by the command's backend when
+            ``fast`` is set, otherwise the raw argument strings.
+        text (str): The original command line, used for the history.
+        fast (bool): Whether the record can use the compiled arithmetic path.
+    """
+
+    __slots__ = ("opcode", "operands", "text", "fast")
+
+    def __init__(self, opcode, operands, text, fast=False):
+        self.opcode = opcode
+        self.operands = operands
+        self.text = text
+        self.fast = fast
+
+    def __repr__(self):
+        return f"CommandRecord({self.opcode!r}, {self.operands!r}, {self.text!r}, fast={self.fast!r})"
+
+
+class CommandCompiler:
+    """Turns command lines into CommandRecords and executes them.
+
+    The compiler owns the opcode table: the list of command names seen so
+    far. Commands are resolved through the handler once per opcode, not
+    once per execution, and resolved again whenever the handler's registry
+    changes (for example when a plugin is reloaded).
+    """
+
+    def __init__(self, command_handler):
+        """Initialize the compiler.
+
+        Args:
+            command_handler (CommandHandler): Handler whose commands are compiled.
+        """
+        self.command_handler = command_handler
+        self.names = []
+        self.opcodes = {}
+        self._commands = []
+        self._version = None
+
+    def opcode(self, name):
+        """Return the opcode of a command name, allocating a new one if needed."""
+        opcode = self.opcodes.get(name)
+        if opcode is None:
+            opcode = self.opcodes[name] = len(self.names)
+            self.names.append(name)
+            self._commands.append(self.command_handler.commands.get(name))
+        return opcode
+
+    def command(self, opcode):
+        """Return the command of an opcode, or None if it does not exist."""
+        return self._table()[opcode]
+
+    def _table(self):
+        """Return the commands by opcode, resolving them again after the registry changed."""
+        commands = self.command_handler.commands
+        if getattr(commands, "version", None) != self._version:
+            self._commands = [commands.get(name) for name in self.names]
+            # Read after resolving, since creating a lazy command changes the version
+            self._version = getattr(commands, "version", None)
+        return self._commands
+
+    def compile(self, line):
+        """Compile one command line, or return None for a blank line."""
+        parts = line.split()
+        if not parts:
+            return None
+        return self._record(self.opcode(parts[0]), tuple(parts[1:]), line)
+
+    def _record(self, opcode, args, text):
+        """Build a record, parsing the operands of binary arithmetic commands."""
+        command = self._table()[opcode]
+        if len(args) == 2 and getattr(command, "operation", None) is not None:
+            parse = command.backend.parse
+            try:
+                return CommandRecord(opcode, (parse(args[0]), parse(args[1])), text, True)
+            except command.backend.errors:
+                pass  # The regular path returns the command's invalid input message
+        return CommandRecord(opcode, args, text)
+
+    def execute(self, record):
+        """Execute a record and return the command's output.
+
+        Raises:
+            KeyError: If the record's command does not exist.
+        """
+        command = self._table()[record.opcode]
+        if command is None:
+            raise KeyError(f"No such command: {self.names[record.opcode]}")
+        if record.fast:
+            metrics = self.command_handler.metrics
+            if metrics is None:
+                return self._execute_fast(command, record)
+            started = time.perf_counter_ns()
+            output = self._execute_fast(command, record)
+            error = isinstance(output, ErrorMessage)
+            metrics.record(self.names[record.opcode], time.perf_counter_ns() - started, error)
+            return output
+        if is_pipeline(record.text):
+            return run_pipeline(self.command_handler, record.text)
+        return self.command_handler.execute_command(self.names[record.opcode], *record.operands)
+
+    def evaluate(self, record):
+        """Execute a record and return its CommandResult, whose message is only formatted when read.
+
+        Raises:
+            KeyError: If the record's command does not exist.
+        """
+        command = self._table()[record.opcode]
+        if command is None:
+            raise KeyError(f"No such command: {self.names[record.opcode]}")
+        if record.fast:
+            metrics = self.command_handler.metrics
+            if metrics is None:
+                return self._evaluate_fast(command, record)
+            started = time.perf_counter_ns()
+            result = self._evaluate_fast(command, record)
+            metrics.record(self.names[record.opcode], time.perf_counter_ns() - started, result.failed)
+            return result
+        if is_pipeline(record.text):
+            return evaluate_pipeline(self.command_handler, record.text)
+        return self.command_handler.evaluate_command(self.names[record.opcode], *record.operands)
+
+    @staticmethod
+    def _execute_fast(command, record):
+        """Compute a pre-parsed binary record and return its message."""
+        a_value, b_value = record.operands
+        zero_error = getattr(command, "zero_division_error", None)
+        if zero_error is not None and b_value == 0:
+            return zero_error
+        try:
+            return command.message.format(a_value, b_value, command.compute(a_value, b_value))
+        except command.backend.errors:
+            return ErrorMessage(command.invalid_error.format(*record.text.split()[1:]))
+
+    @staticmethod
+    def _evaluate_fast(command, record):
+        """Compute a pre-parsed binary record and return its CommandResult."""
+        a_value, b_value = record.operands
+        zero_error = getattr(command, "zero_division_error", None)
+        if zero_error is not None and b_value == 0:
+            return CommandResult(message=zero_error)
+        try:
+            value = command.compute(a_value, b_value)
+        except command.backend.errors:
+            return CommandResult(message=ErrorMessage(command.invalid_error.format(*record.text.split()[1:])))
+        return CommandResult(value, command.message.format, (a_value, b_value, value))
+
+    def write_records(self, records, file):
+        """Serialize records to a binary file opened in ``wb`` mode.
+
+        Records are written in length-prefixed marshalled blocks of
+        ``BLOCK_SIZE`` records, so reading them back costs one read and one
+        ``marshal.loads`` per block rather than per record.
+
+        Returns:
+            int: Number of records written.
+        """
+        file.write(MAGIC)
+        defined = set()
+        written = 0
+        for block in chunked(records, BLOCK_SIZE):
+            names = []
+            for record in block:
+                if record.opcode not in defined:
+                    defined.add(record.opcode)
+                    names.append((record.opcode, self.names[record.opcode]))
+            kinds, operands = zip(*map(_stored, block))
+            data = marshal.dumps((
+                tuple(names),
+                tuple(record.opcode for record in block),
+                operands,
+                tuple(record.text for record in block),
+                kinds,
+            ))
+            file.write(_BLOCK_HEADER.pack(len(data)))
+            file.write(data)
+            written += len(block)
+        return written
+
+    def read_records(self, file):
+        """Yield the records of a binary file opened in ``rb`` mode.
+
+        Opcodes from the file are mapped onto this compiler's opcode table.
+
+        Raises:
+            ValueError: If the file is not a compiled command file.
+        """
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a compiled command file.")
+        mapping = {}
+        while True:
+            header = file.read(_BLOCK_HEADER.size)
+            if len(header) < _BLOCK_HEADER.size:
+                return
+            names, opcodes, operands, texts, kinds = marshal.loads(file.read(_BLOCK_HEADER.unpack(header)[0]))
+            for opcode, name in names:
+                mapping[opcode] = self.opcode(name)
+            # Whether each command of the block takes the stored Decimal operands as they are
+            table = self._table()
+            decimal = {
+                opcode: getattr(getattr(table[opcode], "backend", None), "number", None) is Decimal
+                for opcode in set(map(mapping.get, opcodes))
+            }
+            for index, opcode in enumerate(opcodes):
+                opcode = mapping[opcode]
+                kind = kinds[index]
+                if kind == _DECIMAL and decimal[opcode]:
+                    a_value, b_value = operands[index]
+                    yield CommandRecord(opcode, (Decimal(a_value), Decimal(b_value)), texts[index], True)
+                elif kind == _DECIMAL:
+                    # Replayed with another backend, which parses the operands again
+                    yield self._record(opcode, tuple(texts[index].split()[1:]), texts[index])
+                elif kind:
+                    yield self._record(opcode, operands[index], texts[index])
+                else:
+                    yield CommandRecord(opcode, operands[index], texts[index])
+
+
+def _stored(record):
+    """Return how the operands of a record are stored in a record file, and the stored operands."""
+    if not record.fast:
+        return _ARGS, record.operands
+    if type(record.operands[0]) is Decimal:
+        return _DECIMAL, tuple(map(_stored_decimal, record.operands))
+    # Other parsed operands are stored as their source text, to be parsed again when replayed
+    return _TEXT, tuple(record.text.split()[1:])
+
+
+def _stored_decimal(value):
+    """Return a Decimal as the int or string ``Decimal`` rebuilds it from fastest, keeping its exact form."""
+    sign, _digits, exponent = value.as_tuple()
+    if exponent == 0 and not (sign and not value):
+        return int(value)
+    return str(value)
@@ -0,0 +1,280 @@
+"""
+This module compiles infix arithmetic expressions such as ``(a + b) * c / d``.
+
+Expressions are parsed once into a small tree of nodes using the operations
+of the add, subtract, multiply and divide plugins, computed with a numeric
+backend (``Decimal`` by default). Sub-expressions without variables are
+folded into constants at compile time, and compiled expressions are cached
+by their source text and backend. A compiled expression evaluates either one set of variable
+values or whole columns of values at once.
+"""
+
+import ast
+from decimal import Decimal
+from functools import lru_cache
+from app.numeric import DEFAULT_BACKEND
+from app.pluggin.add import AddCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.multiply import MultiplyCommand
+from app.pluggin.subtract import SubtractCommand
+
+CACHE_SIZE = 1024  # Number of compiled expressions kept by compile_expression
+# Most operators an expression may have, keeping its tree well within the recursion limit
+MAX_OPERATORS = 256
+_OPERATIONS = {
+    ast.Add: AddCommand.operation,
+    ast.Sub: SubtractCommand.operation,
+    ast.Mult: MultiplyCommand.operation,
+    ast.Div: DivideCommand.operation,
+}
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be parsed or a variable is not bound."""
+
+
+class Constant:
+    """A number, or a sub-expression folded at compile time."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, values):
+        """Return the constant."""
+        return self.value
+
+    def evaluate_columns(self, columns, zeros, number):
+        """Return the constant converted to the column number type."""
+        return number(self.value)
+
+
+class Variable:
+    """A name bound to a value when the expression is evaluated."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, values):
+        """Return the bound value of the variable."""
+        try:
+            return values[self.name]
+        except KeyError:
+            raise ExpressionError(f"Variable '{self.name}' is not bound.") from None
+
+    def evaluate_columns(self, columns, zeros, number):
+        """Return the bound column of the variable."""
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise ExpressionError(f"Variable '{self.name}' is not bound.") from None
+
+
+class Negate:
+    """Unary minus."""
+
+    __slots__ = ("operand",)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, values):
+        """Return the negated operand."""
+        return -self.operand.evaluate(values)
+
+    def evaluate_columns(self, columns, zeros, number):
+        """Return the negated operand column."""
+        return -self.operand.evaluate_columns(columns, zeros, number)
+
+
+class BinaryOperation:
+    """One of the four arithmetic operations applied to two sub-expressions.
+
+    ``operation`` is the plugin's operator, which also works element-wise on
+    arrays; ``compute`` is the same operation as computed by the backend.
+    """
+
+    __slots__ = ("operation", "compute", "left", "right")
+
+    def __init__(self, operation, left, right, compute=None):
+        self.operation = operation
+        self.compute = compute or operation
+        self.left = left
+        self.right = right
+
+    def evaluate(self, values):
+        """Apply the operation to the evaluated operands.
+
+        Raises:
+            ZeroDivisionError: If the operation is a division by zero.
+        """
+        a_value = self.left.evaluate(values)
+        b_value = self.right.evaluate(values)
+        if self.operation is DivideCommand.operation and b_value == 0:
+            raise ZeroDivisionError(DivideCommand.zero_division_error)
+        return self.compute(a_value, b_value)
+
+    def evaluate_columns(self, columns, zeros, number):
+        """Apply the operation element-wise, marking divisions by zero in ``zeros``."""
+        a_values = self.left.evaluate_columns(columns, zeros, number)
+        b_values = self.right.evaluate_columns(columns, zeros, number)
+        if self.operation is DivideCommand.operation:
+            import numpy as np  # pylint: disable=import-outside-toplevel
+            zero = np.broadcast_to(b_values == 0, zeros.shape)
+            if zero.any():
+                zeros |= zero
+                b_values = np.where(zero, number(1), b_values)
+        return self.operation(a_values, b_values)
+
+
+class Expression:
+    """A compiled expression.
+
+    Attributes:
+        source (str): The expression text.
+        variables (tuple[str]): Names of the variables, in order of appearance.
+    """
+
+    __slots__ = ("source", "variables", "_root")
+
+    def __init__(self, source, root, variables):
+        self.source = source
+        self.variables = variables
+        self._root = root
+
+    @property
+    def is_constant(self):
+        """Whether the whole expression was folded into a constant."""
+        return isinstance(self._root, Constant)
+
+    def evaluate(self, values=None):
+        """Evaluate the expression for one set of values.
+
+        Args:
+            values (dict): Mapping of variable names to values of the backend's number type.
+
+        Raises:
+            ExpressionError: If a variable is not bound.
+            ZeroDivisionError: If the expression divides by zero.
+        """
+        return self._root.evaluate(values or {})
+
+    def evaluate_columns(self, columns, size, number=Decimal):
+        """Evaluate the expression for whole columns of values at once.
+
+        Args:
+            columns (dict): Mapping of variable names to NumPy arrays of ``size``
+                values (float64, or object arrays of ``Decimal``).
+            size (int): Number of rows.
+            number (type): Type that constants are converted to, ``Decimal``
+                for object columns or ``float`` for float64 columns.
+
+        Returns:
+            tuple: The array of results and a boolean array marking the rows
+            that divide by zero, whose results are meaningless.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        zeros = np.zeros(size, dtype=bool)
+        values = self._root.evaluate_columns(columns, zeros, number)
+        dtype = object if number is Decimal else np.float64
+        return np.broadcast_to(np.asarray(values, dtype=dtype), (size,)), zeros
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(source, backend=DEFAULT_BACKEND):
+    """Compile an expression, reusing the cached result for the same text and backend.
+
+    Args:
+        source (str): The expression text.
+        backend (NumericBackend): Backend parsing the literals and computing the operations.
+
+    Raises:
+        ExpressionError: If the text is not a valid arithmetic expression, has
+            a literal the backend cannot parse, or has more than MAX_OPERATORS operators.
+    """
+    if sum(map(source.count, "+-*/")) > MAX_OPERATORS:
+        raise ExpressionError(f"Expression too long: at most {MAX_OPERATORS} operators are supported.")
+    variables = []
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+        root = _compile_node(tree.body, source.strip(), variables, backend)
+    except (SyntaxError, ValueError, RecursionError, MemoryError) + backend.errors:
+        raise ExpressionError(f"Invalid expression: {source}") from None
+    return Expression(source, root, tuple(variables))
+
+
+def split_bindings(args):
+    """Split ``eval`` arguments into the expression text and its variable bindings.
+
+    Arguments of the form ``name=value`` bind variables; the others are
+    joined into the expression.
+
+    Returns:
+        tuple: The expression text and a dict of the raw bound values.
+    """
+    tokens, bindings = [], {}
+    for arg in args:
+        name, separator, value = arg.partition("=")
+        if separator and name.isidentifier():
+            bindings[name] = value
+        else:
+            tokens.append(arg)
+    return " ".join(tokens), bindings
+
+
+def parse_bindings(bindings, backend=DEFAULT_BACKEND):
+    """Convert raw bound values to numbers of the backend (``Decimal`` by default).
+
+    Raises:
+        ExpressionError: If a bound value is not a valid number.
+    """
+    parse = backend.parse
+    try:
+        return {name: parse(value) for name, value in bindings.items()}
+    except backend.errors:
+        invalid = next(value for value in bindings.values() if not _is_number(value, backend))
+        raise ExpressionError(f"Invalid number input: '{invalid}' is not a valid number.") from None
+
+
+def _is_number(value, backend):
+    try:
+        backend.parse(value)
+    except backend.errors:
+        return False
+    return True
+
+
+def _compile_node(node, source, variables, backend):
+    """Turn a Python AST node into an expression node, folding constant sub-trees."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # Parse the literal text itself so that 0.1 keeps its exact decimal value
+        return Constant(backend.parse(ast.get_source_segment(source, node)))
+    if isinstance(node, ast.Name):
+        if node.id not in variables:
+            variables.append(node.id)
+        return Variable(node.id)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _compile_node(node.operand, source, variables, backend)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(operand, Constant):
+            return Constant(-operand.value)
+        return Negate(operand)
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATIONS:
+        operation = _OPERATIONS[type(node.op)]
+        compiled = BinaryOperation(
+            operation,
+            _compile_node(node.left, source, variables, backend),
+            _compile_node(node.right, source, variables, backend),
+            backend.apply(operation),
+        )
+        if isinstance(compiled.left, Constant) and isinstance(compiled.right, Constant):
+            try:
+                return Constant(compiled.evaluate({}))
+            except ArithmeticError:
+                pass  # Division by zero and other signals are reported when evaluated
+        return compiled
+    raise ExpressionError(f"Invalid expression: {source}")
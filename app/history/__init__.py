@@ -0,0 +1,149 @@
+"""
+This module contains the HistoryBuffer class, a fixed-size ring buffer
+used as the in-memory store for the command history, and the functions
+reading history CSV files into it.
+"""
+
+import csv
+import mmap
+import os
+from collections import deque
+
+DEFAULT_MAX_SIZE = 10
+# Files larger than this are read from the end through a memory map.
+MMAP_THRESHOLD = 64 * 1024
+
+
+class HistoryBuffer:
+    """Preallocated ring buffer holding the most recent commands.
+
+    Appending is O(1): once the buffer is full the oldest entry is
+    overwritten instead of shifting or reallocating storage. A pandas
+    DataFrame view is only built when it is requested, and it is cached
+    until the buffer changes again. ``version`` counts the changes, for
+    other views cached by their users.
+    """
+
+    __slots__ = ("capacity", "version", "_items", "_start", "_size", "_view")
+
+    def __init__(self, capacity=DEFAULT_MAX_SIZE):
+        """Initialize the buffer.
+
+        Args:
+            capacity (int): Maximum number of commands kept in memory.
+        """
+        capacity = int(capacity)
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1.")
+        self.capacity = capacity
+        self.version = 0
+        self._items = [None] * capacity
+        self._start = 0
+        self._size = 0
+        self._view = None
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        items, start, capacity = self._items, self._start, self.capacity
+        for offset in range(self._size):
+            yield items[(start + offset) % capacity]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("history index out of range")
+        return self._items[(self._start + index) % self.capacity]
+
+    def append(self, command_str):
+        """Add a command, evicting the oldest one when the buffer is full."""
+        if self._size < self.capacity:
+            self._items[(self._start + self._size) % self.capacity] = command_str
+            self._size += 1
+        else:
+            self._items[self._start] = command_str
+            self._start = (self._start + 1) % self.capacity
+        self.version += 1
+        self._view = None
+
+    def extend(self, commands):
+        """Append every command from an iterable."""
+        for command_str in commands:
+            self.append(command_str)
+
+    def clear(self):
+        """Remove every command while keeping the preallocated storage."""
+        self._items = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+        self.version += 1
+        self._view = None
+
+    def to_list(self):
+        """Return the commands from oldest to newest."""
+        return list(self)
+
+    def to_dataframe(self):
+        """Return a DataFrame view of the history, built lazily and cached."""
+        if self._view is None:
+            import pandas as pd  # pylint: disable=import-outside-toplevel
+            self._view = pd.DataFrame({"Command": self.to_list()}, columns=["Command"])
+        return self._view
+
+
+def read_history_csv(filename, tail=None):
+    """Read the commands of a history CSV file in a single linear pass.
+
+    Args:
+        filename (str): CSV file with a "Command" column.
+        tail (int): Only return the last ``tail`` commands, or None for all of them.
+            Large files are then scanned backwards through a memory map, so the
+            cost depends on ``tail`` rather than on the file size.
+
+    Returns:
+        list[str]: The commands from oldest to newest.
+    """
+    if tail is not None and os.path.getsize(filename) > MMAP_THRESHOLD:
+        commands = _read_tail_mmap(filename, tail)
+        if commands is not None:
+            return commands
+
+    with open(filename, newline="", encoding="utf-8") as file:
+        commands = (row["Command"] for row in csv.DictReader(file))
+        if tail is None:
+            return list(commands)
+        return list(deque(commands, maxlen=tail))
+
+
+def _read_tail_mmap(filename, count):
+    """Return the last ``count`` commands by scanning a mapped file from the end.
+
+    Returns None when the tail cannot be split on line boundaries (a quoted
+    field spanning several lines), so the caller falls back to streaming.
+    """
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header_end = data.find(b"\n")
+        if header_end < 0:
+            return None
+        header = next(csv.reader([data[:header_end].decode("utf-8")]))
+        if "Command" not in header:
+            return None
+        column = header.index("Command")
+
+        end = len(data)
+        if data[end - 1:end] == b"\n":
+            end -= 1
+        start = end
+        lines = []
+        while len(lines) < count and start > header_end:
+            newline = data.rfind(b"\n", header_end, start)
+            lines.append(data[newline + 1:start])
+            start = newline
+
+    lines.reverse()
+    if any(line.count(b'"') % 2 for line in lines):
+        return None
+    rows = csv.reader([line.decode("utf-8").rstrip("\r") for line in lines])
+    return [row[column] if len(row) > column else "" for row in rows]
@@ -0,0 +1,155 @@
+"""
+This module contains the HistoryJournal class, an append-only write-ahead
+log of the command history.
+
+Every recorded command is appended to the journal as it happens, so a crash
+loses at most the records that were not flushed yet, and the full history
+never has to be rewritten at exit. Each line is one record: ``A<TAB>command``
+for an appended command or ``C`` for a clear. The journal is compacted
+periodically by rewriting it with only the entries still in memory.
+
+A record torn by a crash in the middle of a write is cut off when the
+journal is opened again, so that the next record starts on its own line.
+"""
+
+import logging
+import os
+import re
+import time
+
+FSYNC_POLICIES = ("always", "interval", "never")
+_TAIL_BLOCK = 4096  # Bytes read at a time when looking for the last complete record
+
+
+def _escape(command_str):
+    return command_str.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _unescape(text):
+    return re.sub(r"\\(.)", lambda match: "\n" if match.group(1) == "n" else match.group(1), text)
+
+
+def _truncate_torn_record(path):
+    """Cut the journal after its last newline-terminated record."""
+    try:
+        file = open(path, "r+b")  # pylint: disable=consider-using-with
+    except FileNotFoundError:
+        return
+    with file:
+        end = position = file.seek(0, os.SEEK_END)
+        keep = 0
+        while position > 0:
+            start = max(0, position - _TAIL_BLOCK)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                keep = start + newline + 1
+                break
+            position = start
+        if keep < end:
+            file.truncate(keep)
+            logging.warning("Discarded a torn record at the end of the history journal %s.", path)
+
+
+class HistoryJournal:
+    """Append-only journal of history records with buffered writes."""
+
+    def __init__(self, path, fsync="interval", fsync_interval=1.0, flush_every=1, compact_every=1000):
+        """Open (or create) a journal.
+
+        Args:
+            path (str): Journal file path.
+            fsync (str): ``"always"`` to fsync after every flush, ``"interval"`` to
+                fsync at most every ``fsync_interval`` seconds, or ``"never"``.
+            fsync_interval (float): Seconds between two fsyncs with the interval policy.
+            flush_every (int): Number of records buffered before they are written.
+            compact_every (int): Number of records after which compaction is due.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}. Available policies: {', '.join(FSYNC_POLICIES)}.")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.flush_every = max(1, int(flush_every))
+        self.compact_every = max(1, int(compact_every))
+        self.records_since_compaction = 0
+        self._pending = []
+        self._last_fsync = time.monotonic()
+        _truncate_torn_record(path)
+        self._file = open(path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def append(self, command_str):
+        """Record an appended command."""
+        self._write(f"A\t{_escape(command_str)}\n")
+
+    def clear(self):
+        """Record that the history was cleared."""
+        self._write("C\n")
+
+    def _write(self, record):
+        self._pending.append(record)
+        self.records_since_compaction += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records and fsync them according to the policy."""
+        if self._pending:
+            self._file.write("".join(self._pending))
+            self._pending.clear()
+        self._file.flush()
+        now = time.monotonic()
+        if self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    @property
+    def needs_compaction(self):
+        """Whether enough records were written since the last compaction."""
+        return self.records_since_compaction >= self.compact_every
+
+    def compact(self, commands):
+        """Atomically replace the journal with one record per remaining command."""
+        self._pending.clear()
+        self._file.close()
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write("".join(f"A\t{_escape(command_str)}\n" for command_str in commands))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        self.records_since_compaction = 0
+
+    def replay(self, history):
+        """Rebuild a history buffer from the journal records.
+
+        Args:
+            history (HistoryBuffer): Buffer cleared and filled from the journal.
+
+        Returns:
+            int: Number of records read.
+        """
+        self.flush()
+        history.clear()
+        records = 0
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                if not line.endswith("\n"):
+                    break  # Torn record from a crash in the middle of a write
+                records += 1
+                if line.startswith("A\t"):
+                    history.append(_unescape(line[2:].rstrip("\n")))
+                elif line.startswith("C"):
+                    history.clear()
+        self.records_since_compaction = records
+        return records
+
+    def close(self):
+        """Flush, fsync and close the journal."""
+        if self._file.closed:
+            return
+        self.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
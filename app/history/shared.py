@@ -0,0 +1,307 @@
+"""
+This module contains the SharedHistory class, a command history kept in
+shared memory so that several calculator processes append to one history
+instead of overwriting each other's history file.
+
+The segment holds a header followed by a ring of fixed-size records::
+
+    header: magic, capacity, record size, head, flushed, first
+    record: sequence, timestamp, latency, command length, result length,
+            UTF-8 command and result
+
+``head`` counts the records ever appended; record ``t`` lives in slot
+``t % capacity``. Each slot is protected by a seqlock: its sequence is
+``2t + 1`` while record ``t`` is being written and ``2t + 2`` once it is
+complete. Readers take no lock. They decode a record straight from the
+shared buffer and keep it only if the sequence is complete and unchanged
+afterwards, retrying otherwise, and skip the records that were
+overwritten before they were read.
+
+Python has no atomic increment on shared memory, so writers claim their
+record number under a short lock on a lock file; the record itself is
+written outside the lock. Entries are made durable by ``flush``, which one
+process at a time runs to append the entries written since the last flush
+to a file or database.
+"""
+
+import csv
+import fcntl
+import logging
+import math
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from app.history.store import HistoryEntry
+
+MAGIC = b"CALCHIS1"
+DEFAULT_CAPACITY = 4096
+DEFAULT_RECORD_SIZE = 256
+_HEADER = struct.Struct("<8sIIQQQ")  # magic, capacity, record size, head, flushed, first
+_HEADER_SIZE = 64
+_HEAD, _FLUSHED, _FIRST = 16, 24, 32  # Offsets of the 8-byte counters
+_COUNTER = struct.Struct("<Q")
+_RECORD = struct.Struct("<QddHH")  # sequence, timestamp, latency (NaN if none), command and result lengths
+_NO_RESULT = 0xFFFF  # Result length of entries without result
+_READ_RETRIES = 100
+_TRACKER_LOCK = threading.Lock()
+
+
+class SharedHistory:
+    """Fixed-size ring of history entries in a named shared memory segment.
+
+    Every process opening the same name shares the ring. Entries older than
+    the last ``capacity`` appends are overwritten; ``flush`` persists them
+    before that happens.
+    """
+
+    def __init__(self, name, capacity=DEFAULT_CAPACITY, record_size=DEFAULT_RECORD_SIZE):
+        """Open the named segment, creating it if no process did yet.
+
+        Args:
+            name (str): Name of the shared memory segment.
+            capacity (int): Number of records, when the segment is created.
+            record_size (int): Bytes per record, including its 28-byte header,
+                when the segment is created. Longer commands and results are
+                truncated.
+
+        An existing segment keeps the capacity and record size it was created with.
+
+        Raises:
+            ValueError: If the sizes are too small or the segment is not a history.
+        """
+        capacity, record_size = int(capacity), int(record_size)
+        if capacity < 1 or not _RECORD.size < record_size <= _RECORD.size + _NO_RESULT:
+            raise ValueError(f"The history needs at least one record of {_RECORD.size + 1} to {_RECORD.size + _NO_RESULT} bytes.")
+        self.name = name
+        lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_file = open(lock_path, "a+b")  # pylint: disable=consider-using-with
+        self._flush_file = open(f"{lock_path[:-5]}.flush.lock", "a+b")  # pylint: disable=consider-using-with
+        self._thread_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        with self._locked():
+            try:
+                self._segment = _open_segment(name, _HEADER_SIZE + capacity * record_size)
+                _HEADER.pack_into(self._segment.buf, 0, MAGIC, capacity, record_size, 0, 0, 0)
+            except FileExistsError:
+                self._segment = _open_segment(name)
+        self._buffer = self._segment.buf
+        magic, self.capacity, self.record_size = _HEADER.unpack_from(self._buffer, 0)[:3]
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory segment '{name}' does not hold a history.")
+        self._text_size = self.record_size - _RECORD.size
+
+    def _locked(self):
+        """Return a context manager holding the append lock across threads and processes."""
+        return _FileLock(self._lock_file, self._thread_lock)
+
+    def _counter(self, offset):
+        return _COUNTER.unpack_from(self._buffer, offset)[0]
+
+    def __len__(self):
+        head = self._counter(_HEAD)
+        return head - max(self._counter(_FIRST), head - self.capacity, 0)
+
+    def append(self, command_str, result=None, latency=None, timestamp=None):
+        """Add an entry and return its record number.
+
+        Args:
+            command_str (str): The command line.
+            result (str): The command's output, if any.
+            latency (float): Execution time in seconds, if measured.
+            timestamp (float): Unix time of the command (defaults to now).
+        """
+        command = _truncate(command_str.encode("utf-8"), self._text_size)
+        output = b"" if result is None else _truncate(str(result).encode("utf-8"), self._text_size - len(command))
+        with self._locked():
+            ticket = self._counter(_HEAD)
+            _COUNTER.pack_into(self._buffer, _HEAD, ticket + 1)
+
+        offset = _HEADER_SIZE + (ticket % self.capacity) * self.record_size
+        buffer = self._buffer
+        _COUNTER.pack_into(buffer, offset, 2 * ticket + 1)
+        start = offset + _RECORD.size
+        buffer[start:start + len(command)] = command
+        buffer[start + len(command):start + len(command) + len(output)] = output
+        _RECORD.pack_into(
+            buffer, offset, 2 * ticket + 1, time.time() if timestamp is None else timestamp,
+            float("nan") if latency is None else latency, len(command), len(output) if result is not None else _NO_RESULT,
+        )
+        _COUNTER.pack_into(buffer, offset, 2 * ticket + 2)
+        return ticket
+
+    def read(self, since=0):
+        """Return the complete entries from record number ``since`` on, without locking.
+
+        Reading stops at the first record still being written, so that a
+        later read starting at the returned position sees it once it is
+        complete. Records overwritten before they could be read are skipped.
+
+        Returns:
+            tuple: The list of HistoryEntry and the record number to continue from.
+        """
+        head = self._counter(_HEAD)
+        ticket = max(since, self._counter(_FIRST), head - self.capacity)
+        entries = []
+        while ticket < head:
+            entry = self._read_record(ticket)
+            if entry is False:
+                break
+            if entry is not None:
+                entries.append(entry)
+            ticket += 1
+        return entries, ticket
+
+    def _read_record(self, ticket):
+        """Return record ``ticket``, None if it was overwritten or False if it is still being written."""
+        offset = _HEADER_SIZE + (ticket % self.capacity) * self.record_size
+        complete = 2 * ticket + 2
+        buffer = self._buffer
+        for _ in range(_READ_RETRIES):
+            sequence, timestamp, latency, command_size, result_size = _RECORD.unpack_from(buffer, offset)
+            if sequence > complete:
+                return None
+            if sequence == complete:
+                start = offset + _RECORD.size
+                try:
+                    command = str(buffer[start:start + command_size], "utf-8")
+                    result = None
+                    if result_size != _NO_RESULT:
+                        result = str(buffer[start + command_size:start + command_size + result_size], "utf-8")
+                except UnicodeDecodeError:
+                    continue  # Torn by a writer that started meanwhile; the sequence has changed
+                if self._counter(offset) == sequence:
+                    return HistoryEntry(timestamp, command, result, None if math.isnan(latency) else latency)
+            time.sleep(0)
+        return False
+
+    def last(self, count):
+        """Return the last ``count`` entries, oldest first."""
+        return self.read(max(0, self._counter(_HEAD) - count))[0]
+
+    def entries(self):
+        """Return every entry still in the ring, oldest first."""
+        return self.read()[0]
+
+    def clear(self):
+        """Drop every entry, including the ones not flushed yet."""
+        with self._locked():
+            head = self._counter(_HEAD)
+            _COUNTER.pack_into(self._buffer, _FIRST, head)
+            _COUNTER.pack_into(self._buffer, _FLUSHED, max(head, self._counter(_FLUSHED)))
+
+    def flush(self, write, blocking=True):
+        """Pass the entries appended since the last flush to ``write``.
+
+        Only one process flushes at a time, so every entry is written once
+        whichever process flushes it.
+
+        Args:
+            write (callable): Called with the list of entries to persist.
+            blocking (bool): Wait for a flush running in another process
+                instead of returning at once.
+
+        Returns:
+            int: Number of entries written, or None when another process was flushing.
+        """
+        with _FileLock(self._flush_file, self._flush_lock, blocking) as acquired:
+            if not acquired:
+                return None
+            flushed = self._counter(_FLUSHED)
+            entries, position = self.read(flushed)
+            lost = position - max(flushed, self._counter(_FIRST)) - len(entries)
+            if lost > 0:
+                logging.warning("%d shared history entries were overwritten before they were flushed.", lost)
+            if entries:
+                write(entries)
+            with self._locked():
+                # clear() may have moved the cursor past these entries meanwhile
+                _COUNTER.pack_into(self._buffer, _FLUSHED, max(position, self._counter(_FLUSHED)))
+            return len(entries)
+
+    @property
+    def closed(self):
+        """Whether this process has detached from the segment."""
+        return self._buffer is None
+
+    def close(self):
+        """Detach from the segment, which stays available to the other processes."""
+        if self.closed:
+            return
+        self._buffer = None
+        self._segment.close()
+        self._lock_file.close()
+        self._flush_file.close()
+
+    def unlink(self):
+        """Remove the segment once every process is done with it."""
+        if sys.version_info < (3, 13):
+            # Registered again so that unlinking does not confuse the resource tracker
+            resource_tracker.register(self._segment._name, "shared_memory")  # pylint: disable=protected-access
+        self._segment.unlink()
+
+
+def append_history_csv(filename, entries):
+    """Append entries to a history CSV file with a "Command" column, creating it if needed."""
+    write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+    with open(filename, "a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if write_header:
+            writer.writerow(["Command"])
+        writer.writerows([entry.command] for entry in entries)
+
+
+def _open_segment(name, size=None):
+    """Create (with a size) or attach to a segment that outlives this process.
+
+    Tracked segments are removed by the resource tracker when the process
+    exits, and before Python 3.13 every attached segment is tracked.
+    """
+    create = size is not None
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, create=create, size=size or 0, track=False)  # pylint: disable=unexpected-keyword-arg
+    with _TRACKER_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+        try:
+            return shared_memory.SharedMemory(name, create=create, size=size or 0)
+        finally:
+            resource_tracker.register = register
+
+
+def _truncate(data, size):
+    """Cut UTF-8 bytes to at most ``size`` bytes without splitting a character."""
+    if len(data) <= size:
+        return data
+    return data[:max(0, size)].decode("utf-8", "ignore").encode("utf-8")
+
+
+class _FileLock:
+    """Exclusive lock on an open file (between processes) and a threading lock (within one)."""
+
+    def __init__(self, file, thread_lock, blocking=True):
+        self.file = file
+        self.thread_lock = thread_lock
+        self.blocking = blocking
+        self.acquired = False
+
+    def __enter__(self):
+        if not self.thread_lock.acquire(self.blocking):
+            return False
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | (0 if self.blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            self.thread_lock.release()
+            return False
+        self.acquired = True
+        return True
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.thread_lock.release()
+            self.acquired = False
@@ -0,0 +1,118 @@
+"""
+This module contains the HistoryStore class, an SQLite database keeping the
+full command history with the result, timestamp and latency of every entry.
+
+Entries are addressed by an integer primary key in insertion order, and the
+timestamp and command columns are indexed. Showing the last entries, paging
+back through them and searching by prefix therefore read only the rows
+they return, however long the history is.
+"""
+
+import sqlite3
+import time
+from collections import namedtuple
+
+HistoryEntry = namedtuple("HistoryEntry", ["timestamp", "command", "result", "latency"])
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS history ("
+    " id INTEGER PRIMARY KEY,"
+    " timestamp REAL NOT NULL,"
+    " command TEXT NOT NULL,"
+    " result TEXT,"
+    " latency REAL)",
+    "CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)",
+    "CREATE INDEX IF NOT EXISTS history_command ON history (command)",
+)
+_COLUMNS = "timestamp, command, result, latency"
+
+
+class HistoryStore:
+    """Indexed, persistent command history with buffered inserts."""
+
+    def __init__(self, path, flush_every=100):
+        """Open (or create) a history database.
+
+        Args:
+            path (str): SQLite database file, or ``":memory:"``.
+            flush_every (int): Number of entries buffered before they are inserted
+                in one transaction. Buffered entries are also written before every
+                read and when the store is closed.
+        """
+        self.path = path
+        self.flush_every = max(1, int(flush_every))
+        self._pending = []
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+
+    def append(self, command_str, result=None, latency=None, timestamp=None):
+        """Add an entry.
+
+        Args:
+            command_str (str): The command line.
+            result (str): The command's output, if any.
+            latency (float): Execution time in seconds, if measured.
+            timestamp (float): Unix time of the command (defaults to now).
+        """
+        self._pending.append((
+            time.time() if timestamp is None else timestamp,
+            command_str,
+            None if result is None else str(result),
+            latency,
+        ))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Insert the buffered entries in one transaction."""
+        if self._pending:
+            with self._connection:
+                self._connection.executemany(f"INSERT INTO history ({_COLUMNS}) VALUES (?, ?, ?, ?)", self._pending)
+            self._pending = []
+
+    def __len__(self):
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def last(self, count):
+        """Return the last ``count`` entries, oldest first."""
+        return self.page(1, count)
+
+    def page(self, number, size):
+        """Return page ``number`` of ``size`` entries, counting back from the newest, oldest first."""
+        self.flush()
+        rows = self._connection.execute(
+            f"SELECT {_COLUMNS} FROM history ORDER BY id DESC LIMIT ? OFFSET ?",
+            (size, (number - 1) * size),
+        ).fetchall()
+        return [HistoryEntry._make(row) for row in reversed(rows)]
+
+    def search(self, prefix, limit=None):
+        """Return the entries whose command starts with ``prefix``, oldest first.
+
+        Args:
+            prefix (str): Start of the command line, for example ``"divide"``.
+            limit (int): Only return the most recent ``limit`` matches.
+        """
+        self.flush()
+        # A range on the indexed column instead of LIKE, which cannot use the index
+        rows = self._connection.execute(
+            f"SELECT {_COLUMNS} FROM history WHERE command >= ? AND command < ? ORDER BY id DESC LIMIT ?",
+            (prefix, prefix + "\U0010ffff", -1 if limit is None else limit),
+        ).fetchall()
+        return [HistoryEntry._make(row) for row in reversed(rows)]
+
+    def clear(self):
+        """Delete every entry."""
+        self._pending = []
+        with self._connection:
+            self._connection.execute("DELETE FROM history")
+
+    def close(self):
+        """Write the buffered entries and close the database."""
+        self.flush()
+        self._connection.close()
@@ -0,0 +1,264 @@
+"""
+This module moves log output off the command path.
+
+Log records are put on a queue by a ``QueueHandler`` and written by a
+background thread. The writer takes records from the queue in batches,
+writes each batch to a console or file handler with a single call and
+flushes its handlers once per batch instead of once per record. Repeated
+identical warnings and errors are rate-limited before they are queued, so
+a batch run with many invalid lines does not flood the log.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler
+
+DEFAULT_BATCH_SIZE = 256
+_STOP = object()  # Queue item ending the writer thread
+# Handlers whose emit only formats and writes to the stream, so a batch can be written at once
+_BATCHED_HANDLERS = (logging.StreamHandler, logging.FileHandler)
+
+# Writer serving each logger by name, replaced when logging is configured again
+_WRITERS = {}
+
+
+class DuplicateFilter(logging.Filter):
+    """Rate-limit identical log messages.
+
+    Within ``interval`` seconds, only the first ``burst`` records with the
+    same level and message are let through. The next record let through
+    after that window reports how many were suppressed.
+    """
+
+    def __init__(self, burst=5, interval=10.0, level=logging.WARNING, max_keys=1024):
+        """Initialize the filter.
+
+        Args:
+            burst (int): Identical records let through per window.
+            interval (float): Length of a window in seconds.
+            level (int): Records below this level are never limited.
+            max_keys (int): Number of distinct messages tracked before old windows are dropped.
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.level = level
+        self.max_keys = max_keys
+        self._windows = {}  # (level, message) -> [window start, records seen, records suppressed]
+        self._lock = threading.Lock()  # Records are filtered on the thread logging them
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+        now = time.monotonic()
+        key = (record.levelno, record.getMessage())
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0]
+            else:
+                window[1] += 1
+                if window[1] <= self.burst:
+                    return True
+                window[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} identical messages suppressed)"
+            record.args = None
+        return True
+
+    def _prune(self, now):
+        """Forget the windows that have expired without suppressing anything (called with the lock held)."""
+        for key, window in list(self._windows.items()):
+            if now - window[0] >= self.interval and not window[2]:
+                del self._windows[key]
+
+    def pop_suppressed(self):
+        """Return and forget the (level, message, count) of messages still being suppressed."""
+        with self._lock:
+            pending = [(level, message, window[2]) for (level, message), window in self._windows.items() if window[2]]
+            self._windows = {}
+        return pending
+
+
+class LogWriter:
+    """Background thread writing queued log records to the real handlers."""
+
+    def __init__(self, handlers, batch_size=DEFAULT_BATCH_SIZE, duplicate_filter=None):
+        """Initialize the writer.
+
+        Args:
+            handlers (list[logging.Handler]): Handlers the records are written to.
+            batch_size (int): Maximum number of records written between two flushes.
+            duplicate_filter (DuplicateFilter): Filter applied before records are queued.
+        """
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.handler = QueueHandler(self.queue)
+        self.duplicate_filter = duplicate_filter or DuplicateFilter()
+        self.handler.addFilter(self.duplicate_filter)
+        self._thread = None
+
+    @property
+    def running(self):
+        """Whether the writer thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the writer thread."""
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                batch = [self.queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if self._write(batch):
+                    return
+        finally:
+            for handler in self.handlers:
+                _flush(handler)
+
+    def _write(self, batch):
+        """Write a batch of records and flush once; return True if the batch asks to stop."""
+        stop = False
+        done = []
+        records = []
+        for item in batch:
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                done.append(item)
+            else:
+                records.append(item)
+        for handler in self.handlers:
+            if type(handler) in _BATCHED_HANDLERS and handler.stream is not None:
+                # StreamHandler.emit flushes after every record; write the batch in one go instead
+                _write_stream(handler, records)
+            else:
+                for record in records:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            _flush(handler)
+        for event in done:
+            event.set()
+        return stop
+
+    def flush(self, timeout=5.0):
+        """Report suppressed duplicates, then wait until every queued record is written.
+
+        Returns:
+            bool: Whether the queue was drained within ``timeout`` seconds.
+        """
+        for level, message, count in self.duplicate_filter.pop_suppressed():
+            self.handler.handle(logging.makeLogRecord({
+                "levelno": level, "levelname": logging.getLevelName(level),
+                "msg": f"{message} ({count} identical messages suppressed)",
+            }))
+        if not self.running:
+            return False
+        event = threading.Event()
+        self.queue.put(event)
+        return event.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """Write the remaining records and stop the writer thread."""
+        if self.running:
+            self.queue.put(_STOP)
+            self._thread.join(timeout)
+
+
+def _write_stream(handler, records):
+    """Format the records a stream handler accepts and write them to its stream with one call."""
+    if getattr(handler.stream, "closed", False):
+        return  # Closed under the writer, as in _flush
+    lines = []
+    for record in records:
+        if record.levelno >= handler.level and handler.filter(record):
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:  # pylint: disable=broad-exception-caught
+                handler.handleError(record)
+    if not lines:
+        return
+    handler.acquire()
+    try:
+        handler.stream.write("".join(lines))
+    except ValueError:
+        pass  # The stream was closed since it was checked
+    except Exception:  # pylint: disable=broad-exception-caught
+        handler.handleError(records[-1])
+    finally:
+        handler.release()
+
+
+def _flush(handler):
+    """Flush a handler with its class method, ignoring streams closed under it."""
+    try:
+        type(handler).flush(handler)
+    except (OSError, ValueError):
+        pass  # The writer thread must keep serving the other handlers
+
+
+def stop_queue_logging(logger=None):
+    """Write the queued records of a logger and stop its writer thread.
+
+    Called before logging is configured again, since a new configuration
+    closes the handlers the writer is still writing to.
+    """
+    writer = _WRITERS.get((logger or logging.getLogger()).name)
+    if writer is not None:
+        writer.flush()
+        writer.stop()
+
+
+def install_queue_logging(handlers, logger=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Move handlers behind a queue served by a background writer thread.
+
+    Args:
+        handlers (list[logging.Handler]): Handlers to move, normally the ones
+            just attached by the logging configuration. When empty, the
+            current writer is kept.
+        logger (logging.Logger): Logger the handlers are attached to (root by default).
+        batch_size (int): Maximum number of records written between two flushes.
+
+    Returns:
+        LogWriter: The writer serving the logger, or None if there is none.
+    """
+    logger = logger or logging.getLogger()
+    writer = _WRITERS.get(logger.name)
+    if not handlers:
+        if writer is not None and writer.handler in logger.handlers:
+            writer.start()
+            return writer
+        return None
+
+    if writer is not None:
+        logger.removeHandler(writer.handler)
+        writer.stop()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    writer = _WRITERS[logger.name] = LogWriter(handlers, batch_size)
+    logger.addHandler(writer.handler)
+    writer.start()
+    return writer
+
+
+@atexit.register
+def _stop_writers():
+    """Write the queued records before the interpreter exits."""
+    for writer in _WRITERS.values():
+        writer.stop()
@@ -0,0 +1,308 @@
+"""
+This module contains the instrumentation of command execution: per-command
+call and error counters with HDR-style latency histograms, their JSON and
+Prometheus text exports, and a profiler that can be switched on and off
+while the application runs.
+"""
+
+import json
+import os
+import time
+
+SUB_BUCKET_BITS = 3  # 8 linear sub-buckets per power of two: at most 12.5% relative error
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKETS = 64 * SUB_BUCKETS
+PROFILE_MODES = ("cprofile", "sample")
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies in nanoseconds, in the style of HdrHistogram.
+
+    Values below ``2 * SUB_BUCKETS`` get a bucket each. Above that, every
+    power of two is split into ``SUB_BUCKETS`` equal buckets, so recording
+    is a couple of integer operations and the relative error of reported
+    percentiles is bounded whatever the value range.
+    """
+
+    __slots__ = ("counts", "count", "total", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    @staticmethod
+    def bucket_index(value):
+        """Return the bucket of a non-negative integer value."""
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return min((shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS, BUCKETS - 1)
+
+    @staticmethod
+    def bucket_upper_bound(index):
+        """Return the largest value that falls in a bucket."""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        """Add one latency in nanoseconds."""
+        # bucket_index, inlined: this runs on every command execution
+        if value < 2 * SUB_BUCKETS:
+            index = value
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def record_many(self, value, count):
+        """Add ``count`` latencies of ``value`` nanoseconds each."""
+        self.counts[self.bucket_index(value)] += count
+        self.count += count
+        self.total += value * count
+        if value > self.maximum:
+            self.maximum = value
+
+    def percentile(self, percent):
+        """Return the latency below which ``percent`` percent of the values fall."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.maximum)
+        return self.maximum
+
+    def buckets(self):
+        """Yield (upper bound, cumulative count) pairs for the non-empty buckets."""
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                seen += count
+                yield self.bucket_upper_bound(index), seen
+
+
+class CommandStats:
+    """Error counter and latency histogram of one command."""
+
+    __slots__ = ("errors", "latency")
+
+    def __init__(self):
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    @property
+    def calls(self):
+        """Number of recorded calls."""
+        return self.latency.count
+
+
+class Metrics:
+    """Registry of per-command statistics.
+
+    Recording takes no lock, to keep it cheap on the hot path: commands are
+    executed on a single thread by the REPL and the batch runner. The
+    asyncio server runs them on worker threads, where concurrent recorders
+    could at worst lose an increment. Commands run by worker processes or
+    computed in bulk are recorded by the batch runner's thread once their
+    chunk is done.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.started = time.time()
+
+    def record(self, name, elapsed, error=False):
+        """Record one call of a command.
+
+        Args:
+            name (str): The command name.
+            elapsed (int): Execution time in nanoseconds.
+            error (bool): Whether the call raised or returned an error message.
+        """
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        if error:
+            stats.errors += 1
+        stats.latency.record(elapsed)
+
+    def record_many(self, name, count, elapsed, errors=0):
+        """Record calls of a command computed together, such as a group of the bulk engine.
+
+        Args:
+            name (str): The command name.
+            count (int): Number of calls.
+            elapsed (int): Execution time of all the calls in nanoseconds,
+                recorded as ``count`` calls of the average time.
+            errors (int): Number of calls that returned an error message.
+        """
+        if count <= 0:
+            return
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        stats.errors += errors
+        stats.latency.record_many(elapsed // count, count)
+
+    def reset(self):
+        """Drop every recorded call."""
+        self.commands = {}
+        self.started = time.time()
+
+    def snapshot(self):
+        """Return the statistics of every command as plain dictionaries, latencies in ms."""
+        result = {}
+        for name, stats in sorted(self.commands.items()):
+            latency = stats.latency
+            result[name] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "mean_ms": latency.total / latency.count / 1e6 if latency.count else 0.0,
+                "p50_ms": latency.percentile(50) / 1e6,
+                "p90_ms": latency.percentile(90) / 1e6,
+                "p99_ms": latency.percentile(99) / 1e6,
+                "max_ms": latency.maximum / 1e6,
+            }
+        return result
+
+    def to_json(self):
+        """Return the statistics as a JSON document."""
+        return json.dumps({"started": self.started, "commands": self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        """Return the statistics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP calculator_command_calls_total Number of command executions.",
+            "# TYPE calculator_command_calls_total counter",
+        ]
+        commands = sorted(self.commands.items())
+        lines += [f'calculator_command_calls_total{{command="{name}"}} {stats.calls}' for name, stats in commands]
+        lines += [
+            "# HELP calculator_command_errors_total Number of command executions that failed.",
+            "# TYPE calculator_command_errors_total counter",
+        ]
+        lines += [f'calculator_command_errors_total{{command="{name}"}} {stats.errors}' for name, stats in commands]
+        lines += [
+            "# HELP calculator_command_latency_seconds Command execution time.",
+            "# TYPE calculator_command_latency_seconds histogram",
+        ]
+        for name, stats in commands:
+            latency = stats.latency
+            for bound, count in latency.buckets():
+                lines.append(
+                    f'calculator_command_latency_seconds_bucket{{command="{name}",le="{(bound + 1) / 1e9:.9g}"}} {count}'
+                )
+            lines.append(f'calculator_command_latency_seconds_bucket{{command="{name}",le="+Inf"}} {latency.count}')
+            lines.append(f'calculator_command_latency_seconds_sum{{command="{name}"}} {latency.total / 1e9:.9g}')
+            lines.append(f'calculator_command_latency_seconds_count{{command="{name}"}} {latency.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the statistics to a file, as JSON if it ends with .json and Prometheus text otherwise.
+
+        The file is replaced atomically, so a scraper never reads a partial dump.
+        """
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary, path)
+
+
+class Profiler:
+    """Profiler that can be started and stopped while the application runs.
+
+    Two modes are available:
+
+    * ``cprofile``: deterministic profiling of every function call with
+      cProfile. Precise, but slows the profiled code down noticeably.
+    * ``sample``: statistical profiling. A CPU timer interrupts the main
+      thread every ``interval`` seconds and the current stack is counted,
+      so the overhead stays low enough for a production process.
+    """
+
+    def __init__(self):
+        self.mode = None
+        self._profile = None
+        self._samples = None
+        self._ticks = 0
+        self._previous_handler = None
+
+    @property
+    def running(self):
+        """Whether profiling is currently enabled."""
+        return self.mode is not None
+
+    def start(self, mode="cprofile", interval=0.005):
+        """Start profiling.
+
+        Raises:
+            ValueError: If the mode is unknown or profiling already runs.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}. Available modes: {', '.join(PROFILE_MODES)}.")
+        if self.running:
+            raise ValueError(f"Profiling is already running in {self.mode} mode.")
+        if mode == "cprofile":
+            import cProfile  # pylint: disable=import-outside-toplevel
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            import signal  # pylint: disable=import-outside-toplevel
+            from collections import Counter  # pylint: disable=import-outside-toplevel
+            self._samples = Counter()
+            self._ticks = 0
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        self.mode = mode
+
+    def _sample(self, _signum, frame):
+        """Count every function of the interrupted stack once."""
+        self._ticks += 1
+        seen = set()
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            if key not in seen:
+                seen.add(key)
+                self._samples[key] += 1
+            frame = frame.f_back
+
+    def stop(self, limit=20):
+        """Stop profiling and return a report of the ``limit`` hottest functions.
+
+        Raises:
+            ValueError: If profiling is not running.
+        """
+        if not self.running:
+            raise ValueError("Profiling is not running.")
+        mode, self.mode = self.mode, None
+        if mode == "cprofile":
+            self._profile.disable()
+            import io  # pylint: disable=import-outside-toplevel
+            import pstats  # pylint: disable=import-outside-toplevel
+            output = io.StringIO()
+            pstats.Stats(self._profile, stream=output).sort_stats("cumulative").print_stats(limit)
+            self._profile = None
+            return output.getvalue().strip()
+
+        import signal  # pylint: disable=import-outside-toplevel
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        samples, self._samples = self._samples, None
+        total = self._ticks or 1
+        lines = [f"{self._ticks} samples", f"{'samples':>8} {'share':>6}  function"]
+        for (filename, lineno, name), count in samples.most_common(limit):
+            lines.append(f"{count:>8} {count / total:>6.1%}  {name} ({filename}:{lineno})")
+        return "\n".join(lines)
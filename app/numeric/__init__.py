@@ -0,0 +1,270 @@
+"""
+This module contains the numeric backends: the number type the arithmetic
+commands parse their operands into and compute with.
+
+* ``float``: hardware float64. The fastest, with the usual binary rounding.
+* ``decimal``: ``Decimal`` arithmetic, optionally with its own precision
+  and rounding mode instead of the default 28-digit context.
+* ``fraction``: exact rational arithmetic with ``fractions.Fraction``.
+
+The backend is selected with the NUMERIC_BACKEND setting. Commands created
+without a backend keep their historical behaviour (``Decimal`` for the
+binary operations, float for ``mean``).
+
+Backends also reduce whole operand lists for the n-ary ``add`` and
+``multiply``: floats are summed with ``math.fsum``, Decimals are reduced
+with a few guard digits per power of ten of operands and rounded once (a sum
+losing digits to rounding is redone with REDUCTION_DIGITS digits, so it is
+the correctly rounded sum, as with two operands, unless the exact sum needs
+more digits than that), and the other reductions are pairwise, which keeps
+operands of similar size and is faster for big numbers.
+"""
+
+import decimal
+import math
+import operator
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+
+ROUNDING_MODES = (
+    decimal.ROUND_CEILING, decimal.ROUND_DOWN, decimal.ROUND_FLOOR, decimal.ROUND_HALF_DOWN,
+    decimal.ROUND_HALF_EVEN, decimal.ROUND_HALF_UP, decimal.ROUND_UP, decimal.ROUND_05UP,
+)
+
+# Digits Decimal sums losing digits are redone with before they are rounded once. Exact
+# sums could need as many digits as the exponents span (1e5000000000 + 1e-5000000000)
+REDUCTION_DIGITS = 10000
+GUARD_DIGITS = 3  # Extra digits of Decimal reductions, on top of one per power of ten of operands
+
+
+def tree_reduce(operation, values):
+    """Reduce a non-empty list pairwise: ((a op b) op (c op d)) op ...
+
+    Every round combines neighbouring values, so partial results stay of
+    similar size and rounding errors grow with log(n) instead of n.
+    """
+    while len(values) > 1:
+        odd = values[-1] if len(values) % 2 else None
+        values = list(map(operation, values[0::2], values[1::2]))
+        if odd is not None:
+            values.append(odd)
+    return values[0]
+
+
+def _reduction_context(precision):
+    """Return a context with the given precision and the widest exponent range."""
+    return decimal.Context(prec=precision, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+
+class NumericBackend:
+    """Base class of the numeric backends.
+
+    Attributes:
+        name (str): Setting value selecting the backend.
+        number (type): Type of the parsed numbers.
+        errors (tuple): Exceptions ``parse`` raises for text that is not a number.
+    """
+
+    name = None
+    number = None
+    errors = ()
+
+    def parse(self, text):
+        """Convert an operand string into a number."""
+        raise NotImplementedError
+
+    def convert(self, value):
+        """Convert a number of any backend (such as a previous pipeline result) into this backend's type."""
+        if isinstance(value, self.number):
+            return value
+        return self.parse(value)
+
+    def apply(self, operation):
+        """Return the function computing a binary operation (such as ``operator.add``) on parsed numbers."""
+        return operation
+
+    def mean(self, values):
+        """Return the arithmetic mean of a non-empty list of parsed numbers."""
+        raise NotImplementedError
+
+    def reduce(self, operation, values):
+        """Reduce a non-empty list of parsed numbers (or partial results) with ``operator.add`` or ``operator.mul``.
+
+        The result may be more precise than the backend's numbers; pass the
+        final result to ``round``.
+        """
+        return tree_reduce(operation, values)
+
+    def round(self, value):
+        """Round a reduced value to the backend's precision."""
+        return value
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class FloatBackend(NumericBackend):
+    """float64 arithmetic."""
+
+    name = "float"
+    number = float
+    errors = (ValueError,)
+    parse = staticmethod(float)
+
+    def mean(self, values):
+        """Return the mean of a correctly rounded sum."""
+        return math.fsum(values) / len(values)
+
+    def reduce(self, operation, values):
+        """Return the correctly rounded sum, or the product."""
+        if operation is operator.add:
+            return math.fsum(values)
+        if operation is operator.mul:
+            return math.prod(values)
+        return tree_reduce(operation, values)
+
+
+class DecimalBackend(NumericBackend):
+    """``Decimal`` arithmetic with an optional context of its own.
+
+    Operands are parsed exactly; the precision and rounding mode apply to
+    the result of each operation.
+    """
+
+    name = "decimal"
+    number = Decimal
+    errors = (InvalidOperation,)
+    parse = staticmethod(Decimal)
+
+    def __init__(self, precision=None, rounding=None):
+        """Initialize the backend.
+
+        Args:
+            precision (int): Number of significant digits of results.
+            rounding (str): One of the ``decimal.ROUND_*`` modes.
+
+        Without either, operations use the current thread's context (28 digits,
+        ROUND_HALF_EVEN unless changed).
+
+        Raises:
+            ValueError: If the precision is not positive or the rounding mode is unknown.
+        """
+        self.context = None
+        if precision is None and rounding is None:
+            return
+        if precision is not None and precision < 1:
+            raise ValueError("The decimal precision must be a positive number of digits.")
+        if rounding is not None and rounding not in ROUNDING_MODES:
+            raise ValueError(f"Unknown rounding mode: {rounding}. Available modes: {', '.join(ROUNDING_MODES)}.")
+        self.context = decimal.Context(prec=precision, rounding=rounding)
+        self._operations = {
+            operator.add: self.context.add,
+            operator.sub: self.context.subtract,
+            operator.mul: self.context.multiply,
+            operator.truediv: self.context.divide,
+        }
+
+    def convert(self, value):
+        """Convert a number into a ``Decimal``; floats keep their shortest decimal form."""
+        if isinstance(value, Decimal):
+            return value
+        if isinstance(value, Fraction):
+            return self.apply(operator.truediv)(Decimal(value.numerator), Decimal(value.denominator))
+        return Decimal(repr(value) if isinstance(value, float) else value)
+
+    def apply(self, operation):
+        """Return the operation computed in the backend's context."""
+        if self.context is None:
+            return operation
+        return self._operations.get(operation, operation)
+
+    def mean(self, values):
+        """Return the mean, rounded in the backend's context."""
+        if self.context is None:
+            return sum(values, Decimal(0)) / len(values)
+        total = Decimal(0)
+        for value in values:
+            total = self.context.add(total, value)
+        return self.context.divide(total, len(values))
+
+    def reduce(self, operation, values):
+        """Return the sum or product with guard digits for the operand count; ``round`` applies the precision.
+
+        Products keep their relative error below the precision; sums losing
+        digits (to cancellation) are redone with REDUCTION_DIGITS digits.
+        """
+        precision = (self.context or decimal.getcontext()).prec + len(str(len(values))) + GUARD_DIGITS
+        with decimal.localcontext(_reduction_context(precision)) as context:
+            if operation is not operator.add:
+                return tree_reduce(operation, values)
+            total = sum(values, Decimal(0))
+        if not context.flags[decimal.Inexact]:
+            return total
+        with decimal.localcontext(_reduction_context(max(REDUCTION_DIGITS, precision))):
+            return sum(values, Decimal(0))
+
+    def round(self, value):
+        """Round a value once in the backend's context (the current context if it has none)."""
+        return (self.context or decimal.getcontext()).create_decimal(value)
+
+    def __repr__(self):
+        if self.context is None:
+            return "DecimalBackend()"
+        return f"DecimalBackend(precision={self.context.prec}, rounding={self.context.rounding})"
+
+
+class FractionBackend(NumericBackend):
+    """Exact rational arithmetic. Results never lose precision but may grow large."""
+
+    name = "fraction"
+    number = Fraction
+    # Fraction("1/0") raises ZeroDivisionError
+    errors = (ValueError, ZeroDivisionError)
+    parse = staticmethod(Fraction)
+
+    def convert(self, value):
+        """Convert a number into a ``Fraction``; floats keep their shortest decimal form."""
+        if isinstance(value, float):
+            return Fraction(repr(value))
+        return Fraction(value)
+
+    def mean(self, values):
+        """Return the exact mean."""
+        return sum(values, Fraction(0)) / len(values)
+
+
+BACKENDS = {backend.name: backend for backend in (FloatBackend, DecimalBackend, FractionBackend)}
+
+# Backend of commands created without one: the historical Decimal arithmetic
+DEFAULT_BACKEND = DecimalBackend()
+
+
+def create_backend(name, precision=None, rounding=None):
+    """Create a backend from its setting values.
+
+    Args:
+        name (str): ``"float"``, ``"decimal"`` or ``"fraction"``.
+        precision (int | str): Digits of Decimal results (decimal backend only).
+        rounding (str): Decimal rounding mode, such as ``ROUND_HALF_UP`` or
+            ``half_up`` (decimal backend only).
+
+    Raises:
+        ValueError: If the name, precision or rounding mode is invalid.
+    """
+    backend = BACKENDS.get(name.strip().lower())
+    if backend is None:
+        raise ValueError(f"Unknown numeric backend: {name}. Available backends: {', '.join(BACKENDS)}.")
+    if backend is not DecimalBackend:
+        return backend()
+    if precision not in (None, ""):
+        try:
+            precision = int(precision)
+        except ValueError:
+            raise ValueError(f"Invalid decimal precision: {precision}") from None
+    else:
+        precision = None
+    if rounding:
+        rounding = rounding.strip().upper()
+        if not rounding.startswith("ROUND_"):
+            rounding = f"ROUND_{rounding}"
+    return DecimalBackend(precision, rounding or None)
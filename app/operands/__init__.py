@@ -0,0 +1,124 @@
+"""
+This module reads command operands from files or stdin in chunks.
+
+An argument of the form ``@path`` names a file of numbers separated by
+whitespace or commas; ``@-`` reads them from stdin until end of file.
+The values are yielded as float64 NumPy arrays (or as the number tokens
+themselves, for commands parsing them with a numeric backend), one chunk at
+a time, so arbitrarily large inputs are processed in constant memory.
+"""
+
+import sys
+
+SOURCE_PREFIX = "@"
+BLOCK_SIZE = 1 << 20  # Characters read per block
+
+
+class OperandSourceError(ValueError):
+    """Raised when an operand source is missing or holds an invalid number."""
+
+
+def is_source(arg):
+    """Return True when an argument names an operand source (``@file``)."""
+    return isinstance(arg, str) and arg.startswith(SOURCE_PREFIX) and len(arg) > 1
+
+
+def has_sources(args):
+    """Return True when any argument names an operand source.
+
+    Long lists of literal numbers are checked in one pass over their joined
+    text; only lists containing ``@`` are checked argument by argument.
+    """
+    return SOURCE_PREFIX in "".join(map(str, args)) and any(map(is_source, args))
+
+
+def read_operand_chunks(arg, block_size=BLOCK_SIZE):
+    """Yield float64 arrays with the numbers of an ``@file`` (or ``@-``) source.
+
+    Args:
+        arg (str): The ``@``-prefixed source argument.
+        block_size (int): Number of characters read at a time.
+
+    Raises:
+        OperandSourceError: If the file does not exist or holds an invalid number.
+    """
+    for tokens, name in read_operand_tokens(arg, block_size):
+        yield _to_array(tokens, name)
+
+
+def read_operand_tokens(arg, block_size=BLOCK_SIZE):
+    """Yield (tokens, name) pairs with the number tokens of an ``@file`` source, unparsed.
+
+    Raises:
+        OperandSourceError: If the file does not exist.
+    """
+    path = arg[len(SOURCE_PREFIX):]
+    if path == "-":
+        yield from _split_blocks(sys.stdin, path, block_size)
+        return
+    try:
+        file = open(path, encoding="utf-8")  # pylint: disable=consider-using-with
+    except FileNotFoundError as e:
+        raise OperandSourceError(f"Operand file '{path}' not found.") from e
+    with file:
+        yield from _split_blocks(file, path, block_size)
+
+
+def iter_operand_chunks(args, block_size=BLOCK_SIZE):
+    """Yield float64 arrays for a mix of literal numbers and ``@file`` sources."""
+    for tokens, name in iter_operand_tokens(args, block_size):
+        yield _to_array(tokens, name)
+
+
+def iter_operand_tokens(args, block_size=BLOCK_SIZE):
+    """Yield (tokens, name) pairs for a mix of literal numbers and ``@file`` sources.
+
+    Consecutive literal arguments form one chunk named ``"arguments"``; the
+    chunks of a source are named after its path, for error messages.
+    """
+    if not has_sources(args):
+        if args:
+            yield list(args), "arguments"
+        return
+    literals = []
+    for arg in args:
+        if is_source(arg):
+            if literals:
+                yield literals, "arguments"
+                literals = []
+            yield from read_operand_tokens(arg, block_size)
+        else:
+            literals.append(arg)
+    if literals:
+        yield literals, "arguments"
+
+
+def _split_blocks(file, name, block_size):
+    """Split a text stream into number tokens, carrying tokens cut at a block boundary."""
+    carry = ""
+    while True:
+        block = file.read(block_size)
+        if not block:
+            break
+        block = carry + block.replace(",", " ")
+        tokens = block.split()
+        # The last token may continue in the next block unless whitespace follows it
+        carry = tokens.pop() if tokens and not block[-1].isspace() else ""
+        if tokens:
+            yield tokens, name
+    if carry:
+        yield [carry], name
+
+
+def _to_array(tokens, name):
+    """Convert number tokens to a float64 array, naming the first invalid token."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    try:
+        return np.array(tokens, dtype=np.float64)
+    except ValueError:
+        for token in tokens:
+            try:
+                float(token)
+            except ValueError:
+                raise OperandSourceError(f"Invalid number '{token}' in {name}.") from None
+        raise
@@ -0,0 +1,86 @@
+"""
+This module runs pipelined command lines such as ``add 2 3 | multiply _ 4``.
+
+The stages of a line are separated by ``|``. In every stage after the
+first, the argument ``_`` stands for the value of the previous stage (in
+``eval``, ``_`` is a variable of the expression). Values are passed on as
+numbers, converted to the next command's numeric backend when needed, and
+only the message of the last stage is formatted.
+"""
+
+import logging
+from app.command import CommandResult, ErrorMessage
+
+PIPE = "|"
+PREVIOUS = "_"
+
+
+class PipelineError(ValueError):
+    """Raised when a pipelined line cannot be split into stages."""
+
+
+def is_pipeline(line):
+    """Return True when a command line has several stages."""
+    return PIPE in line
+
+
+def split_stages(line):
+    """Split a pipelined line into the tokens of each stage.
+
+    Raises:
+        PipelineError: If a stage is empty.
+    """
+    stages = [stage.split() for stage in line.split(PIPE)]
+    if not all(stages):
+        raise PipelineError("Every stage of a pipeline needs a command.")
+    return stages
+
+
+def run_pipeline(command_handler, line):
+    """Execute the stages of a pipelined line and return the final message.
+
+    The pipeline stops at the first stage that does not produce a value,
+    returning that stage's message (usually the reason it failed).
+
+    Args:
+        command_handler (CommandHandler): Handler executing the stages.
+        line (str): The command line.
+
+    Raises:
+        PipelineError: If a stage is empty.
+    """
+    return evaluate_pipeline(command_handler, line).message
+
+
+def evaluate_pipeline(command_handler, line):
+    """Execute the stages of a pipelined line and return the CommandResult of the last one.
+
+    Raises:
+        PipelineError: If a stage is empty.
+    """
+    stages = split_stages(line)
+    result = None
+    for name, *args in stages:
+        command = command_handler.commands.get(name)
+        if command is None:
+            logging.error("Unknown command: %s", name)
+            return CommandResult(message=ErrorMessage(f"No such command: {name}"))
+
+        values = {}
+        if result is not None:
+            if result.value is None:
+                return result if producer_evaluates else CommandResult(
+                    message=ErrorMessage(f"Error: {producer} has no numeric result to pass to {name}.")
+                )
+            value = result.value
+            backend = getattr(command, "backend", None)
+            if backend is not None:
+                value = backend.convert(value)
+            if getattr(command, "compile", None) is not None:
+                values[PREVIOUS] = value  # Bound as the variable _ of the expression
+            else:
+                args = [value if arg == PREVIOUS else arg for arg in args]
+
+        result = command_handler.evaluate_command(name, *args, **values)
+        producer, producer_evaluates = name, hasattr(command, "evaluate")
+    return result
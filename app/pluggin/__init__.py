@@ -0,0 +1,215 @@
+"""
+This package holds the command plugins. Every subpackage is a plugin named
+after the command it provides and is discovered without being imported.
+
+A plugin module defines one Command subclass, which is instantiated without
+arguments. Plugins that need application state (such as the history store)
+define a module-level ``create_command(app)`` function instead.
+
+Commands declare their capabilities with class attributes: ``pure``
+results may be cached, ``vectorizable`` commands may be computed in bulk
+over many lines or columns, and ``stateful`` commands always run in the
+main process.
+
+The PluginRegistry registers the plugins of a command handler and, when
+polling, reloads the plugins whose files changed.
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+from functools import partial
+
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_command(name, app=None, package=__name__):
+    """Import a plugin module and create its command.
+
+    Args:
+        name (str): Name of the plugin subpackage, which is also the command name.
+        app (App): Application passed to the plugin's ``create_command`` hook.
+        package (str): Package holding the plugin.
+
+    Raises:
+        LookupError: If the module does not define exactly one Command subclass.
+    """
+    # Imported here to avoid a circular import with the base Command class
+    from app.command import Command  # pylint: disable=import-outside-toplevel
+
+    module = importlib.import_module(f"{package}.{name}")
+    create_command = getattr(module, "create_command", None)
+    if create_command is not None:
+        return create_command(app)
+
+    classes = [
+        obj for obj in vars(module).values()
+        if isinstance(obj, type) and issubclass(obj, Command) and obj.__module__ == module.__name__
+    ]
+    if len(classes) != 1:
+        raise LookupError(f"Plugin '{name}' must define exactly one command class.")
+    return classes[0]()
+
+
+class PluginRegistry:
+    """Registers the plugins of a command handler and reloads the ones that change.
+
+    The plugin directory is polled for the modification times and sizes of
+    the plugins' files, so no file system notification library is needed.
+    A changed plugin is reloaded, and its new command created, in the
+    polling thread; the command is then swapped into the handler's registry
+    with a single assignment. Commands keep being dispatched meanwhile and
+    calls already running finish with the previous command. A plugin that
+    fails to reload keeps its previous command until its files change again.
+
+    Plugins that import another plugin's classes (such as ``sum``) keep
+    the classes they imported until they are reloaded themselves.
+    """
+
+    def __init__(self, command_handler, app=None, directory=PLUGIN_DIR, package=__name__, interval=1.0):
+        """Initialize the registry.
+
+        Args:
+            command_handler (CommandHandler): Handler the plugins are registered with.
+            app (App): Application passed to the plugins' ``create_command`` hooks.
+            directory (str): Directory of the plugin package.
+            package (str): Import name of the plugin package.
+            interval (float): Seconds between two polls of the background thread.
+        """
+        self.command_handler = command_handler
+        self.app = app
+        self.directory = directory
+        self.package = package
+        self.interval = interval
+        self.signatures = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def register_all(self):
+        """Register every plugin, each one imported on first use."""
+        with self._lock:
+            self.signatures = self.scan()
+            for name in sorted(self.signatures):
+                self._register(name)
+
+    def scan(self):
+        """Return the signature of every plugin: the path, mtime and size of its source files."""
+        signatures = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.name.isidentifier() and os.path.exists(os.path.join(entry.path, "__init__.py")):
+                signatures[entry.name] = _signature(entry.path)
+        return signatures
+
+    def poll(self):
+        """Register new plugins, reload the changed ones and remove the deleted ones.
+
+        Returns:
+            list[tuple[str, str]]: Every changed plugin with what happened to it:
+            ``"added"``, ``"reloaded"``, ``"failed"`` or ``"removed"``.
+        """
+        with self._lock:
+            signatures = self.scan()
+            changes = []
+            for name in sorted(self.signatures.keys() - signatures.keys()):
+                self.command_handler.commands.unregister(name)
+                for module in self._module_names(name):
+                    del sys.modules[module]
+                self._invalidate(name)
+                changes.append((name, "removed"))
+            for name, signature in sorted(signatures.items()):
+                previous = self.signatures.get(name)
+                if previous is None:
+                    importlib.invalidate_caches()
+                    self._register(name)
+                    changes.append((name, "added"))
+                elif previous != signature:
+                    changes.append((name, self._reload(name)))
+            self.signatures = signatures
+        for name, change in changes:
+            logging.info("Plugin %s %s.", name, change)
+        return changes
+
+    def start(self):
+        """Poll for changes every ``interval`` seconds in a daemon thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="plugin-reload", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Poll until stopped."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except OSError as e:
+                logging.error("Polling the plugins failed: %s", e)
+
+    def _register(self, name):
+        """Register a plugin's command, created on first use."""
+        self.command_handler.register_factory(name, partial(load_command, name, self.app, self.package))
+
+    def _reload(self, name):
+        """Reload a plugin's modules and swap in its new command if it was already created."""
+        loaded = name in self.command_handler.commands.keys()
+        try:
+            importlib.invalidate_caches()
+            _discard_bytecode(os.path.join(self.directory, name))
+            # Submodules first, so that reloading the package imports their new versions
+            for module in sorted(self._module_names(name), key=lambda module: module.count("."), reverse=True):
+                importlib.reload(sys.modules[module])
+            command = load_command(name, self.app, self.package) if loaded else None
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.exception("Reloading plugin %s failed, the previous version is kept.", name)
+            return "failed"
+        if loaded:
+            self.command_handler.register_command(name, command)
+        self._invalidate(name)
+        return "reloaded"
+
+    def _module_names(self, name):
+        """Return the imported modules of a plugin."""
+        prefix = f"{self.package}.{name}"
+        return [module for module in list(sys.modules) if module == prefix or module.startswith(prefix + ".")]
+
+    def _invalidate(self, name):
+        """Drop the cached results of a plugin's previous version."""
+        if self.command_handler.cache is not None:
+            self.command_handler.cache.invalidate(name)
+
+
+def _signature(directory):
+    """Return the sorted (path, mtime, size) of the Python files under a directory."""
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [name for name in dirs if name != "__pycache__"]
+        for name in names:
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(files))
+
+
+def _discard_bytecode(directory):
+    """Delete the cached bytecode of a plugin's files.
+
+    Bytecode is validated with the source's modification time in whole
+    seconds, so a file changed twice within a second would otherwise be
+    reloaded from stale bytecode.
+    """
+    for path, _, _ in _signature(directory):
+        try:
+            os.remove(importlib.util.cache_from_source(path))
+        except OSError:
+            pass
@@ -0,0 +1,39 @@
+"""
+This module contains the implementation of the CacheCommand class,
+which reports and manages the result cache of pure commands.
+"""
+
+from app.command import Command, ErrorMessage
+
+def create_command(app):
+    """Create the cache command bound to the application's result cache."""
+    return CacheCommand(app.command_handler.cache)
+
+class CacheCommand(Command):
+    """Command class to display the result cache counters or clear the cache."""
+
+    stateful = True
+
+    def __init__(self, cache=None):
+        """Initialize with the ResultCache used by the command handler, if any."""
+        self.cache = cache
+
+    def execute(self, *args):
+        """Execute the command based on user input (stats, clear)."""
+        if self.cache is None:
+            return "Result cache is disabled. Set RESULT_CACHE_SIZE to enable it."
+
+        command = args[0].lower() if args else "stats"
+        if command == "stats":
+            stats = self.cache.stats()
+            ttl = "none" if stats["ttl"] is None else f"{stats['ttl']}s"
+            return (
+                f"Cache size: {stats['size']}/{stats['maxsize']} (ttl {ttl}), "
+                f"hits: {stats['hits']}, misses: {stats['misses']}, "
+                f"evictions: {stats['evictions']}, hit rate: {stats['hit_rate']:.1%}."
+            )
+        if command == "clear":
+            self.cache.clear()
+            return "Cache cleared."
+
+        return ErrorMessage("Invalid cache command. Available commands: stats, clear.")
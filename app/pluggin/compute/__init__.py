@@ -0,0 +1,56 @@
+"""
+This module contains the implementation of the ComputeCommand class,
+which applies an arithmetic command to the columns of a CSV file.
+"""
+
+import logging
+from app.command import Command, ErrorMessage
+from app.columnar import ColumnError, column_function, compute_csv
+from app.expression import ExpressionError
+
+def create_command(app):
+    """Create the compute command resolving operations through the application's commands."""
+    return ComputeCommand(app.command_handler.commands)
+
+class ComputeCommand(Command):
+    """Command class to compute an operation over whole CSV columns.
+
+    Usage: ``compute <input> <output> <operation> <column> [<column> ...]``,
+    for example ``compute data.csv out.csv divide price quantity``. The
+    operation is any arithmetic plugin (add, subtract, multiply, divide,
+    mean) or ``eval`` followed by an expression over column names.
+    """
+
+    # Runs in the main process: it writes files and resolves operations by name
+    stateful = True
+    message = "Computed {0} of {1} for {2} into {3}."
+    empty_message = " {0} rows have no result (division by zero or invalid number)."
+    usage_error = ErrorMessage("Usage: compute <input> <output> <operation> <column> [<column> ...]")
+
+    def __init__(self, commands=None):
+        """Initialize with the registry the operations are looked up in."""
+        self.commands = commands if commands is not None else {}
+
+    def accesses_files(self, *args):
+        """Compute always reads and writes the files it is given."""
+        return True
+
+    def execute(self, *args):
+        if len(args) < 4:
+            return self.usage_error
+
+        source, target, operation, columns = args[0], args[1], args[2], list(args[3:])
+        command = self.commands.get(operation)
+        if command is None:
+            return ErrorMessage(f"No such command: {operation}")
+        try:
+            function, names = column_function(command, columns)
+            report = compute_csv(source, target, function, names)
+        except (ColumnError, ExpressionError) as e:
+            return ErrorMessage(f"Error: {e}")
+
+        logging.info("Computed %s over %s: %s", operation, source, report)
+        result = self.message.format(operation, ", ".join(columns), report, target)
+        if report.empty:
+            result += self.empty_message.format(report.empty)
+        return result
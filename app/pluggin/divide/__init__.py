@@ -4,20 +4,52 @@ This module contains the implementation of the DivideCommand class,
 which performs division of two numbers.
 """
 
-from decimal import Decimal, InvalidOperation
-from app.command import Command
+import operator
+from app.command import Command, CommandResult, ErrorMessage
+from app.numeric import DEFAULT_BACKEND
+
+def create_command(app):
+    """Create the command with the application's numeric backend."""
+    return DivideCommand(app.numeric_backend)
 
 class DivideCommand(Command):
     """Command class to divide two numbers."""
 
+    pure = True
+    vectorizable = True
+    operation = staticmethod(operator.truediv)
+    message = "The result of dividing {0} by {1} is equal to {2}."
+    arity_error = ErrorMessage("Please provide exactly two numbers to divide.")
+    invalid_error = "Invalid number input: '{0}' or '{1}' is not a valid number."
+    zero_division_error = ErrorMessage("Error: Division by zero is not allowed.")
+
+    def __init__(self, backend=None):
+        """Initialize with the numeric backend operands are parsed and computed with."""
+        self.backend = backend or DEFAULT_BACKEND
+        self.compute = self.backend.apply(self.operation)
+
     def execute(self, *args):
         if len(args) != 2:
-            return "Please provide exactly two numbers to divide."
+            return self.arity_error
+
+        try:
+            a_value, b_value = map(self.backend.parse, args)
+            if b_value == 0:
+                return self.zero_division_error
+            return self.message.format(a_value, b_value, self.compute(a_value, b_value))
+        except self.backend.errors:
+            return ErrorMessage(self.invalid_error.format(*args))
+
+    def evaluate(self, *args):
+        """Return the result with its value, formatting the message only when it is read."""
+        if len(args) != 2:
+            return CommandResult(message=self.arity_error)
 
         try:
-            a_decimal, b_decimal = map(Decimal, args)
-            if b_decimal == 0:
-                return "Error: Division by zero is not allowed."
-            return f"The result of dividing {a_decimal} by {b_decimal} is equal to {a_decimal / b_decimal}."
-        except InvalidOperation:
-            return f"Invalid number input: '{args[0]}' or '{args[1]}' is not a valid number."
\ No newline at end of file
+            a_value, b_value = map(self.backend.parse, args)
+            if b_value == 0:
+                return CommandResult(message=self.zero_division_error)
+            value = self.compute(a_value, b_value)
+            return CommandResult(value, self.message.format, (a_value, b_value, value))
+        except self.backend.errors:
+            return CommandResult(message=ErrorMessage(self.invalid_error.format(*args)))
@@ -0,0 +1,77 @@
+"""
+
+This module contains the implementation of the EvalCommand class,
+which evaluates infix arithmetic expressions such as (a+b)*c/d.
+"""
+
+from app.command import Command, CommandResult, ErrorMessage
+from app.expression import ExpressionError, compile_expression, parse_bindings, split_bindings
+from app.numeric import DEFAULT_BACKEND
+
+def create_command(app):
+    """Create the command with the application's numeric backend."""
+    return EvalCommand(app.numeric_backend)
+
+class EvalCommand(Command):
+    """Command class to evaluate an arithmetic expression.
+
+    Variables are bound with ``name=value`` arguments, for example
+    ``eval (a+b)*c a=1 b=2 c=3``. Compiled expressions are cached by their
+    text, so a formula evaluated many times is parsed only once.
+    """
+
+    pure = True
+    vectorizable = True
+    message = "The result of {0} is equal to {1}."
+    empty_error = ErrorMessage("Please provide an expression to evaluate.")
+    zero_division_error = ErrorMessage("Error: Division by zero is not allowed.")
+    invalid_error = "Error: Invalid operation in {0}."
+
+    def __init__(self, backend=None):
+        """Initialize with the numeric backend literals and bound values are parsed with."""
+        self.backend = backend or DEFAULT_BACKEND
+
+    def compile(self, source):
+        """Compile an expression for this command's backend."""
+        return compile_expression(source, self.backend)
+
+    def execute(self, *args):
+        return self.evaluate(*args).message
+
+    def evaluate(self, *args, **values):
+        """Return the result with its value, formatting the message only when it is read.
+
+        Args:
+            *args: The expression and its ``name=value`` bindings.
+            **values: Variables bound to numbers, such as ``_`` for the previous
+                result of a pipeline.
+        """
+        source, bindings = split_bindings(args)
+        if not source:
+            return CommandResult(message=self.empty_error)
+
+        try:
+            numbers = parse_bindings(bindings, self.backend)
+            if values:
+                numbers.update((name, self.backend.convert(value)) for name, value in values.items())
+                bindings.update(values)
+            result = self.compile(source).evaluate(numbers)
+        except ExpressionError as e:
+            return CommandResult(message=ErrorMessage(f"Error: {e}"))
+        except ZeroDivisionError:
+            return CommandResult(message=self.zero_division_error)
+        except ArithmeticError:
+            # Decimal signals such as Infinity - Infinity
+            return CommandResult(message=ErrorMessage(self.invalid_error.format(source)))
+        return CommandResult(result, self._format, (source, bindings, result))
+
+    def _format(self, source, bindings, result):
+        """Build the message showing the expression, its bindings and the result."""
+        return self.message.format(self.describe(source, bindings), result)
+
+    @staticmethod
+    def describe(source, bindings):
+        """Return the expression text with its bindings, as shown in the result message."""
+        if not bindings:
+            return source
+        return f"{source} with {', '.join(f'{name}={value}' for name, value in bindings.items())}"
@@ -0,0 +1,46 @@
+"""
+This module contains the implementation of the HistogramCommand class,
+which counts a set of numbers in equal-width bins.
+"""
+
+import math
+from app.command import CommandResult, ErrorMessage
+from app.streaming import StatisticsCommand
+
+DEFAULT_BINS = 10
+MAX_BINS = 1000
+
+class HistogramCommand(StatisticsCommand):
+    """Command class to build a histogram of numbers or @file sources.
+
+    The number of bins, at most MAX_BINS, is chosen with a leading ``bins=N`` argument. Bins
+    span the exact minimum and maximum; counts are exact while the input
+    fits in the quantile sketch and estimated from it for larger streams.
+    """
+
+    needs_quantiles = True
+    count_error = "Please provide at least one number to build a histogram."
+    option_names = ("bins",)
+
+    def report(self, summary, bins=DEFAULT_BINS, **options):
+        try:
+            bins = int(bins)
+        except ValueError:
+            return CommandResult(message=ErrorMessage(f"Error: Invalid number of bins '{bins}'."))
+        if not 1 <= bins <= MAX_BINS:
+            return CommandResult(message=ErrorMessage(f"Error: The number of bins must be between 1 and {MAX_BINS}."))
+        moments = summary.moments
+        if not math.isfinite(moments.maximum - moments.minimum):
+            return CommandResult(message=ErrorMessage("Error: The range of these numbers is too wide for a histogram."))
+        counts, edges = summary.sketch.histogram(bins, moments.minimum, moments.maximum)
+        return CommandResult(counts, self._format, (summary.count, counts, edges))
+
+    def _format(self, total, counts, edges):
+        """Build the message listing every bin and its count."""
+        bins = len(counts)
+        lines = [f"Histogram of {total} values:"]
+        lines.extend(
+            f"[{low:g}, {high:g}{']' if i == bins - 1 else ')'}: {count}"
+            for i, (low, high, count) in enumerate(zip(edges, edges[1:], counts))
+        )
+        return "\n".join(lines)
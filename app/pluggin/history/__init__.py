@@ -3,25 +3,78 @@ This module contains the implementation of the HistoryCommand class,
 which retrieves and displays the history of executed commands.
 """
 
+import csv
 import os
-import pandas as pd
-from tabulate import tabulate
-from app.command import Command
+from datetime import datetime
+from app.command import Command, ErrorMessage
+from app.history import DEFAULT_MAX_SIZE, HistoryBuffer, read_history_csv
+
+DEFAULT_PAGE_SIZE = 20
+
+def create_command(app):
+    """Create the history command bound to the application's history store."""
+    return HistoryCommand(app.history, journal=app.journal, store=app.history_store, shared=app.shared_history)
 
 class HistoryCommand(Command):
     """Command class to manage and display history of past commands."""
 
-    def __init__(self, history_df):
-        """Initialize with a DataFrame to store the command history."""
-        self.history_df = history_df
+    stateful = True
+
+    def __init__(self, history=None, max_size=DEFAULT_MAX_SIZE, journal=None, store=None, shared=None):
+        """Initialize with the store used for the command history.
+
+        Args:
+            history (HistoryBuffer | pd.DataFrame | None): A ring buffer to share,
+                or a DataFrame with a "Command" column whose rows are copied into
+                a new buffer. The DataFrame is not kept: later commands do not
+                appear in it.
+            max_size (int): Capacity of the buffer created when none is given.
+            journal (HistoryJournal): Optional append-only journal every change is written to.
+            store (HistoryStore): Optional database keeping every entry with its result,
+                timestamp and latency. ``show`` and ``search`` then query it.
+            shared (SharedHistory): Optional shared memory history every process of a
+                deployment appends to. Without a store, ``show`` and ``search`` read it.
+        """
+        self.journal = journal
+        self.store = store
+        self.shared = shared
+        self._table = (None, None, None)  # Buffer and version the cached table was rendered for, and the table
+        self._unsaved = 0  # Commands added since the history was last loaded from or written to a file
+        if isinstance(history, HistoryBuffer):
+            self.history = history
+        else:
+            self.history = HistoryBuffer(max_size)
+            if history is not None and "Command" in history:
+                self.history.extend(history["Command"])
+
+    @property
+    def history_df(self):
+        """DataFrame copy of the history, for read-only use: changes to it are not written back."""
+        return self.history.to_dataframe()
+
+    def accesses_files(self, *args):
+        """``save``, ``load`` and ``delete`` work on the file they are given."""
+        return bool(args) and args[0].lower() in ("save", "load", "delete")
 
     def execute(self, *args):
-        """Execute the command based on user input (show, save, load, clear, delete)."""
+        """Execute the command based on user input (show, search, save, load, clear, delete)."""
         if not args:
             return self.show_history()
 
         command = args[0].lower()
 
+        if command in ("show", "search"):
+            try:
+                prefix, last, page, page_size = self.parse_show_options(args[1:], search=command == "search")
+            except ValueError as e:
+                return ErrorMessage(f"Error: {e}")
+            if command == "search":
+                return self.search_history(prefix, last)
+            if last is None and page is None:
+                return self.show_history()
+            if last is not None:
+                return self.show_last(last)
+            return self.show_page(page, page_size)
         if command == "save":
             return self.save_history(args[1] if len(args) > 1 else "history.csv")
         if command == "load":
@@ -31,53 +84,214 @@ class HistoryCommand(Command):
         if command == "delete":
             return self.delete_history(args[1] if len(args) > 1 else "history.csv")  # Pass filename if provided
 
-        return "Invalid history command. Available commands: show, save, load, clear, delete."
+        return ErrorMessage("Invalid history command. Available commands: show, search, save, load, clear, delete.")
+
+    @staticmethod
+    def parse_show_options(args, search=False):
+        """Parse ``[prefix] [--last N] [--page P] [--page-size S]``.
+
+        Returns:
+            tuple: The prefix (search only), last, page and page size.
+
+        Raises:
+            ValueError: If an option is unknown or its value is not a positive integer.
+        """
+        options = {"--last": None, "--page": None, "--page-size": DEFAULT_PAGE_SIZE}
+        words = []
+        args = list(args)
+        while args:
+            arg = args.pop(0)
+            if arg in options:
+                value = args.pop(0) if args else ""
+                if not value.isdigit() or int(value) < 1:
+                    raise ValueError(f"{arg} expects a positive integer.")
+                options[arg] = int(value)
+            elif arg.startswith("--") or not search:
+                raise ValueError(f"Unknown history option: {arg}")
+            else:
+                words.append(arg)
+        if search and not words:
+            raise ValueError("Please provide a command prefix to search for.")
+        return " ".join(words), options["--last"], options["--page"], options["--page-size"]
+
+    def show_last(self, count):
+        """Display the last ``count`` entries."""
+        if self.store is not None:
+            return self.format_entries(self.store.last(count))
+        if self.shared is not None:
+            return self.format_entries(self.shared.last(count))
+        return self.format_commands(self.history.to_list()[-count:])
+
+    def show_page(self, number, size=DEFAULT_PAGE_SIZE):
+        """Display page ``number`` of ``size`` entries, page 1 being the most recent."""
+        if self.store is not None:
+            entries = self.store.page(number, size)
+            return self.format_entries(entries) if entries else f"No history entries on page {number}."
+        if self.shared is not None:
+            entries = self.shared.entries()
+            end = len(entries) - (number - 1) * size
+            return self.format_entries(entries[max(0, end - size):end]) if end > 0 else f"No history entries on page {number}."
+        commands = self.history.to_list()
+        end = len(commands) - (number - 1) * size
+        if end <= 0:
+            return f"No history entries on page {number}."
+        return self.format_commands(commands[max(0, end - size):end])
+
+    def search_history(self, prefix, last=None):
+        """Display the entries whose command starts with ``prefix``."""
+        if self.store is not None:
+            entries = self.store.search(prefix, last)
+            return self.format_entries(entries) if entries else f"No history entries start with '{prefix}'."
+        if self.shared is not None:
+            entries = [entry for entry in self.shared.entries() if entry.command.startswith(prefix)]
+            if not entries:
+                return f"No history entries start with '{prefix}'."
+            return self.format_entries(entries[-last:] if last else entries)
+        commands = [command for command in self.history if command.startswith(prefix)]
+        if not commands:
+            return f"No history entries start with '{prefix}'."
+        return self.format_commands(commands[-last:] if last else commands)
+
+    @staticmethod
+    def format_commands(commands):
+        """Format commands as a one-column table."""
+        if not commands:
+            return "No command history available."
+        from tabulate import tabulate  # pylint: disable=import-outside-toplevel
+        return tabulate([[command] for command in commands], headers=["Command"], tablefmt="fancy_grid")
+
+    @staticmethod
+    def format_entries(entries):
+        """Format store entries as a table with their time, result and latency."""
+        if not entries:
+            return "No command history available."
+        from tabulate import tabulate  # pylint: disable=import-outside-toplevel
+        rows = [
+            [
+                datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+                entry.command,
+                entry.result if entry.result is not None else "",
+                "" if entry.latency is None else f"{entry.latency * 1000:.3f}",
+            ]
+            for entry in entries
+        ]
+        return tabulate(rows, headers=["Time", "Command", "Result", "Latency ms"], tablefmt="fancy_grid", disable_numparse=True)
 
     def show_history(self):
-        """Display the history of commands using tabulate for a table-like format."""
-        if self.history_df.empty:
+        """Display the history of commands using tabulate for a table-like format.
+
+        The table is only rendered again once the history has changed.
+        """
+        if not self.history:
             return "No command history available."
 
-        # Format the DataFrame as a table using tabulate
-        return tabulate(self.history_df.values, headers=["Command"], tablefmt="fancy_grid")
+        history, version, table = self._table
+        if history is not self.history or version != self.history.version:
+            from tabulate import tabulate  # pylint: disable=import-outside-toplevel
+            # Format the history as a table using tabulate
+            table = tabulate([[command] for command in self.history], headers=["Command"], tablefmt="fancy_grid")
+            self._table = (self.history, self.history.version, table)
+        return table
+
+    def add_to_history(self, command_str, result=None, latency=None):
+        """Add a new command to the history, except for history management commands.
 
-    def add_to_history(self, command_str):
-        """Add a new command to the history, except for history management commands."""
+        Args:
+            command_str (str): The command line.
+            result (str): The command's output, kept by the history store.
+            latency (float): Execution time in seconds, kept by the history store.
+        """
         if command_str.startswith("history"):
             return
 
-        # Update the DataFrame in place by adding a new row
-        self.history_df.loc[len(self.history_df)] = command_str
+        self.history.append(command_str)
+        self._unsaved += 1
+        if self.store is not None:
+            self.store.append(command_str, result, latency)
+        if self.shared is not None:
+            self.shared.append(command_str, result, latency)
+        if self.journal is not None:
+            self.journal.append(command_str)
+            if self.journal.needs_compaction:
+                self.journal.compact(self.history)
 
     def save_history(self, filename="history.csv"):
         """Save the history to a CSV file."""
-        if self.history_df.empty:
+        if not self.history:
             return "No command history to save."
         self.history_df.to_csv(filename, index=False)
+        self._unsaved = 0
         return f"History saved to {filename}."
 
+    def append_history(self, filename="history.csv"):
+        """Append the commands added since the history was last loaded or saved to a CSV file.
+
+        The file is created if needed and its earlier entries are kept. Only
+        the commands still in the buffer can be appended.
+        """
+        if not self.history:
+            return "No command history to save."
+        if not self._unsaved:
+            return "No new commands to save."
+        write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        with open(filename, "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if write_header:
+                writer.writerow(["Command"])
+            writer.writerows([command] for command in self.history.to_list()[-self._unsaved:])
+        self._unsaved = 0
+        return f"History appended to {filename}."
+
     def load_history(self, filename="history.csv"):
-        """Load the history from a CSV file, updating the DataFrame in place."""
+        """Load the history from a CSV file, updating the history store in place.
+
+        Only the last commands that fit in the store are read, so loading
+        does not depend on the size of the file.
+        """
         if os.path.exists(filename):
-            loaded_df = pd.read_csv(filename)
-            # Clear the existing DataFrame while keeping its reference intact
-            self.history_df.drop(self.history_df.index, inplace=True)
-            # Append each command from the loaded DataFrame
-            for command in loaded_df["Command"]:
-                self.history_df.loc[len(self.history_df)] = command
+            commands = read_history_csv(filename, tail=self.history.capacity)
+            self.history.clear()
+            self.history.extend(commands)
+            self._unsaved = 0
+            if self.journal is not None:
+                self.journal.compact(self.history)
             return f"History loaded from {filename}."
 
-        return f"History file '{filename}' not found."
+        return ErrorMessage(f"History file '{filename}' not found.")
 
     def clear_history(self):
-        """Clear the in-memory history while preserving the DataFrame reference."""
-        self.history_df.drop(self.history_df.index, inplace=True)
+        """Clear the in-memory history while preserving the store reference."""
+        self.history.clear()
+        self._unsaved = 0
+        if self.store is not None:
+            self.store.clear()
+        if self.shared is not None:
+            self.shared.clear()
+        if self.journal is not None:
+            self.journal.clear()
         return "History cleared."
 
+    def load_store(self):
+        """Fill the in-memory history with the most recent entries of the history store."""
+        self.history.clear()
+        self.history.extend(entry.command for entry in self.store.last(self.history.capacity))
+        return f"History loaded from {self.store.path}."
+
+    def load_shared(self):
+        """Fill the in-memory history with the most recent entries of the shared history."""
+        self.history.clear()
+        self.history.extend(entry.command for entry in self.shared.last(self.history.capacity))
+        return f"History loaded from shared memory '{self.shared.name}'."
+
+    def replay_journal(self):
+        """Rebuild the in-memory history from the journal."""
+        records = self.journal.replay(self.history)
+        return f"History replayed from {self.journal.path} ({records} records)."
+
     def delete_history(self, filename="history.csv"):
         """Delete the history CSV file."""
         if os.path.exists(filename):
             os.remove(filename)
             return f"History file '{filename}' deleted."
 
-        return f"No history file found at '{filename}'."
\ No newline at end of file
+        return f"No history file found at '{filename}'."
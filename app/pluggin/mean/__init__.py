@@ -5,14 +5,75 @@ which calculates the mean of a given set of numbers.
 """
 
 from statistics import mean
-from app.command import Command
+from app.command import Command, CommandResult, ErrorMessage
+from app.operands import OperandSourceError, is_source, iter_operand_chunks
+
+def create_command(app):
+    """Create the command with the application's numeric backend."""
+    return MeanCommand(app.numeric_backend)
 
 class MeanCommand(Command):
-    """Command class to calculate the mean of a set of numbers."""
+    """Command class to calculate the mean of a set of numbers.
+
+    Numbers may also be read from files with ``@path`` arguments (``@-`` for
+    stdin). Those are streamed in chunks and summarized without echoing
+    every value.
+    """
+
+    pure = True
+    vectorizable = True
+    message = "The mean of {0} is {1}."
+    summary_message = "The mean of {0} values is {1} (min {2}, max {3})."
+    empty_error = ErrorMessage("Please provide at least one number to calculate the mean.")
+    invalid_error = ErrorMessage("Error: Invalid input. Please provide valid numbers.")
+
+    def __init__(self, backend=None):
+        """Initialize with the numeric backend, or None for the float mean of earlier versions."""
+        self.backend = backend
+
+    def is_cacheable(self, *args):
+        """Results read from files are never cached, since the files may change."""
+        return not any(is_source(arg) for arg in args)
 
     def execute(self, *args):
+        return self.evaluate(*args).message
+
+    def evaluate(self, *args):
+        """Return the mean with its value, formatting the message only when it is read."""
         if not args:
-            return "Please provide at least one number to calculate the mean."
+            return CommandResult(message=self.empty_error)
+
+        if not self.is_cacheable(*args):
+            return self.summarize(args)
+
+        if self.backend is not None:
+            try:
+                numbers = list(map(self.backend.parse, args))
+            except self.backend.errors:
+                return CommandResult(message=self.invalid_error)
+            value = self.backend.mean(numbers)
+        else:
+            numbers = [float(num) for num in args]  # Ensure args are converted to floats
+            value = mean(numbers)
+        return CommandResult(value, self._format, (numbers, value))
+
+    def _format(self, numbers, value):
+        """Build the message listing the numbers and their mean."""
+        return self.message.format(', '.join(map(str, numbers)), value)
+
+    def summarize(self, args):
+        """Stream numbers from literal arguments and @file sources in O(1) memory."""
+        # Imported here so that plain means never load NumPy
+        from app.streaming import RunningMean  # pylint: disable=import-outside-toplevel
 
-        numbers = [float(num) for num in args]  # Ensure args are converted to floats
-        return f"The mean of {', '.join(map(str, numbers))} is {mean(numbers)}."
\ No newline at end of file
+        stats = RunningMean()
+        try:
+            for chunk in iter_operand_chunks(args):
+                stats.update(chunk)
+        except OperandSourceError as e:
+            return CommandResult(message=ErrorMessage(f"Error: {e}"))
+        if not stats.count:
+            return CommandResult(message=self.empty_error)
+        return CommandResult(
+            stats.mean, message=self.summary_message.format(stats.count, stats.mean, stats.minimum, stats.maximum),
+        )
@@ -0,0 +1,22 @@
+"""
+This module contains the implementation of the MedianCommand class,
+which calculates the median of a set of numbers.
+"""
+
+from app.command import CommandResult
+from app.streaming import StatisticsCommand
+
+class MedianCommand(StatisticsCommand):
+    """Command class to calculate the median of numbers or @file sources.
+
+    The median is exact while the input fits in the quantile sketch and
+    approximate (rank error around 0.5%) for larger streams.
+    """
+
+    needs_quantiles = True
+    count_error = "Please provide at least one number to calculate the median."
+    message = "The median of {0} values is {1}."
+
+    def report(self, summary, **options):
+        (median,) = summary.sketch.quantiles([0.5])
+        return CommandResult(median, self.message.format, (summary.count, median))
@@ -0,0 +1,19 @@
+"""
+This module contains the implementation of the MinmaxCommand class,
+which finds the minimum and maximum of a set of numbers.
+"""
+
+from app.command import CommandResult
+from app.streaming import StatisticsCommand
+
+class MinmaxCommand(StatisticsCommand):
+    """Command class to find the minimum and maximum of numbers or @file sources."""
+
+    count_error = "Please provide at least one number to find the minimum and maximum."
+    message = "The minimum of {0} values is {1} and the maximum is {2}."
+
+    def report(self, summary, **options):
+        moments = summary.moments
+        return CommandResult(
+            (moments.minimum, moments.maximum), self.message.format, (summary.count, moments.minimum, moments.maximum),
+        )
@@ -1,21 +1,82 @@
 """
 
 This module contains the implementation of the MultiplyCommand class,
-which performs multiplication of two given numbers.
+which multiplies two or more given numbers.
 """
 
-from decimal import Decimal, InvalidOperation
-from app.command import Command
+import operator
+from app.command import Command, CommandResult, ErrorMessage
+from app.numeric import DEFAULT_BACKEND
+from app.operands import OperandSourceError, has_sources
+from app.reduction import ReductionError, needs_reduction, reduce_operands, split_workers
+
+def create_command(app):
+    """Create the command with the application's numeric backend."""
+    return MultiplyCommand(app.numeric_backend)
 
 class MultiplyCommand(Command):
-    """Command class to multiply two numbers."""
+    """Command class to multiply two numbers, or any number of operands.
+
+    More than two operands, or numbers read from ``@path`` files (``@-`` for
+    stdin), are multiplied with the backend's n-ary reduction and reported
+    as a product instead of echoing every value.
+    """
+
+    pure = True
+    vectorizable = True
+    operation = staticmethod(operator.mul)
+    message = "The result of multiplying {0} and {1} is equal to {2}."
+    arity_error = ErrorMessage("Please provide at least two numbers to multiply.")
+    reduction_message = "The product of {0} numbers is equal to {1}."
+    reduction_error = ErrorMessage("Error: The product of these numbers is undefined or out of range.")
+    invalid_error = "Invalid number input: '{0}' or '{1}' is not a valid number."
+
+    def __init__(self, backend=None):
+        """Initialize with the numeric backend operands are parsed and computed with."""
+        self.backend = backend or DEFAULT_BACKEND
+        self.compute = self.backend.apply(self.operation)
+
+    def is_cacheable(self, *args):
+        """Results read from files are never cached, since the files may change."""
+        return not has_sources(args)
 
     def execute(self, *args):
         if len(args) != 2:
-            return "Please provide exactly two numbers to multiply."
+            return self.reduce(args).message
+
+        try:
+            a_value, b_value = map(self.backend.parse, args)
+            return self.message.format(a_value, b_value, self.compute(a_value, b_value))
+        except self.backend.errors:
+            if needs_reduction(args):
+                return self.reduce(args).message
+            return ErrorMessage(self.invalid_error.format(*args))
+
+    def evaluate(self, *args):
+        """Return the result with its value, formatting the message only when it is read."""
+        if len(args) != 2:
+            return self.reduce(args)
+
+        try:
+            a_value, b_value = map(self.backend.parse, args)
+            value = self.compute(a_value, b_value)
+            return CommandResult(value, self.message.format, (a_value, b_value, value))
+        except self.backend.errors:
+            if needs_reduction(args):
+                return self.reduce(args)
+            return CommandResult(message=ErrorMessage(self.invalid_error.format(*args)))
 
+    def reduce(self, args):
+        """Multiply any number of operands, including @file sources and a leading ``workers=N``."""
         try:
-            a_decimal, b_decimal = map(Decimal, args)
-            return f"The result of multiplying {a_decimal} and {b_decimal} is equal to {a_decimal * b_decimal}."
-        except InvalidOperation:
-            return f"Invalid number input: '{args[0]}' or '{args[1]}' is not a valid number."
\ No newline at end of file
+            workers, operands = split_workers(args)
+            if len(operands) < 2 and not has_sources(operands):
+                return CommandResult(message=self.arity_error)
+            count, value = reduce_operands(self.backend, self.operation, operands, workers)
+        except (OperandSourceError, ReductionError) as e:
+            return CommandResult(message=ErrorMessage(f"Error: {e}"))
+        except ArithmeticError:
+            return CommandResult(message=self.reduction_error)
+        if value is None:
+            return CommandResult(message=self.arity_error)
+        return CommandResult(value, self.reduction_message.format, (count, value))
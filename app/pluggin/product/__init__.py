@@ -0,0 +1,13 @@
+"""
+This module contains the implementation of the ProductCommand class,
+an alias of ``multiply`` for multiplying many numbers or @file sources.
+"""
+
+from app.pluggin.multiply import MultiplyCommand
+
+def create_command(app):
+    """Create the command with the application's numeric backend."""
+    return ProductCommand(app.numeric_backend)
+
+class ProductCommand(MultiplyCommand):
+    """Command class multiplying any number of operands, such as ``product 1.5 2 @factors.txt``."""
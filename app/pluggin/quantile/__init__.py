@@ -0,0 +1,35 @@
+"""
+This module contains the implementation of the QuantileCommand class,
+which estimates percentiles of a set of numbers.
+"""
+
+from app.command import CommandResult, ErrorMessage
+from app.streaming import StatisticsCommand
+
+DEFAULT_PERCENTILES = "50,95,99"
+
+class QuantileCommand(StatisticsCommand):
+    """Command class to estimate percentiles of numbers or @file sources.
+
+    Percentiles are chosen with a leading ``p=50,90,99.9`` argument and
+    default to p50, p95 and p99.
+    """
+
+    needs_quantiles = True
+    count_error = "Please provide at least one number to calculate quantiles."
+    option_names = ("p",)
+
+    def report(self, summary, p=DEFAULT_PERCENTILES, **options):
+        try:
+            percentiles = [float(value) for value in p.split(",")]
+        except ValueError:
+            return CommandResult(message=ErrorMessage(f"Error: Invalid percentiles '{p}'."))
+        if not all(0 <= value <= 100 for value in percentiles):
+            return CommandResult(message=ErrorMessage("Error: Percentiles must be between 0 and 100."))
+        values = summary.sketch.quantiles([value / 100 for value in percentiles])
+        return CommandResult(values, self._format, (summary.count, percentiles, values))
+
+    def _format(self, count, percentiles, values):
+        """Build the message listing each percentile and its value."""
+        parts = ", ".join(f"p{value:g}={result}" for value, result in zip(percentiles, values))
+        return f"The quantiles of {count} values are {parts}."
@@ -0,0 +1,84 @@
+"""
+This module contains the implementation of the StatsCommand class,
+which reports the per-command metrics and controls the profiler.
+"""
+
+from app.command import Command, ErrorMessage
+from app.metrics import Profiler
+
+def create_command(app):
+    """Create the stats command bound to the application's metrics."""
+    return StatsCommand(app.command_handler.metrics, app.settings.get('METRICS_FILE'))
+
+class StatsCommand(Command):
+    """Command class to show, export or reset the command metrics and to profile.
+
+    Subcommands: ``show`` (default), ``json``, ``prometheus``,
+    ``dump [path]``, ``reset``, ``profile start [cprofile|sample]`` and
+    ``profile stop``.
+    """
+
+    stateful = True
+
+    def __init__(self, metrics=None, dump_path=None):
+        """Initialize with the Metrics of the command handler, if any."""
+        self.metrics = metrics
+        self.dump_path = dump_path
+        self.profiler = Profiler()
+
+    def accesses_files(self, *args):
+        """Only ``dump`` writes a file."""
+        return bool(args) and args[0].lower() == "dump"
+
+    def execute(self, *args):
+        """Execute the command based on user input."""
+        command = args[0].lower() if args else "show"
+        if command == "profile":
+            return self.profile(*args[1:])
+        if self.metrics is None:
+            return "Metrics are disabled. Unset METRICS or set it to 'on' to enable them."
+
+        if command == "show":
+            return self.show()
+        if command == "json":
+            return self.metrics.to_json()
+        if command == "prometheus":
+            return self.metrics.to_prometheus().rstrip("\n")
+        if command == "dump":
+            path = args[1] if len(args) > 1 else self.dump_path
+            if not path:
+                return ErrorMessage("Please provide a file name or set METRICS_FILE.")
+            self.metrics.dump(path)
+            return f"Metrics written to {path}."
+        if command == "reset":
+            self.metrics.reset()
+            return "Metrics reset."
+
+        return ErrorMessage("Invalid stats command. Available commands: show, json, prometheus, dump, reset, profile.")
+
+    def show(self):
+        """Return a table with the calls, errors and latency percentiles of every command."""
+        snapshot = self.metrics.snapshot()
+        if not snapshot:
+            return "No commands executed yet."
+        from tabulate import tabulate  # pylint: disable=import-outside-toplevel
+        rows = [
+            [name, stats["calls"], stats["errors"], stats["mean_ms"], stats["p50_ms"], stats["p99_ms"], stats["max_ms"]]
+            for name, stats in snapshot.items()
+        ]
+        headers = ["Command", "Calls", "Errors", "Mean ms", "p50 ms", "p99 ms", "Max ms"]
+        return tabulate(rows, headers=headers, floatfmt=".3f")
+
+    def profile(self, *args):
+        """Start or stop the profiler: ``profile start [cprofile|sample]`` or ``profile stop``."""
+        action = args[0].lower() if args else ""
+        try:
+            if action == "start":
+                mode = args[1].lower() if len(args) > 1 else "cprofile"
+                self.profiler.start(mode)
+                return f"Profiling started in {mode} mode."
+            if action == "stop":
+                return self.profiler.stop()
+        except ValueError as e:
+            return ErrorMessage(f"Error: {e}")
+        return ErrorMessage("Usage: stats profile start [cprofile|sample] | stats profile stop")
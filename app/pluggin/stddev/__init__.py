@@ -0,0 +1,22 @@
+"""
+This module contains the implementation of the StddevCommand class,
+which calculates the sample standard deviation of a set of numbers.
+"""
+
+import math
+from app.command import CommandResult, ErrorMessage
+from app.streaming import StatisticsCommand
+
+class StddevCommand(StatisticsCommand):
+    """Command class to calculate the sample standard deviation of numbers or @file sources."""
+
+    min_count = 2
+    count_error = "Please provide at least two numbers to calculate the standard deviation."
+    message = "The standard deviation of {0} values is {1}."
+    overflow_error = ErrorMessage("Error: The standard deviation of these numbers is out of range.")
+
+    def report(self, summary, **options):
+        stddev = summary.moments.stddev()
+        if not math.isfinite(stddev):
+            return CommandResult(message=self.overflow_error)
+        return CommandResult(stddev, self.message.format, (summary.count, stddev))
@@ -0,0 +1,13 @@
+"""
+This module contains the implementation of the SumCommand class,
+an alias of ``add`` for summing many numbers or @file sources.
+"""
+
+from app.pluggin.add import AddCommand
+
+def create_command(app):
+    """Create the command with the application's numeric backend."""
+    return SumCommand(app.numeric_backend)
+
+class SumCommand(AddCommand):
+    """Command class adding any number of operands, such as ``sum @values.txt``."""
@@ -0,0 +1,22 @@
+"""
+This module contains the implementation of the VarianceCommand class,
+which calculates the sample variance of a set of numbers.
+"""
+
+import math
+from app.command import CommandResult, ErrorMessage
+from app.streaming import StatisticsCommand
+
+class VarianceCommand(StatisticsCommand):
+    """Command class to calculate the sample variance of numbers or @file sources."""
+
+    min_count = 2
+    count_error = "Please provide at least two numbers to calculate the variance."
+    message = "The variance of {0} values is {1}."
+    overflow_error = ErrorMessage("Error: The variance of these numbers is out of range.")
+
+    def report(self, summary, **options):
+        variance = summary.moments.variance()
+        if not math.isfinite(variance):
+            return CommandResult(message=self.overflow_error)
+        return CommandResult(variance, self.message.format, (summary.count, variance))
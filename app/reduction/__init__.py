@@ -0,0 +1,129 @@
+"""
+This module reduces arbitrarily many operands with a binary operation, for
+the n-ary ``add``/``sum`` and ``multiply``/``product`` commands.
+
+Operands are literal numbers and ``@file`` sources (see ``app.operands``),
+read in chunks so huge inputs never need to fit in memory. Each chunk is
+parsed with the command's numeric backend and reduced to a partial result;
+the partial results are then reduced together and rounded once.
+
+With a leading ``workers=N`` argument, the chunks of ``@file`` sources are
+reduced in N worker processes (at most one per CPU), with at most two chunks
+per worker in flight at a time. Literal operands alone are always reduced
+in this process: they form a single chunk, which no pool would speed up.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from app.operands import BLOCK_SIZE, OperandSourceError, has_sources, iter_operand_tokens
+
+WORKERS_OPTION = "workers="
+
+
+class ReductionError(ValueError):
+    """Raised when the options of a reduction are invalid."""
+
+
+def needs_reduction(args):
+    """Return True when arguments use ``@file`` sources or start with the ``workers=`` option."""
+    return has_sources(args) or str(args[0]).startswith(WORKERS_OPTION)
+
+
+def split_workers(args):
+    """Split a leading ``workers=N`` option from the operands.
+
+    Returns:
+        tuple: The number of workers (None without the option) and the operands.
+
+    Raises:
+        ReductionError: If N is not a positive integer.
+    """
+    if not args or not str(args[0]).startswith(WORKERS_OPTION):
+        return None, args
+    try:
+        workers = int(args[0][len(WORKERS_OPTION):])
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise ReductionError("workers expects a positive integer.")
+    return workers, args[1:]
+
+
+def reduce_operands(backend, operation, args, workers=None, block_size=BLOCK_SIZE):
+    """Reduce literal numbers and ``@file`` sources with a binary operation.
+
+    Args:
+        backend (NumericBackend): Backend parsing and reducing the numbers.
+        operation (callable): ``operator.add`` or ``operator.mul``.
+        args (tuple): Literal numbers and ``@file`` sources.
+        workers (int): Number of worker processes (capped at the CPU count), or None to reduce in this process.
+        block_size (int): Number of characters read from a source per chunk.
+
+    Returns:
+        tuple: The number of operands and the rounded result (None when there were no operands).
+
+    Raises:
+        OperandSourceError: If a file does not exist or an operand is not a number.
+        ArithmeticError: If the operation signals an error (such as infinity minus infinity).
+    """
+    chunks = iter_operand_tokens(args, block_size)
+    if workers is not None and has_sources(args):
+        # A single chunk is reduced faster here than in a pool
+        first = list(islice(chunks, 2))
+        chunks = chain(first, chunks)
+        workers = min(workers, os.cpu_count() or 1) if len(first) > 1 else None
+    else:
+        workers = None
+    if workers is None:
+        results = [reduce_tokens(backend, operation, tokens, name) for tokens, name in chunks]
+    else:
+        results = _reduce_in_workers(backend, operation, chunks, workers)
+
+    count = sum(chunk_count for chunk_count, _ in results)
+    partials = [partial for chunk_count, partial in results if chunk_count]
+    if not partials:
+        return count, None
+    return count, backend.round(backend.reduce(operation, partials))
+
+
+def reduce_tokens(backend, operation, tokens, name):
+    """Parse a chunk of number tokens and reduce it to an unrounded partial result.
+
+    Returns:
+        tuple: The number of tokens and the partial result.
+
+    Raises:
+        OperandSourceError: If a token is not a number.
+    """
+    if not tokens:
+        return 0, None
+    try:
+        values = list(map(backend.parse, tokens))
+    except backend.errors:
+        raise OperandSourceError(f"Invalid number '{_invalid_token(backend, tokens)}' in {name}.") from None
+    return len(values), backend.reduce(operation, values)
+
+
+def _reduce_in_workers(backend, operation, chunks, workers):
+    """Reduce chunks in worker processes, keeping the results in input order."""
+    results = []
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for tokens, name in chunks:
+            if len(pending) >= 2 * workers:
+                results.append(pending.popleft().result())
+            pending.append(executor.submit(reduce_tokens, backend, operation, tokens, name))
+        results.extend(future.result() for future in pending)
+    return results
+
+
+def _invalid_token(backend, tokens):
+    """Return the first token of a chunk the backend cannot parse."""
+    for token in tokens:
+        try:
+            backend.parse(token)
+        except backend.errors:
+            return token
+    return None
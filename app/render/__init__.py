@@ -0,0 +1,191 @@
+"""
+This module renders command results for output, in one of several modes:
+
+* ``text``: the messages shown by the REPL, such as "The result of adding
+  2 and 3 is equal to 5.".
+* ``value``: the bare value of every result, one per line.
+* ``jsonl``: one JSON object per result, ``{"command": ..., "value": ...}``.
+* ``csv``: a ``command,value,message`` table.
+
+Results without a value (errors, history listings) keep their message in
+every mode. The machine modes read the value of a CommandResult and never
+its message, so the message is never formatted, and they write through an
+OutputBuffer that hands large blocks to the underlying stream.
+"""
+
+import csv
+import math
+from decimal import Decimal
+from json.encoder import encode_basestring
+
+TEXT_MODE = "text"
+VALUE_MODE = "value"
+JSONL_MODE = "jsonl"
+CSV_MODE = "csv"
+OUTPUT_MODES = (TEXT_MODE, VALUE_MODE, JSONL_MODE, CSV_MODE)
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+def create_renderer(mode):
+    """Create the renderer of an output mode.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    renderers = {TEXT_MODE: Renderer, VALUE_MODE: ValueRenderer, JSONL_MODE: JsonlRenderer, CSV_MODE: CsvRenderer}
+    if mode not in renderers:
+        raise ValueError(f"Unknown output mode: {mode}. Available modes: {', '.join(OUTPUT_MODES)}.")
+    return renderers[mode]()
+
+
+def split_result(result):
+    """Return the value of a result and its message, the message only when there is no value."""
+    value = getattr(result, "value", None)
+    if value is not None:
+        return value, None
+    return None, "" if result is None else str(result)
+
+
+def bare_value(value):
+    """Return a value as text; several values (such as a minimum and maximum) are separated by spaces."""
+    if type(value) is list or type(value) is tuple:
+        return " ".join(map(str, value))
+    return str(value)
+
+
+class Renderer:
+    """Renders results as their messages, like the REPL."""
+
+    mode = TEXT_MODE
+    # Whether results should be CommandResults whose values are read instead of their messages
+    needs_values = False
+
+    def header(self):
+        """Return the text written before the first result, if any."""
+        return ""
+
+    def render(self, commands, results):
+        """Render a chunk of results.
+
+        Args:
+            commands (list): The command lines (or records with a ``text``) of the chunk.
+            results (list): The output of every command: a CommandResult or a string.
+
+        Returns:
+            str: The rendered chunk, ending with a newline.
+        """
+        return "\n".join(map(str, results)) + "\n"
+
+
+class ValueRenderer(Renderer):
+    """Renders the bare value of every result."""
+
+    mode = VALUE_MODE
+    needs_values = True
+
+    def render(self, commands, results):
+        lines = []
+        for result in results:
+            value = getattr(result, "value", None)
+            lines.append(str(result) if value is None else bare_value(value))
+        return "\n".join(lines) + "\n"
+
+
+class JsonlRenderer(Renderer):
+    """Renders every result as one JSON object per line.
+
+    Integers, floats and Decimals are written as JSON numbers, other values
+    (fractions, infinities) as strings, and several values as an array.
+    """
+
+    mode = JSONL_MODE
+    needs_values = True
+
+    def render(self, commands, results):
+        lines = []
+        for command, result in zip(commands, results):
+            value = getattr(result, "value", None)
+            text = encode_basestring(command if isinstance(command, str) else command.text)
+            if value is None:
+                lines.append(f'{{"command":{text},"message":{encode_basestring(str(result))}}}')
+            elif isinstance(value, Decimal) and value.is_finite():
+                lines.append(f'{{"command":{text},"value":{str(value)}}}')
+            else:
+                lines.append(f'{{"command":{text},"value":{json_number(value)}}}')
+        return "\n".join(lines) + "\n"
+
+
+class CsvRenderer(Renderer):
+    """Renders the results as CSV rows with a header."""
+
+    mode = CSV_MODE
+    needs_values = True
+
+    def header(self):
+        return "command,value,message\r\n"
+
+    def render(self, commands, results):
+        rows = _Rows()
+        writer = csv.writer(rows)
+        for command, result in zip(commands, results):
+            value, message = split_result(result)
+            value = "" if value is None else bare_value(value)
+            writer.writerow((getattr(command, "text", command), value, message or ""))
+        return "".join(rows)
+
+
+class _Rows(list):
+    """List of strings that csv.writer can write to."""
+
+    write = list.append
+
+
+def json_number(value):
+    """Return a value as JSON: a number when it has a finite numeric representation, a string otherwise.
+
+    Several values (such as a minimum and maximum) are an array of those.
+    """
+    kind = type(value)
+    if kind is list or kind is tuple:
+        return f"[{','.join(map(json_number, value))}]"
+    if kind is int:
+        return str(value)
+    if kind is float:
+        return repr(value) if math.isfinite(value) else encode_basestring(repr(value))
+    if kind is Decimal and value.is_finite():
+        return str(value)
+    return encode_basestring(str(value))
+
+
+class OutputBuffer:
+    """Collects text and writes it to a stream in blocks of at least ``size`` characters."""
+
+    def __init__(self, stream, size=DEFAULT_BUFFER_SIZE):
+        """Initialize the buffer.
+
+        Args:
+            stream (io.TextIOBase): Destination of the text.
+            size (int): Number of characters collected before they are written.
+        """
+        self.stream = stream
+        self.size = size
+        self._parts = []
+        self._pending = 0
+
+    def write(self, text):
+        """Add text, writing the collected text once it reaches the buffer size."""
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self.size:
+            self._write()
+
+    def flush(self):
+        """Write the collected text and flush the stream."""
+        self._write()
+        self.stream.flush()
+
+    def _write(self):
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts = []
+            self._pending = 0
@@ -0,0 +1,158 @@
+"""
+This module contains the Runtime class, the process-wide state of the calculator.
+
+Building a runtime configures logging, loads the environment, creates the
+command handler with its result cache and metrics, and registers the
+plugins. A process does this once (``get_runtime``) and then opens a
+lightweight Session per user, which only holds that user's history and
+context.
+"""
+
+import itertools
+import logging
+import logging.config
+import os
+import threading
+from dotenv import load_dotenv
+from app.cache import ResultCache
+from app.command import CommandHandler
+from app.history import DEFAULT_MAX_SIZE
+from app.logqueue import install_queue_logging, stop_queue_logging
+from app.metrics import Metrics
+from app.numeric import create_backend
+from app.pluggin import PluginRegistry
+from app.session import Session
+
+_RUNTIME = None
+_RUNTIME_LOCK = threading.Lock()
+
+
+def get_runtime():
+    """Return the runtime of this process, creating it on first use."""
+    global _RUNTIME  # pylint: disable=global-statement
+    with _RUNTIME_LOCK:
+        if _RUNTIME is None:
+            _RUNTIME = Runtime()
+        return _RUNTIME
+
+
+class Runtime:
+    """Process-wide state shared by every session: logging, settings, commands and plugins."""
+
+    # A bare runtime has no main history: each session keeps its own, and App adds one
+    history = None
+    journal = None
+    history_store = None
+    shared_history = None
+
+    def __init__(self):
+        """Configure logging, load environment variables and register the commands."""
+        os.makedirs('logs', exist_ok=True)
+        self.configure_logging()
+        load_dotenv()
+        self.settings = dict(os.environ)
+        self.settings.setdefault('ENVIRONMENT', 'PRODUCTION')
+        self.command_handler = CommandHandler(self.create_result_cache(), self.create_metrics())
+        self.numeric_backend = self.create_numeric_backend()
+        self.history_size = int(self.settings.get('HISTORY_MAX_SIZE') or DEFAULT_MAX_SIZE)
+        self._session_ids = itertools.count(1)
+        self.register_commands()
+
+    def session(self, **context):
+        """Open a session with its own history on top of the shared commands.
+
+        Args:
+            **context: Free-form values describing the session, such as the tenant.
+
+        Returns:
+            Session: The new session.
+        """
+        return Session(next(self._session_ids), self.command_handler, self.history_size, context)
+
+    def create_result_cache(self):
+        """Create the result cache when RESULT_CACHE_SIZE enables it."""
+        maxsize = int(self.settings.get('RESULT_CACHE_SIZE') or 0)
+        if maxsize <= 0:
+            return None
+        ttl = self.settings.get('RESULT_CACHE_TTL')
+        return ResultCache(maxsize, float(ttl) if ttl else None)
+
+    def create_metrics(self):
+        """Create the command metrics registry unless METRICS turns it off."""
+        if self.settings.get('METRICS', 'on').lower() in ('0', 'off', 'false', 'no'):
+            return None
+        return Metrics()
+
+    def create_numeric_backend(self):
+        """Create the numeric backend named by NUMERIC_BACKEND (float, decimal or fraction).
+
+        Without it, the arithmetic commands keep their built-in number types.
+        """
+        name = self.settings.get('NUMERIC_BACKEND')
+        if not name:
+            return None
+        return create_backend(
+            name,
+            precision=self.settings.get('DECIMAL_PRECISION'),
+            rounding=self.settings.get('DECIMAL_ROUNDING'),
+        )
+
+    def configure_logging(self):
+        """Configure logging for the application from a config file.
+
+        The configured handlers are then moved behind a queue, so that log
+        calls on the command path never wait for file or console output.
+        """
+        logging_conf_path = 'logging.conf'  # Path to your logging config file
+        root = logging.getLogger()
+        existing = set(root.handlers)
+        stop_queue_logging(root)
+
+        if os.path.exists(logging_conf_path):
+            logging.config.fileConfig(logging_conf_path, disable_existing_loggers=False)
+            logging.info("Logging configured from file: %s", logging_conf_path)
+        else:
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.FileHandler('logs/app.log'),  # Fallback if config file does not exist
+                    logging.StreamHandler()
+                ]
+            )
+            logging.info("Default logging configuration applied.")
+        self.log_writer = install_queue_logging([handler for handler in root.handlers if handler not in existing])
+
+    def load_environment_variables(self):
+        """Load environment variables into the application's settings."""
+        settings = dict(os.environ)  # This method is no longer needed since it's already done in __init__
+        logging.info("Environment variables loaded.")
+        return settings
+
+    def get_environment_variable(self, key):
+        """Get a specific environment variable from the settings."""
+        return self.settings.get(key)
+
+    def register_commands(self):
+        """Register every plugin found in app/pluggin, importing each one on first use."""
+        self.plugin_registry = PluginRegistry(
+            self.command_handler, self, interval=float(self.settings.get('PLUGIN_RELOAD_INTERVAL') or 1.0),
+        )
+        self.plugin_registry.register_all()
+
+    def start_plugin_reload(self):
+        """Reload the plugins changed under app/pluggin while running, when PLUGIN_RELOAD is on."""
+        if self.settings.get('PLUGIN_RELOAD', 'off').lower() in ('1', 'on', 'true', 'yes'):
+            self.plugin_registry.start()
+            logging.info("Watching app/pluggin for changed plugins.")
+
+    def close(self):
+        """Stop reloading plugins, dump the metrics and flush the log before the process exits."""
+        self.plugin_registry.stop()
+        metrics_file = self.settings.get('METRICS_FILE')
+        if metrics_file and self.command_handler.metrics is not None:
+            self.command_handler.metrics.dump(metrics_file)
+        logging.info("Application shutdown.")
+        if self.log_writer is not None:
+            # Everything logged so far is written before the application exits
+            self.log_writer.flush()
@@ -0,0 +1,143 @@
+"""
+This module contains an asyncio network front-end for the calculator.
+
+Clients connect over TCP or a Unix socket and speak a line protocol: one
+command per line, one result per line (newlines inside a multi-line result,
+such as the history table, are escaped as ``\\n``). Commands are dispatched through the
+application's CommandHandler, while every connection is a Session with its own
+history. Sessions never read or write the server's files, and commands (as
+well as the history appended when a session ends) run on the event loop's
+worker threads.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+from app.session import Session
+
+TOO_MANY_CONNECTIONS = "Error: Too many connections, try again later."
+
+
+class CalculatorServer:
+    """Line-protocol server running calculator sessions concurrently.
+
+    Responses are written with ``drain()`` before the next line is read, so a
+    client that stops reading is throttled by the transport buffers instead of
+    growing the server's memory. Connections beyond ``max_connections`` get an
+    error line and are closed. Stopping the server closes every connection and
+    appends each session's history to ``history_file``.
+    """
+
+    def __init__(self, command_handler, host="127.0.0.1", port=8888, path=None,
+                 max_connections=100, history_size=10, history_file="history.csv"):
+        """Initialize the server.
+
+        Args:
+            command_handler (CommandHandler): Shared handler executing the commands.
+            host (str): Interface to listen on for TCP connections.
+            port (int): TCP port to listen on (0 picks a free port).
+            path (str): Unix socket path; when given it is used instead of TCP.
+            max_connections (int): Maximum number of concurrent clients.
+            history_size (int): Capacity of each session's history.
+            history_file (str): CSV file the session histories are appended to.
+        """
+        self.command_handler = command_handler
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_connections = max_connections
+        self.history_size = history_size
+        self.history_file = history_file
+        self.sessions = {}
+        self._server = None
+        self._tasks = set()
+        self._ids = itertools.count(1)
+        self._persist_lock = threading.Lock()
+
+    @property
+    def address(self):
+        """Address the server is listening on."""
+        if self._server is None:
+            return None
+        return self._server.sockets[0].getsockname()
+
+    async def start(self):
+        """Start listening for connections."""
+        if self.path:
+            self._server = await asyncio.start_unix_server(self.handle_client, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        logging.info("Server listening on %s", self.address)
+
+    async def serve_forever(self):
+        """Serve clients until the server is stopped."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def stop(self):
+        """Stop accepting clients, close every connection and persist the histories."""
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+        logging.info("Server stopped.")
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection until the client disconnects or sends exit."""
+        if len(self.sessions) >= self.max_connections:
+            logging.warning("Connection refused: %d clients connected.", len(self.sessions))
+            writer.write(f"{TOO_MANY_CONNECTIONS}\n".encode())
+            await self._close(writer)
+            return
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        session = Session(next(self._ids), self.command_handler, self.history_size)
+        self.sessions[session.session_id] = session
+        logging.info("Session %d opened.", session.session_id)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                cmd_input = line.decode(errors="replace").strip()
+                if cmd_input.lower() == "exit":
+                    break
+                # Commands run on worker threads, so a slow one never blocks the other clients
+                response = await loop.run_in_executor(None, session.process_command, cmd_input)
+                writer.write(response.replace("\n", "\\n").encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError, ValueError) as e:
+            logging.info("Session %d interrupted: %s", session.session_id, e or type(e).__name__)
+        finally:
+            del self.sessions[session.session_id]
+            self._tasks.discard(task)
+            await loop.run_in_executor(None, self.persist, session)
+            await self._close(writer)
+            logging.info("Session %d closed.", session.session_id)
+
+    def persist(self, session):
+        """Append a session's history to the history file, one session at a time."""
+        if self.history_file and session.history_command.history:
+            with self._persist_lock:
+                session.history_command.append_history(self.history_file)
+
+    @staticmethod
+    async def _close(writer):
+        """Close a connection, ignoring clients that already went away."""
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
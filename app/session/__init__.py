@@ -0,0 +1,105 @@
+"""
+This module contains the Session class, the per-user state of the calculator.
+
+A session only holds what differs between users: its own history and a
+context of free-form values (such as the tenant or the user name). The
+commands, settings and logging it relies on are shared by every session of
+the process (see ``app.runtime``), so opening a session costs little more
+than allocating its history buffer.
+
+Sessions serve users who have no access to the machine, such as network
+clients, so they never touch its files: ``@file`` operands and commands
+reading or writing files are rejected, and the history only offers
+``show``, ``search`` and ``clear``. Nor do they change what the sessions
+share: resetting the metrics, clearing the result cache and profiling are
+rejected too, as is the ``workers=N`` option, which would fork worker
+processes from the server's threads.
+"""
+
+import logging
+from app.history import DEFAULT_MAX_SIZE, HistoryBuffer
+from app.operands import has_sources
+from app.pipeline import PIPE, is_pipeline, run_pipeline
+from app.pluggin.history import HistoryCommand
+from app.reduction import WORKERS_OPTION
+
+HISTORY_ACTIONS = ("show", "search", "clear")
+HISTORY_ERROR = "Error: Sessions only support history show, search and clear."
+SOURCE_ERROR = "Error: @file operands are not available in a session."
+FILE_ERROR = "Error: {0} cannot read or write files in a session."
+# Actions changing the metrics, cache or profiler every session shares
+SHARED_ACTIONS = {"stats": ("reset", "profile"), "cache": ("clear",)}
+SHARED_ERROR = "Error: {0} {1} is not available in a session."
+WORKERS_ERROR = "Error: workers= is not available in a session."
+
+
+class Session:
+    """Per-session state: a private history and context on top of a shared command handler."""
+
+    __slots__ = ("session_id", "command_handler", "history_command", "context")
+
+    def __init__(self, session_id, command_handler, history_size=DEFAULT_MAX_SIZE, context=None):
+        """Initialize the session.
+
+        Args:
+            session_id (int): Identifier of the session, used in log messages.
+            command_handler (CommandHandler): Shared handler executing the commands.
+            history_size (int): Capacity of the session's history.
+            context (dict): Free-form values describing the session.
+        """
+        self.session_id = session_id
+        self.command_handler = command_handler
+        self.history_command = HistoryCommand(HistoryBuffer(history_size))
+        self.context = {} if context is None else context
+
+    @property
+    def history(self):
+        """The session's HistoryBuffer."""
+        return self.history_command.history
+
+    def process_command(self, cmd_input):
+        """Execute one command line and return the response line for it."""
+        parts = cmd_input.split()
+        if not parts:
+            return ""
+        command, args = parts[0], parts[1:]
+
+        try:
+            if command == "history":
+                if args and args[0].lower() not in HISTORY_ACTIONS:
+                    return HISTORY_ERROR
+                return self.history_command.execute(*args)
+            rejection = self.check(cmd_input)
+            if rejection is not None:
+                logging.warning("Session %s rejected: %s", self.session_id, cmd_input)
+                return rejection
+            if is_pipeline(cmd_input):
+                result = run_pipeline(self.command_handler, cmd_input)
+            elif command not in self.command_handler.commands:
+                logging.error("Unknown command: %s", command)
+                return f"No such command: {command}"
+            else:
+                result = self.command_handler.execute_command(command, *args)
+            self.history_command.add_to_history(cmd_input)
+            return result
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.error("Error executing command: %s", e)
+            return f"Error: {e}"
+
+    def check(self, cmd_input):
+        """Return the error message of a line touching the server's files, or None if it may run."""
+        for stage in cmd_input.split(PIPE):
+            tokens = stage.split()
+            if not tokens:
+                continue
+            name, args = tokens[0], tokens[1:]
+            if has_sources(args):
+                return SOURCE_ERROR
+            if any(arg.lower().startswith(WORKERS_OPTION) for arg in args):
+                return WORKERS_ERROR
+            if args and args[0].lower() in SHARED_ACTIONS.get(name, ()):
+                return SHARED_ERROR.format(name, args[0].lower())
+            command = self.command_handler.commands.get(name)
+            if command is not None and command.accesses_files(*args):
+                return FILE_ERROR.format(name)
+        return None
@@ -0,0 +1,355 @@
+"""
+This module contains the single-pass statistics engine: accumulators that
+summarize arbitrarily large streams of numbers in bounded memory, and the
+StatisticsCommand base class of the statistics plugins built on it.
+"""
+
+import math
+import numpy as np
+from app.command import Command, CommandResult, ErrorMessage
+from app.operands import OperandSourceError, is_source, iter_operand_chunks
+
+STDIN_SOURCE = "@-"
+WORKERS_OPTION = "workers"  # Option summarizing the @file sources in worker processes
+
+
+class NeumaierSum:
+    """Compensated (Kahan-Babuska-Neumaier) running sum of floats."""
+
+    __slots__ = ("total", "compensation")
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value):
+        """Add one float, keeping track of the rounding error."""
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    @property
+    def value(self):
+        """The compensated sum."""
+        return self.total + self.compensation
+
+
+class RunningMean:
+    """Streaming count, mean, minimum and maximum.
+
+    Each chunk is summed with NumPy's pairwise summation and the chunk sums
+    are combined with compensated summation, so the error stays small no
+    matter how many values are streamed.
+    """
+
+    __slots__ = ("count", "_sum", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self._sum = NeumaierSum()
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, values):
+        """Add a chunk (array or iterable) of numbers."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        with np.errstate(over="ignore", invalid="ignore"):  # An overflowing sum is inf, as with Python floats
+            self._sum.add(float(values.sum()))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    def merge(self, other):
+        """Combine the values summarized by another RunningMean into this one."""
+        self.count += other.count
+        self._sum.add(other._sum.total)
+        self._sum.add(other._sum.compensation)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def total(self):
+        """Sum of every value seen."""
+        return self._sum.value
+
+    @property
+    def mean(self):
+        """Mean of every value seen, or NaN when no value was seen."""
+        return self.total / self.count if self.count else math.nan
+
+
+class Moments(RunningMean):
+    """Streaming mean and variance using Welford's method.
+
+    Chunks are folded in with Chan's pairwise update, which is Welford's
+    recurrence applied to a whole NumPy chunk at once; two Moments merge
+    the same way, so partial results from several chunks or processes can
+    be combined exactly.
+    """
+
+    __slots__ = ("_mean", "_m2")
+
+    def __init__(self):
+        super().__init__()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, values):
+        """Add a chunk (array or iterable) of numbers."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        with np.errstate(over="ignore", invalid="ignore"):  # Overflows give an inf or nan variance instead
+            chunk_mean = float(values.mean())
+            chunk_m2 = float(np.square(values - chunk_mean).sum())
+        self._combine(int(values.size), chunk_mean, chunk_m2)
+        super().update(values)
+
+    def merge(self, other):
+        """Combine the values summarized by another Moments into this one."""
+        self._combine(other.count, other._mean, other._m2)
+        return super().merge(other)
+
+    def _combine(self, count, mean, m2):
+        """Chan et al. update of the running mean and sum of squared deviations."""
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self._mean
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self._mean += delta * count / total
+
+    def variance(self, ddof=1):
+        """Variance of the values (sample variance by default), NaN if undefined."""
+        return self._m2 / (self.count - ddof) if self.count > ddof else math.nan
+
+    def stddev(self, ddof=1):
+        """Standard deviation of the values, NaN if undefined."""
+        return math.sqrt(self.variance(ddof))
+
+
+class QuantileSketch:
+    """Mergeable KLL quantile sketch.
+
+    Values are kept in levels of compactors; an item at level ``h`` stands
+    for ``2**h`` original values. When a level grows beyond its capacity it
+    is sorted and every other item is promoted to the next level, so the
+    memory used is O(k log(n/k)) and the rank error is about 1/k. While no
+    compaction has happened the sketch still holds every value and its
+    quantiles are exact.
+    """
+
+    __slots__ = ("k", "count", "levels", "_rng")
+
+    def __init__(self, k=256, seed=None):
+        """Initialize the sketch.
+
+        Args:
+            k (int): Accuracy parameter: the capacity of the top level.
+            seed (int): Seed of the random compaction offsets, for reproducible results.
+        """
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self):
+        """Whether every value is still stored, i.e. no compaction happened yet."""
+        return len(self.levels) == 1
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(8, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        """Add a chunk (array or iterable) of numbers."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.count += int(values.size)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Combine another sketch into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays at this level so that weights are preserved
+                keep = items[:1] if items.size % 2 else items[:0]
+                paired = items[keep.size:]
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, fractions):
+        """Return the estimated value at each fraction (0..1) of the distribution."""
+        if not self.count:
+            return [math.nan for _ in fractions]
+        if self.exact:
+            return [float(value) for value in np.quantile(self.levels[0], fractions)]
+        items, weights = self._weighted_items()
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        indexes = np.searchsorted(cumulative, np.asarray(fractions) * total, side="left")
+        return [float(items[min(index, items.size - 1)]) for index in indexes]
+
+    def histogram(self, bins, lower, upper):
+        """Estimate the number of values in ``bins`` equal-width bins over [lower, upper]."""
+        if self.exact:
+            counts, edges = np.histogram(self.levels[0], bins=bins, range=(lower, upper))
+        else:
+            items, weights = self._weighted_items()
+            counts, edges = np.histogram(items, bins=bins, range=(lower, upper), weights=weights)
+        return counts.round().astype(int).tolist(), edges.tolist()
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+
+class StreamSummary:
+    """Single-pass summary shared by the statistics commands: moments plus quantiles."""
+
+    __slots__ = ("moments", "sketch")
+
+    def __init__(self, quantiles=True, k=256, seed=None):
+        self.moments = Moments()
+        self.sketch = QuantileSketch(k, seed) if quantiles else None
+
+    @property
+    def count(self):
+        """Number of values summarized."""
+        return self.moments.count
+
+    def update(self, values):
+        """Add a chunk of numbers."""
+        values = np.asarray(values, dtype=np.float64)
+        self.moments.update(values)
+        if self.sketch is not None:
+            self.sketch.update(values)
+
+    def merge(self, other):
+        """Combine another summary, for example one computed by a worker process."""
+        self.moments.merge(other.moments)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        return self
+
+
+def summarize(args, quantiles=True, seed=None):
+    """Summarize literal numbers and ``@file`` sources in a single pass.
+
+    Raises:
+        OperandSourceError: If a source is missing or holds an invalid or non-finite number.
+    """
+    summary = StreamSummary(quantiles, seed=seed)
+    for chunk in iter_operand_chunks(args):
+        finite = np.isfinite(chunk)
+        if not finite.all():
+            raise OperandSourceError(f"Statistics need finite numbers, not {chunk[~finite][0]}.")
+        summary.update(chunk)
+    return summary
+
+
+def summarize_parallel(args, quantiles=True, workers=None):
+    """Summarize each ``@file`` source in a worker process and merge the results.
+
+    Literal numbers and ``@-`` (stdin, which worker processes cannot read)
+    are summarized in this process.
+
+    Raises:
+        OperandSourceError: If a source is missing or holds an invalid or non-finite number.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    from functools import partial  # pylint: disable=import-outside-toplevel
+
+    files = [arg for arg in args if is_source(arg) and arg != STDIN_SOURCE]
+    summary = summarize([arg for arg in args if not is_source(arg) or arg == STDIN_SOURCE], quantiles)
+    if files:
+        with ProcessPoolExecutor(workers) as pool:
+            for partial_summary in pool.map(partial(summarize, quantiles=quantiles), [[arg] for arg in files]):
+                summary.merge(partial_summary)
+    return summary
+
+
+class StatisticsCommand(Command):
+    """Base class of the statistics plugins.
+
+    Operands are literal numbers or ``@file`` sources, summarized in one
+    pass by a StreamSummary. Subclasses set ``min_count`` and
+    ``count_error``, and implement ``report``, which returns the statistic
+    as the value of a CommandResult. Leading ``name=value``
+    arguments are passed to ``report`` as options, when their name is one
+    of ``option_names``; ``workers=N`` summarizes the ``@file`` sources in
+    N worker processes.
+    """
+
+    pure = True
+    needs_quantiles = False
+    min_count = 1
+    count_error = "Please provide at least one number."
+    option_names = ()
+
+    def is_cacheable(self, *args):
+        """Results read from files are never cached, since the files may change."""
+        return not any(is_source(arg) for arg in args)
+
+    def execute(self, *args):
+        return self.evaluate(*args).message
+
+    def evaluate(self, *args):
+        """Return the statistic with its value, formatting the message only when it is read."""
+        options = {}
+        operands = list(args)
+        while operands and isinstance(operands[0], str) and "=" in operands[0]:
+            name, _, value = operands.pop(0).partition("=")
+            options[name] = value
+        unknown = [name for name in options if name not in self.option_names and name != WORKERS_OPTION]
+        if unknown:
+            available = ", ".join(self.option_names + (WORKERS_OPTION,))
+            return CommandResult(message=ErrorMessage(
+                f"Error: Unknown option '{unknown[0]}'. Available options: {available}."
+            ))
+        workers = options.pop(WORKERS_OPTION, None)
+        if workers is not None:
+            workers = int(workers) if workers.isdigit() else 0
+            if workers < 1:
+                return CommandResult(message=ErrorMessage("Error: workers expects a positive integer."))
+        if not operands:
+            return CommandResult(message=ErrorMessage(self.count_error))
+        try:
+            if workers is None:
+                summary = summarize(operands, self.needs_quantiles)
+            else:
+                summary = summarize_parallel(operands, self.needs_quantiles, workers)
+        except OperandSourceError as e:
+            return CommandResult(message=ErrorMessage(f"Error: {e}"))
+        if summary.count < self.min_count:
+            return CommandResult(message=ErrorMessage(self.count_error))
+        return self.report(summary, **options)
+
+    def report(self, summary, **options):
+        """Return the CommandResult of a summary: the statistic as its value and the message."""
+        raise NotImplementedError
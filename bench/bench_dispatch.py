@@ -0,0 +1,156 @@
+"""
+Benchmarks of command dispatch, from CommandHandler.execute_command to a
+full REPL line through App.handle_command_input, and of opening sessions.
+"""
+
+import contextlib
+import io
+import itertools
+import os
+import tempfile
+from harness import batch, benchmark
+from bench_plugins import operand_mix
+from app import App
+from app.command import CommandHandler
+from app.metrics import Metrics
+from app.pluggin.add import AddCommand
+
+_APP = None
+
+
+def get_app():
+    """Create one App in a scratch directory, shared by the dispatch benchmarks."""
+    global _APP  # pylint: disable=global-statement
+    if _APP is None:
+        os.chdir(tempfile.mkdtemp(prefix="calc-bench-"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            _APP = App()
+    return _APP
+
+
+def command_lines(size=1000, seed=3):
+    """Return REPL lines mixing every arithmetic command."""
+    names = itertools.cycle(["add", "subtract", "multiply", "divide"])
+    return [f"{next(names)} {a} {b}" for a, b in operand_mix(size, 2, seed)]
+
+
+@benchmark("dispatch")
+def direct_execute():
+    """Baseline: call a plugin's execute directly."""
+    execute = AddCommand().execute
+    return lambda: execute("12.5", "7")
+
+
+@benchmark("dispatch", [{"metrics": False}, {"metrics": True}])
+def handler_execute_command(metrics):
+    """Time CommandHandler.execute_command to measure the lookup and instrumentation overhead."""
+    handler = CommandHandler(metrics=Metrics() if metrics else None)
+    handler.register_command("add", AddCommand())
+    return lambda: handler.execute_command("add", "12.5", "7")
+
+
+@benchmark("dispatch")
+def app_process_command():
+    """Time App.process_command: parsing, dispatch and history."""
+    app = get_app()
+    lines = itertools.cycle(command_lines())
+    return lambda: app.process_command(next(lines))
+
+
+@benchmark("dispatch")
+def app_handle_command_input():
+    """Time App.handle_command_input end to end, including printing."""
+    app = get_app()
+    lines = itertools.cycle(command_lines())
+    sink = io.StringIO()
+
+    def run():
+        with contextlib.redirect_stdout(sink):
+            app.handle_command_input(next(lines))
+        sink.seek(0)
+        sink.truncate()
+    return run
+
+
+@benchmark("dispatch", [{"first_command": False}, {"first_command": True}])
+def session_open(first_command):
+    """Time opening a session on the shared runtime, optionally with its first command.
+
+    Compare with bench/startup.py, which times building a whole App.
+    """
+    app = get_app()
+    if not first_command:
+        return app.session
+    return lambda: app.session().process_command("add 2 3")
+
+
+@benchmark("dispatch", [{"mode": None}, {"mode": "decimal"}, {"mode": "float"}])
+def app_process_chunk(mode):
+    """Time a batch chunk of 1000 lines, with and without the bulk engine."""
+    app = get_app()
+    engine = None
+    if mode:
+        from app.bulk import BulkEngine  # pylint: disable=import-outside-toplevel
+        engine = BulkEngine(mode)
+    lines = command_lines()
+    return batch(lambda: app.process_chunk(lines, engine), len(lines))
+
+
+@benchmark("dispatch", [{"output_mode": mode} for mode in ("text", "value", "jsonl", "csv")])
+def app_batch_output(output_mode):
+    """Time a batch chunk of 1000 lines rendered in each output mode, from execution to the rendered text."""
+    from app.render import create_renderer  # pylint: disable=import-outside-toplevel
+    app = get_app()
+    renderer = create_renderer(output_mode)
+    lines = command_lines()
+    return batch(lambda: renderer.render(lines, app.process_chunk(lines, evaluate=renderer.needs_values)), len(lines))
+
+
+@benchmark("dispatch", [{"output_mode": mode} for mode in ("text", "jsonl")])
+def render_results(output_mode):
+    """Time rendering 1000 computed results, where text formats every message and JSONL only reads the values."""
+    from app.render import create_renderer  # pylint: disable=import-outside-toplevel
+    app = get_app()
+    renderer = create_renderer(output_mode)
+    lines = command_lines()
+    calls = [(line.split()[0], line.split()[1:]) for line in lines]
+
+    def run():
+        results = [app.command_handler.evaluate_command(name, *args) for name, args in calls]
+        return renderer.render(lines, results)
+    return batch(run, len(lines))
+
+
+@benchmark("dispatch", [{"source": "records"}, {"source": "file"}])
+def app_process_records(source):
+    """Time a chunk of 1000 pre-compiled records, reused or read back from a record file."""
+    from app.compiler import CommandCompiler  # pylint: disable=import-outside-toplevel
+    app = get_app()
+    compiler = CommandCompiler(app.command_handler)
+    records = [compiler.compile(line) for line in command_lines()]
+    if source == "records":
+        return batch(lambda: app.process_records(records, compiler), len(records))
+
+    data = io.BytesIO()
+    compiler.write_records(records, data)
+
+    def run():
+        data.seek(0)
+        app.process_records(list(compiler.read_records(data)), compiler)
+    return batch(run, len(records))
+
+
+@benchmark("dispatch", [{"pipelined": True}, {"pipelined": False}])
+def app_process_pipeline(pipelined):
+    """Time add, multiply and divide chained on one line, or as three lines each
+    re-parsing the number from the previous result message."""
+    app = get_app()
+    pairs = itertools.cycle(operand_mix(1000, 2, seed=5))
+    if pipelined:
+        return lambda: app.process_command("add {0} {1} | multiply _ 4 | divide _ 7".format(*next(pairs)))
+
+    def run():
+        output = app.process_command("add {0} {1}".format(*next(pairs)))
+        output = app.process_command(f"multiply {output.rsplit(' ', 1)[-1].rstrip('.')} 4")
+        app.process_command(f"divide {output.rsplit(' ', 1)[-1].rstrip('.')} 7")
+    return run
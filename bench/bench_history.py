@@ -0,0 +1,127 @@
+"""
+Benchmarks of the history store: appends at growing sizes, CSV
+save/load from 10^3 to 10^6 rows, reads from the SQLite history database and
+the shared memory history.
+"""
+
+import atexit
+import itertools
+import os
+import tempfile
+from harness import batch, benchmark
+from app.history import HistoryBuffer, read_history_csv
+from app.history.shared import SharedHistory
+from app.history.store import HistoryStore
+from app.pluggin.history import HistoryCommand
+
+SIZES = [
+    {"rows": 1_000}, {"rows": 10_000}, {"rows": 100_000, "slow": True}, {"rows": 1_000_000, "slow": True},
+]
+_SCRATCH = tempfile.mkdtemp(prefix="calc-bench-history-")
+
+
+def history_db(rows):
+    """Return the path of a history database with ``rows`` entries, writing it once."""
+    path = os.path.join(_SCRATCH, f"history-{rows}.db")
+    if not os.path.exists(path):
+        store = HistoryStore(path, flush_every=100_000)
+        for i in range(rows):
+            store.append(f"add {i} {i + 1}", f"The result of {i} and {i + 1} is equal to {2 * i + 1}.", 1e-5)
+        store.close()
+    return path
+
+
+def filled_command(rows):
+    """Return a HistoryCommand whose buffer holds ``rows`` commands."""
+    history_command = HistoryCommand(HistoryBuffer(rows))
+    history_command.history.extend(f"add {i} {i + 1}" for i in range(rows))
+    return history_command
+
+
+def history_file(rows):
+    """Return the path of a history CSV with ``rows`` commands, writing it once."""
+    path = os.path.join(_SCRATCH, f"history-{rows}.csv")
+    if not os.path.exists(path):
+        filled_command(rows).save_history(path)
+    return path
+
+
+@benchmark("history", SIZES)
+def add_to_history(rows):
+    """Time one append to a full history of ``rows`` commands."""
+    history_command = filled_command(rows)
+    counter = itertools.count()
+    return lambda: history_command.add_to_history(f"add {next(counter)} 1")
+
+
+@benchmark("history", SIZES)
+def save_history(rows):
+    """Time saving ``rows`` commands to CSV."""
+    history_command = filled_command(rows)
+    path = os.path.join(_SCRATCH, f"save-{rows}.csv")
+    return batch(lambda: history_command.save_history(path), rows)
+
+
+@benchmark("history", SIZES)
+def load_history(rows):
+    """Time loading a file of ``rows`` commands into the default 10-entry history."""
+    path = history_file(rows)
+    history_command = HistoryCommand()
+    return lambda: history_command.load_history(path)
+
+
+@benchmark("history", SIZES)
+def read_full_history(rows):
+    """Time parsing every row of a history CSV."""
+    path = history_file(rows)
+    return batch(lambda: read_history_csv(path), rows)
+
+
+@benchmark("history", SIZES)
+def store_last(rows):
+    """Time opening a history database of ``rows`` entries and reading the last 10."""
+    path = history_db(rows)
+
+    def run():
+        store = HistoryStore(path)
+        store.last(10)
+        store.close()
+    return run
+
+
+@benchmark("history", SIZES)
+def store_search(rows):
+    """Time a prefix search for the last 10 matches among ``rows`` entries."""
+    store = HistoryStore(history_db(rows))
+    return lambda: store.search("add 99", 10)
+
+
+def shared_history(label):
+    """Create a shared memory history that is removed, with its lock files, when the run ends."""
+    name = f"calc-bench-{label}-{os.getpid()}"
+    history = SharedHistory(name, capacity=4096)
+
+    def remove():
+        history.unlink()
+        history.close()
+        for suffix in (".lock", ".flush.lock"):
+            os.remove(os.path.join(tempfile.gettempdir(), name + suffix))
+    atexit.register(remove)
+    return history
+
+
+@benchmark("history")
+def shared_append():
+    """Time appending one entry to the shared memory history, lock included."""
+    history = shared_history("append")
+    counter = itertools.count()
+    return lambda: history.append(f"add {next(counter)} 1", "The result of adding 1 and 1 is equal to 2.", 0.001)
+
+
+@benchmark("history")
+def shared_read():
+    """Time reading the last 1,000 entries of the shared memory history without locking."""
+    history = shared_history("read")
+    for i in range(4096):
+        history.append(f"add {i} 1", "The result of adding 1 and 1 is equal to 2.", 0.001)
+    return batch(lambda: history.last(1000), 1000)
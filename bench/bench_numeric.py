@@ -0,0 +1,128 @@
+"""
+Benchmarks comparing the numeric backends on the same workload: throughput
+of the arithmetic plugins and the largest relative error of their results
+against exact rational arithmetic.
+"""
+
+import operator
+import random
+from fractions import Fraction
+from harness import accuracy, batch, benchmark
+from app.numeric import create_backend
+from app.pluggin.add import AddCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.mean import MeanCommand
+from app.pluggin.multiply import MultiplyCommand
+from app.pluggin.subtract import SubtractCommand
+
+BACKENDS = [
+    {"backend": "float"}, {"backend": "decimal"}, {"backend": "decimal", "precision": 50},
+    {"backend": "fraction"},
+]
+COMMANDS = (AddCommand, SubtractCommand, MultiplyCommand, DivideCommand)
+STEPS = 1000  # Operations chained by the accumulation workload
+
+
+def operands(size, seed=7):
+    """Return ``size`` operand pairs of decimals and scientific numbers, without zeros."""
+    rng = random.Random(seed)
+
+    def operand():
+        if rng.random() < 0.8:
+            return f"{rng.uniform(-1000, 1000):.{rng.randint(1, 6)}f}"
+        return f"{rng.uniform(1, 9):.3f}e{rng.randint(-8, 8)}"
+    return [(operand(), operand()) for _ in range(size)]
+
+
+def relative_error(value, exact):
+    """Return the relative error of a backend number against an exact Fraction."""
+    return float(abs(Fraction(value) - exact) / abs(exact)) if exact else float(abs(Fraction(value)))
+
+
+@benchmark("numeric", BACKENDS)
+def binary_workload(backend, precision=None):
+    """Time 1000 add/subtract/multiply/divide executions, messages included."""
+    backend = create_backend(backend, precision)
+    commands = [command(backend) for command in COMMANDS]
+    cases = [(commands[i % len(commands)], pair) for i, pair in enumerate(operands(1000))]
+
+    error = 0.0
+    for command, (a, b) in cases:
+        exact = command.operation(Fraction(a), Fraction(b))
+        error = max(error, relative_error(command.compute(backend.parse(a), backend.parse(b)), exact))
+
+    def run():
+        for command, pair in cases:
+            command.execute(*pair)
+    return accuracy(batch(run, len(cases)), error)
+
+
+@benchmark("numeric", BACKENDS)
+def accumulate(backend, precision=None):
+    """Time a running total of 1000 chained operations, where rounding errors add up."""
+    backend = create_backend(backend, precision)
+    operations = [operator.add, operator.mul, operator.sub, operator.truediv]
+    texts = [(operations[i % len(operations)], a) for i, (a, _) in enumerate(operands(STEPS))]
+    steps = [(backend.apply(operation), backend.parse(a)) for operation, a in texts]
+    exact_steps = [(operation, Fraction(a)) for operation, a in texts]
+    start = backend.parse("1")
+
+    def run():
+        total = start
+        for operation, value in steps:
+            total = operation(total, value)
+        return total
+
+    exact = Fraction(1)
+    for operation, value in exact_steps:
+        exact = operation(exact, value)
+    return accuracy(batch(run, STEPS), relative_error(run(), exact))
+
+
+@benchmark("numeric", BACKENDS)
+def mean_workload(backend, precision=None):
+    """Time mean over 10 operands."""
+    backend = create_backend(backend, precision)
+    execute = MeanCommand(backend).execute
+    cases = [tuple(a for pair in operands(5, seed) for a in pair) for seed in range(100)]
+    error = max(
+        relative_error(backend.mean([backend.parse(a) for a in case]), sum(map(Fraction, case)) / len(case))
+        for case in cases
+    )
+
+    def run():
+        for case in cases:
+            execute(*case)
+    return accuracy(batch(run, len(cases)), error)
+
+
+@benchmark("numeric", [
+    dict(params, mode=mode, operation=operation)
+    for params in BACKENDS for operation in ("add", "multiply") for mode in ("chain", "n-ary")
+])
+def reduce_workload(backend, mode, operation, precision=None):
+    """Time reducing 10,000 operands with one n-ary command, or as a chain of two-operand operations."""
+    backend = create_backend(backend, precision)
+    command = (AddCommand if operation == "add" else MultiplyCommand)(backend)
+    if operation == "add":
+        texts = [a for pair in operands(5000) for a in pair]
+    else:
+        # Factors close to 1, so that the product stays in range
+        rng = random.Random(7)
+        texts = [f"{1 + rng.uniform(-0.01, 0.01):.6f}" for _ in range(10000)]
+    exact = Fraction(0) if operation == "add" else Fraction(1)
+    for text in texts:
+        exact = command.operation(exact, Fraction(text))
+
+    if mode == "n-ary":
+        def run():
+            return command.evaluate(*texts).value
+    else:
+        compute, parse = command.compute, backend.parse
+
+        def run():
+            total = parse(texts[0])
+            for text in texts[1:]:
+                total = compute(total, parse(text))
+            return total
+    return accuracy(batch(run, len(texts)), relative_error(run(), exact))
@@ -0,0 +1,103 @@
+"""
+Benchmarks of each plugin's ``execute`` on realistic operand mixes.
+"""
+
+import itertools
+import random
+from harness import batch, benchmark
+from app.pluggin.add import AddCommand
+from app.pluggin.subtract import SubtractCommand
+from app.pluggin.multiply import MultiplyCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.mean import MeanCommand
+
+BINARY_COMMANDS = {
+    "add": AddCommand, "subtract": SubtractCommand,
+    "multiply": MultiplyCommand, "divide": DivideCommand,
+}
+
+
+def operand(rng):
+    """Return an operand string: mostly integers and decimals, some scientific,
+    zero and invalid values."""
+    kind = rng.random()
+    if kind < 0.40:
+        return str(rng.randint(-10_000, 10_000))
+    if kind < 0.80:
+        return f"{rng.uniform(-1000, 1000):.{rng.randint(1, 6)}f}"
+    if kind < 0.90:
+        return f"{rng.uniform(1, 9):.3f}e{rng.randint(-8, 8)}"
+    if kind < 0.95:
+        return "0"
+    return rng.choice(["abc", "1.2.3", "--4"])
+
+
+def operand_mix(size, arity, seed=1):
+    """Return ``size`` argument tuples with ``arity`` operands each."""
+    rng = random.Random(seed)
+    return [tuple(operand(rng) for _ in range(arity)) for _ in range(size)]
+
+
+@benchmark("plugins", [{"command": name} for name in BINARY_COMMANDS])
+def binary_execute(command):
+    """Time one execute call of a binary arithmetic plugin."""
+    execute = BINARY_COMMANDS[command]().execute
+    cases = itertools.cycle(operand_mix(1000, 2))
+    return lambda: execute(*next(cases))
+
+
+@benchmark("plugins", [{"values": 2}, {"values": 10}, {"values": 100}])
+def mean_execute(values):
+    """Time one execute call of the mean plugin."""
+    execute = MeanCommand().execute
+    rng = random.Random(2)
+    cases = itertools.cycle([
+        tuple(str(rng.uniform(-1000, 1000)) for _ in range(values)) for _ in range(200)
+    ])
+    return lambda: execute(*next(cases))
+
+
+@benchmark("plugins", [{"cached": True}, {"cached": False}])
+def eval_execute(cached):
+    """Time eval of (a+b)*c/d, with the compiled expression cache or parsing every call."""
+    from app.expression import compile_expression  # pylint: disable=import-outside-toplevel
+    from app.pluggin.eval import EvalCommand  # pylint: disable=import-outside-toplevel
+    command = EvalCommand()
+    if not cached:
+        command.compile = compile_expression.__wrapped__
+    cases = itertools.cycle([
+        ("(a+b)*c/d", f"a={a}", f"b={b}", f"c={c}", f"d={d}") for a, b, c, d in operand_mix(1000, 4)
+    ])
+    return lambda: command.execute(*next(cases))
+
+
+@benchmark("plugins", [{"mode": "decimal"}, {"mode": "float"}])
+def eval_columns(mode):
+    """Time a batch of 1000 eval lines sharing one expression, evaluated as columns."""
+    from app.bulk import BulkEngine  # pylint: disable=import-outside-toplevel
+    from app.pluggin.eval import EvalCommand  # pylint: disable=import-outside-toplevel
+    engine, commands = BulkEngine(mode), {"eval": EvalCommand()}
+    rng = random.Random(4)
+    lines = [
+        "eval (a+b)*c/d " + " ".join(f"{name}={rng.uniform(-1000, 1000):.3f}" for name in "abcd")
+        for _ in range(1000)
+    ]
+    return batch(lambda: engine.execute_lines(lines, commands), len(lines))
+
+
+@benchmark("plugins", [{"output": "csv"}, {"output": "npy"}])
+def compute_columns(output):
+    """Time the compute plugin multiplying two columns of a 200,000-row CSV file."""
+    import os  # pylint: disable=import-outside-toplevel
+    import tempfile  # pylint: disable=import-outside-toplevel
+    from app.pluggin.compute import ComputeCommand  # pylint: disable=import-outside-toplevel
+    rows = 200_000
+    directory = tempfile.mkdtemp(prefix="calc-bench-")
+    source = os.path.join(directory, "data.csv")
+    rng = random.Random(5)
+    with open(source, "w", encoding="utf-8") as file:
+        file.write("a,b\n")
+        file.writelines(f"{rng.uniform(-1000, 1000):.3f},{rng.randint(-9, 9)}\n" for _ in range(rows))
+    command = ComputeCommand({"multiply": MultiplyCommand()})
+    target = os.path.join(directory, f"out.{output}")
+    return batch(lambda: command.execute(source, target, "multiply", "a", "b"), rows)
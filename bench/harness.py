@@ -0,0 +1,106 @@
+"""
+Minimal benchmark harness shared by the ``bench_*`` modules.
+
+Benchmarks are registered with the :func:`benchmark` decorator. A benchmark
+function receives its parameters and returns the callable to time, so that
+setup work is excluded from the measurement.
+"""
+
+import gc
+import statistics
+import time
+
+REGISTRY = []
+
+
+def benchmark(group, params=None):
+    """Register a benchmark function.
+
+    Args:
+        group (str): Group name used in reports (for example ``"plugins"``).
+        params (list[dict]): Parameter sets; the benchmark runs once per set.
+    """
+    def decorator(func):
+        REGISTRY.append((group, func, params or [{}]))
+        return func
+    return decorator
+
+
+def batch(func, items):
+    """Mark a timed callable as processing ``items`` items per call."""
+    func.items = items
+    return func
+
+
+def accuracy(func, error):
+    """Attach the maximum relative error of the results a timed callable computes."""
+    func.error = error
+    return func
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """Time a callable, calibrating the number of calls per repeat.
+
+    Returns:
+        dict: Per-call timings in seconds and the resulting operations per second.
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - started) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    best = min(timings)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": best,
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "ops_per_sec": 1 / best if best > 0 else float("inf"),
+    }
+
+
+def run(selected=None, quick=False, repeat=5):
+    """Run the registered benchmarks and yield one result dict per parameter set.
+
+    Args:
+        selected (str): Only run benchmarks whose name contains this text.
+        quick (bool): Skip parameter sets marked ``"slow": True``.
+        repeat (int): Number of timed repeats per benchmark.
+    """
+    for group, func, param_sets in REGISTRY:
+        for params in param_sets:
+            params = dict(params)
+            slow = params.pop("slow", False)
+            if quick and slow:
+                continue
+            label = ",".join(f"{key}={value}" for key, value in params.items())
+            name = f"{group}.{func.__name__}" + (f"[{label}]" if label else "")
+            if selected and selected not in name:
+                continue
+            target = func(**params)
+            result = measure(target, repeat=repeat)
+            # Benchmarks may report how many items one call processes
+            items = getattr(target, "items", 1)
+            result["items_per_sec"] = result["ops_per_sec"] * items
+            if hasattr(target, "error"):
+                result["max_relative_error"] = target.error
+            yield {"name": name, "group": group, "params": params, **result}
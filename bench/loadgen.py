@@ -0,0 +1,76 @@
+"""
+Load generator for the calculator network service.
+
+It opens several concurrent connections, sends request/response command
+lines on each of them and reports the throughput and latency percentiles:
+
+    python main.py --serve 8888 &
+    python bench/loadgen.py --port 8888 --connections 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+COMMANDS = ("add", "subtract", "multiply", "divide")
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at a fraction (0..1) of an already sorted list."""
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_client(host, port, path, requests, latencies):
+    """Send ``requests`` commands on one connection, recording each latency."""
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    for _ in range(requests):
+        line = f"{rng.choice(COMMANDS)} {rng.randint(-1000, 1000)} {rng.randint(1, 1000)}\n"
+        started = time.perf_counter()
+        writer.write(line.encode())
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - started)
+    writer.write(b"exit\n")
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args):
+    """Run every client concurrently and print the summary."""
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(args.host, args.port, args.path, args.requests, latencies)
+        for _ in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s")
+    print(f"  throughput: {len(latencies) / elapsed:,.0f} requests/s")
+    print(f"  latency: mean {statistics.fmean(latencies) * 1000:.3f} ms, "
+          f"p50 {percentile(latencies, 0.50) * 1000:.3f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.3f} ms, "
+          f"max {latencies[-1] * 1000:.3f} ms")
+
+
+def main(argv=None):
+    """Parse the options and run the load generator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--path", help="Unix socket path, used instead of host and port")
+    parser.add_argument("--connections", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per connection")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
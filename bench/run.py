@@ -0,0 +1,99 @@
+"""
+Benchmark runner for the calculator.
+
+    python bench/run.py --quick                       # skip the 10^5 and 10^6 sizes
+    python bench/run.py --output results.json         # save the results as JSON
+    python bench/run.py --compare results.json        # flag regressions against a run
+    python bench/run.py -k history                    # only benchmarks matching a name
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(1, os.path.dirname(BENCH_DIR))
+
+import harness  # noqa: E402  pylint: disable=wrong-import-position
+import bench_plugins  # noqa: E402,F401  pylint: disable=wrong-import-position,unused-import
+import bench_dispatch  # noqa: E402,F401  pylint: disable=wrong-import-position,unused-import
+import bench_history  # noqa: E402,F401  pylint: disable=wrong-import-position,unused-import
+import bench_numeric  # noqa: E402,F401  pylint: disable=wrong-import-position,unused-import
+
+
+def git_revision():
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline and return the names of the regressions."""
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        change = result["min"] / old["min"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(result["name"])
+        print(f"  {result['name']:<55} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmarks, print a table and optionally save or compare JSON."""
+    parser = argparse.ArgumentParser(description="Run the calculator benchmarks.")
+    parser.add_argument("-k", dest="selected", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="skip the slow, large sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown ratio reported as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for result in harness.run(args.selected, args.quick, args.repeat):
+        results.append(result)
+        error = f"  max rel. error {result['max_relative_error']:.1e}" if "max_relative_error" in result else ""
+        print(f"{result['name']:<55} {result['min'] * 1e6:12.2f} us/call "
+              f"{result['items_per_sec']:14,.0f} items/s{error}", flush=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "revision": git_revision(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"Compared with {args.compare} (revision {baseline['meta'].get('revision')}):")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Startup benchmark based on ``python -X importtime``.
+
+It measures how long importing the ``app`` package and constructing an
+``App`` takes in a fresh interpreter, and lists the slowest imports.
+Run it against two checkouts to compare them:
+
+    python bench/startup.py
+    python bench/startup.py --repo /path/to/other/checkout
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SNIPPET = (
+    "import time, sys; sys.path.insert(0, {repo!r}); start = time.perf_counter(); "
+    "import app; app.App(); print(time.perf_counter() - start, file=sys.stderr)"
+)
+
+
+def parse_importtime(stderr):
+    """Return (module, self_us, cumulative_us) tuples from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(repo, workdir):
+    """Start a fresh interpreter that imports the app and builds an App."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET.format(repo=repo)],
+        cwd=workdir, capture_output=True, text=True, check=True,
+    )
+    lines = completed.stderr.strip().splitlines()
+    return float(lines[-1]), parse_importtime(completed.stderr)
+
+
+def main(argv=None):
+    """Run the startup benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repo", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [run_once(os.path.abspath(args.repo), workdir) for _ in range(args.runs)]
+
+    totals = [seconds for seconds, _ in runs]
+    imports = runs[-1][1]
+    app_import = next((cumulative for module, _, cumulative in imports if module == "app"), 0)
+    print(f"Startup of {args.repo} over {args.runs} runs:")
+    print(f"  import app + App(): median {statistics.median(totals) * 1000:.1f} ms, "
+          f"min {min(totals) * 1000:.1f} ms")
+    print(f"  import app (importtime cumulative): {app_import / 1000:.1f} ms")
+    print(f"  modules imported: {len(imports)}")
+    print("  slowest imports (self time):")
+    for module, self_us, cumulative_us in sorted(imports, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"    {module:<40} self {self_us / 1000:7.1f} ms  cumulative {cumulative_us / 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,115 @@
 This module serves as the entry point for the application.
 """
 
+import argparse
+import contextlib
+import sys
 from app import App
+from app.render import OUTPUT_MODES, TEXT_MODE
+
+
+def positive_int(value):
+    """Convert an option value to an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'")
+    return number
+
+
+def parse_args(argv=None):
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Python calculator REPL.")
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="run the commands from FILE ('-' for stdin) instead of starting the REPL",
+    )
+    parser.add_argument(
+        "--chunk-size", type=positive_int, default=1000,
+        help="number of batch lines executed between two output writes",
+    )
+    parser.add_argument(
+        "--engine", choices=("float", "decimal"),
+        help="compute batch arithmetic with the vectorized engine: 'float' for speed, "
+             "'decimal' for the same precision as the REPL",
+    )
+    parser.add_argument(
+        "--workers", type=positive_int,
+        help="number of worker processes used for stateless batch commands",
+    )
+    parser.add_argument(
+        "--output", choices=OUTPUT_MODES, default=TEXT_MODE,
+        help="format of batch and replay results: the 'text' messages, bare 'value's, 'jsonl' or 'csv'",
+    )
+    parser.add_argument(
+        "--compile", nargs=2, metavar=("FILE", "OUTPUT"),
+        help="compile the commands from FILE ('-' for stdin) into the binary record file OUTPUT",
+    )
+    parser.add_argument(
+        "--replay", metavar="FILE",
+        help="run a record file written by --compile instead of starting the REPL",
+    )
+    parser.add_argument(
+        "--serve", metavar="ADDRESS",
+        help="run as a network service on [HOST:]PORT or unix:PATH",
+    )
+    parser.add_argument(
+        "--max-connections", type=positive_int, default=100,
+        help="maximum number of concurrent clients in service mode",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_address(address):
+    """Split a --serve address into (host, port, path)."""
+    if address.startswith("unix:"):
+        return None, None, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port), None
+
+
+def main(argv=None):
+    """Start the REPL, run or compile a command file in batch mode, or serve network clients."""
+    args = parse_args(argv)
+    if args.output == TEXT_MODE:
+        app = App()  # Instantiate an instance of App
+    else:
+        # Startup messages would not be valid values, JSON or CSV
+        with contextlib.redirect_stdout(sys.stderr):
+            app = App()
+    if args.serve:
+        host, port, path = parse_address(args.serve)
+        app.serve(host, port, path, args.max_connections)
+        return
+    if args.compile:
+        source, target = args.compile
+        with open(target, "wb") as file:
+            if source == "-":
+                count = app.compile_commands(sys.stdin, file)
+            else:
+                with open(source, encoding="utf-8") as stream:
+                    count = app.compile_commands(stream, file)
+        print(f"Compiled {count} commands into {target}.", file=sys.stderr)
+        return
+    if args.replay:
+        with open(args.replay, "rb") as file:
+            report = app.run_compiled(file, chunk_size=args.chunk_size, output_mode=args.output)
+        print(report, file=sys.stderr)
+        return
+    if args.batch is None:
+        app.start()
+        return
+
+    if args.batch == "-":
+        report = app.run_batch(sys.stdin, chunk_size=args.chunk_size, mode=args.engine, workers=args.workers, output_mode=args.output)
+    else:
+        with open(args.batch, encoding="utf-8") as stream:
+            report = app.run_batch(stream, chunk_size=args.chunk_size, mode=args.engine, workers=args.workers, output_mode=args.output)
+    print(report, file=sys.stderr)
+
 
 # This forces the program to start when you run it from the command line.
 if __name__ == "__main__":
-    App().start()  # Instantiate an instance of App
\ No newline at end of file
+    main()
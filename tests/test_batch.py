@@ -0,0 +1,65 @@
+'''test_batch.py'''
+import io
+import pytest
+from app import App
+from app.batch import chunked, read_commands
+from main import parse_args
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an App working in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return App()
+
+
+def test_read_commands_skips_blanks_and_comments():
+    """Test that blank lines and comments never reach the command handler."""
+    stream = io.StringIO("add 1 2\n\n   \n# comment\n  divide 4 2  \n")
+    assert list(read_commands(stream)) == ["add 1 2", "divide 4 2"]
+
+
+def test_read_commands_stops_at_exit():
+    """Test that an exit line ends the batch like it ends the REPL."""
+    stream = io.StringIO("add 1 2\nEXIT\nadd 3 4\n")
+    assert list(read_commands(stream)) == ["add 1 2"]
+
+
+def test_chunked_groups_lines():
+    """Test that lines are grouped into chunks of the requested size."""
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert not list(chunked([], 3))
+
+
+def test_run_batch_writes_results_in_order(app):
+    """Test that batch results match the REPL messages, one per line."""
+    stream = io.StringIO("add 2 3\ndivide 1 0\nunknown 1\nmean 1 2 3\n")
+    output = io.StringIO()
+    report = app.run_batch(stream, output, chunk_size=2)
+
+    assert output.getvalue().splitlines() == [
+        "The result of adding 2 and 3 is equal to 5.",
+        "Error: Division by zero is not allowed.",
+        "No such command: unknown",
+        "The mean of 1.0, 2.0, 3.0 is 2.0.",
+    ]
+    assert report.lines == 4
+    assert "lines/s" in str(report)
+
+
+def test_run_batch_records_history(app):
+    """Test that executed batch commands are added to the capped history."""
+    stream = io.StringIO("".join(f"add {i} 1\n" for i in range(25)))
+    app.run_batch(stream, io.StringIO())
+    assert len(app.history) == app.history.capacity
+    assert app.history[-1] == "add 24 1"
+
+
+@pytest.mark.parametrize("option", ["--chunk-size", "--workers", "--max-connections"])
+@pytest.mark.parametrize("value", ["0", "-5", "ten"])
+def test_count_options_must_be_positive(option, value, capsys):
+    """Test that zero, negative and non-numeric counts are rejected instead of processing nothing."""
+    with pytest.raises(SystemExit):
+        parse_args(["--batch", "commands.txt", option, value])
+    assert "expected a positive integer" in capsys.readouterr().err
+    assert vars(parse_args([option, "3"]))[option[2:].replace("-", "_")] == 3
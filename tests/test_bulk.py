@@ -0,0 +1,90 @@
+'''test_bulk.py'''
+import io
+import pytest
+from app import App
+from app.bulk import BulkEngine
+from app.pluggin.add import AddCommand
+from app.pluggin.subtract import SubtractCommand
+from app.pluggin.multiply import MultiplyCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.mean import MeanCommand
+
+LINES = [
+    "add 2 3", "subtract 5 3.5", "multiply 1.1 3", "divide 1 3", "divide 4 0",
+    "divide -10 2", "mean 1 2 3", "mean 4 5", "add inf -inf",
+]
+
+
+@pytest.fixture
+def commands():
+    """Create the arithmetic commands used by the engine."""
+    return {
+        "add": AddCommand(), "subtract": SubtractCommand(), "multiply": MultiplyCommand(),
+        "divide": DivideCommand(), "mean": MeanCommand(),
+    }
+
+
+def run_one(commands, line):
+    """Run a line through the regular per-command path."""
+    name, *args = line.split()
+    return commands[name].execute(*args)
+
+
+def test_decimal_mode_matches_per_command_messages(commands):
+    """Test that the decimal mode produces exactly the per-command messages."""
+    outputs = BulkEngine("decimal").execute_lines(LINES, commands)
+    for line, output in zip(LINES, outputs):
+        if output is not None:
+            assert output == run_one(commands, line)
+    assert outputs[0] == "The result of adding 2 and 3 is equal to 5."
+    assert outputs[4] == "Error: Division by zero is not allowed."
+
+
+def test_float_mode_computes_with_floats(commands):
+    """Test that the float mode uses float64 arithmetic."""
+    outputs = BulkEngine("float").execute_lines(["add 2 3", "divide 1 4", "divide 1 0"], commands)
+    assert outputs == [
+        "The result of adding 2.0 and 3.0 is equal to 5.0.",
+        "The result of dividing 1.0 by 4.0 is equal to 0.25.",
+        "Error: Division by zero is not allowed.",
+    ]
+
+
+@pytest.mark.parametrize("mode", ["float", "decimal"])
+def test_irregular_lines_are_left_to_the_regular_path(commands, mode):
+    """Test that invalid input and unknown commands are not handled in bulk."""
+    lines = ["add x 1", "divide 1", "mean a b", "unknown 1 2", "add 1 1"]
+    outputs = BulkEngine(mode).execute_lines(lines, commands)
+    assert outputs[:4] == [None, None, None, None]
+    assert outputs[4] is not None
+
+
+def test_unknown_mode_is_rejected():
+    """Test that only the float and decimal modes are accepted."""
+    with pytest.raises(ValueError):
+        BulkEngine("quad")
+
+
+def test_run_batch_with_engine_keeps_messages(tmp_path, monkeypatch):
+    """Test that a batch run with the decimal engine matches the regular batch output."""
+    monkeypatch.chdir(tmp_path)
+    script = "\n".join(LINES + ["add a 1", "unknown 2"]) + "\n"
+    regular, bulk = io.StringIO(), io.StringIO()
+    App().run_batch(io.StringIO(script), regular)
+    app = App()
+    app.run_batch(io.StringIO(script), bulk, mode="decimal")
+    assert bulk.getvalue() == regular.getvalue()
+    assert app.history[-1] == "add a 1"
+
+
+@pytest.mark.parametrize("mode", ["float", "decimal"])
+def test_invalid_expressions_do_not_abort_the_batch(tmp_path, monkeypatch, mode):
+    """Test that expressions the compiler rejects are reported and the batch goes on."""
+    monkeypatch.chdir(tmp_path)
+    chain = "+".join(["1"] * 3000)
+    output = io.StringIO()
+    App().run_batch(io.StringIO(f"eval 0x10+1\neval {chain}\nadd 1 2\n"), output, mode=mode)
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "Error: Invalid expression: 0x10+1"
+    assert lines[1] == "Error: Expression too long: at most 256 operators are supported."
+    assert lines[2].endswith("is equal to 3.") or lines[2].endswith("is equal to 3.0.")
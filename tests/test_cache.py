@@ -0,0 +1,76 @@
+'''test_cache.py'''
+from unittest.mock import MagicMock
+import pytest
+from app.cache import ResultCache
+from app.command import CommandHandler
+from app.pluggin.cache import CacheCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.history import HistoryCommand
+
+
+@pytest.fixture
+def cache():
+    """Create a small result cache."""
+    return ResultCache(maxsize=2)
+
+
+def test_cache_counts_hits_and_misses(cache):
+    """Test that repeated keys are served from the cache."""
+    compute = MagicMock(return_value="result")
+    assert cache.get_or_compute("key", compute) == "result"
+    assert cache.get_or_compute("key", compute) == "result"
+    compute.assert_called_once()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used(cache):
+    """Test that the least recently used entry is evicted first."""
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.evictions == 1
+    assert cache.get_or_compute("a", lambda: None) == 1
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+
+def test_cache_entries_expire(monkeypatch):
+    """Test that entries older than the TTL are recomputed."""
+    now = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(maxsize=4, ttl=5)
+    cache.get_or_compute("a", lambda: 1)
+    now[0] += 10
+    assert cache.get_or_compute("a", lambda: 2) == 2
+    assert cache.misses == 2
+
+
+def test_handler_caches_only_pure_commands(cache):
+    """Test that pure commands are cached and stateful ones are not."""
+    handler = CommandHandler(cache)
+    handler.register_command("divide", DivideCommand())
+    handler.register_command("history", HistoryCommand())
+
+    first = handler.execute_command("divide", "1", "3")
+    assert handler.execute_command("divide", "1", "3") == first
+    handler.execute_command("history")
+    handler.execute_command("history")
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+
+def test_cache_command_reports_stats(cache):
+    """Test the cache stats and clear subcommands."""
+    command = CacheCommand(cache)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("a", lambda: 1)
+    assert command.execute("stats") == (
+        "Cache size: 1/2 (ttl none), hits: 1, misses: 1, evictions: 0, hit rate: 50.0%."
+    )
+    assert command.execute("clear") == "Cache cleared."
+    assert len(cache) == 0
+    assert command.execute("bogus") == "Invalid cache command. Available commands: stats, clear."
+
+
+def test_cache_command_without_cache():
+    """Test the message shown when the cache is disabled."""
+    assert CacheCommand().execute("stats") == "Result cache is disabled. Set RESULT_CACHE_SIZE to enable it."
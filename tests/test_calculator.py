@@ -59,15 +59,15 @@ def test_add_invalid_input(add_command):
 def test_add_insufficient_arguments(add_command):
     """Test the add command with insufficient number of arguments."""
     result = add_command.execute(3)
-    assert result == "Error: Please provide exactly two numbers to add."
+    assert result == "Error: Please provide at least two numbers to add."
 
     result = add_command.execute()
-    assert result == "Error: Please provide exactly two numbers to add."
+    assert result == "Error: Please provide at least two numbers to add."
 
-def test_add_too_many_arguments(add_command):
+def test_add_more_than_two_arguments(add_command):
     """Test the add command with more than two arguments."""
     result = add_command.execute(3, 5, 7)
-    assert result == "Error: Please provide exactly two numbers to add."
+    assert result == "The sum of 3 numbers is equal to 15."
 
 # subtract command
 def test_subtract_command(subtract_command):
@@ -119,15 +119,15 @@ def test_multiply_invalid_input(multiply_command):
 def test_multiply_insufficient_arguments(multiply_command):
     """Test the multiply command with insufficient number of arguments."""
     result = multiply_command.execute(3)
-    assert result == "Please provide exactly two numbers to multiply."
+    assert result == "Please provide at least two numbers to multiply."
 
     result = multiply_command.execute()
-    assert result == "Please provide exactly two numbers to multiply."
+    assert result == "Please provide at least two numbers to multiply."
 
-def test_multiply_too_many_arguments(multiply_command):
+def test_multiply_more_than_two_arguments(multiply_command):
     """Test the multiply command with more than two arguments."""
     result = multiply_command.execute(3, 5, 7)
-    assert result == "Please provide exactly two numbers to multiply."
+    assert result == "The product of 3 numbers is equal to 105."
 
 # divide command
 def test_divide_command(divide_command):
@@ -299,4 +299,4 @@ def test_add_special_characters(history_command):
 def test_invalid_history_command(history_command):
     """Test an invalid subcommand for history."""
     result = history_command.execute("invalid_command")
-    assert result == "Invalid history command. Available commands: show, save, load, clear, delete."
\ No newline at end of file
+    assert result == "Invalid history command. Available commands: show, search, save, load, clear, delete."
\ No newline at end of file
@@ -0,0 +1,116 @@
+'''test_columnar.py'''
+import numpy as np
+import pytest
+from app import App
+from app.columnar import ColumnError, column_function, compute_csv
+from app.pluggin.compute import ComputeCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.eval import EvalCommand
+from app.pluggin.mean import MeanCommand
+
+
+@pytest.fixture
+def data(tmp_path):
+    """Write a small CSV file with a zero divisor, an invalid number and an empty cell."""
+    path = tmp_path / "data.csv"
+    path.write_text("a,b,c\n1,2,4\n4,0,1\nx,3,2\n,3,2\n9,3,2\n")
+    return path
+
+
+@pytest.fixture
+def commands():
+    """Return the arithmetic plugins compute looks operations up in."""
+    return {"divide": DivideCommand(), "mean": MeanCommand(), "eval": EvalCommand()}
+
+
+def read_results(path):
+    """Read the result column of a compute output file, with None for empty fields."""
+    lines = path.read_text().splitlines()
+    assert lines[0] == "result"
+    return [float(line) if line else None for line in lines[1:]]
+
+
+def test_compute_binary_operation(data, commands, tmp_path):
+    """Test that divide leaves empty results for zero divisors and invalid numbers."""
+    output = tmp_path / "out.csv"
+    result = ComputeCommand(commands).execute(str(data), str(output), "divide", "a", "b")
+    assert result.startswith("Computed divide of a, b for 5 rows")
+    assert result.endswith("3 rows have no result (division by zero or invalid number).")
+    assert read_results(output) == [0.5, None, None, None, 3.0]
+
+
+def test_compute_mean_and_eval(data, commands, tmp_path):
+    """Test row-wise means and expressions over column names."""
+    command = ComputeCommand(commands)
+    command.execute(str(data), str(tmp_path / "mean.csv"), "mean", "b", "c")
+    assert read_results(tmp_path / "mean.csv") == [3.0, 0.5, 2.5, 2.5, 2.5]
+    command.execute(str(data), str(tmp_path / "eval.csv"), "eval", "(a+c)/b")
+    assert read_results(tmp_path / "eval.csv") == [2.5, None, None, None, 11 / 3]
+
+
+def test_compute_npy_output(data, commands, tmp_path):
+    """Test that a .npy output holds the float64 results and can be memory-mapped."""
+    output = tmp_path / "out.npy"
+    ComputeCommand(commands).execute(str(data), str(output), "divide", "a", "b")
+    results = np.load(output, mmap_mode="r")
+    assert results.dtype == np.float64
+    assert results.tolist()[0] == 0.5 and results[4] == 3.0
+    assert np.isnan(results[1:4]).all()
+
+
+def test_compute_in_chunks(tmp_path, commands):
+    """Test that chunked reading gives the same results as one pass."""
+    source = tmp_path / "big.csv"
+    source.write_text("a,b\n" + "".join(f"{i},{i % 7}\n" for i in range(1000)))
+    function, columns = column_function(commands["divide"], ["a", "b"])
+    report = compute_csv(str(source), str(tmp_path / "out.npy"), function, columns, chunk_rows=64)
+    assert report.rows == 1000
+    assert report.empty == len(range(0, 1000, 7))
+    expected = [i / (i % 7) if i % 7 else None for i in range(1000)]
+    assert [None if np.isnan(v) else v for v in np.load(tmp_path / "out.npy").tolist()] == expected
+
+
+@pytest.mark.parametrize("args, expected", [
+    (("missing.csv", "out.csv", "divide", "a", "b"), "Error: Input file 'missing.csv' not found."),
+    (("{data}", "out.csv", "divide", "a", "z"), "Error: Column(s) z not found in {data}."),
+    (("{data}", "out.csv", "divide", "a"), "Error: Please provide exactly two columns for a binary operation."),
+    (("{data}", "out.csv", "eval", "1+2"), "Error: Please provide an expression over column names."),
+    (("{data}", "out.csv", "power", "a", "b"), "No such command: power"),
+    (("{data}", "out.csv", "divide"), "Usage: compute <input> <output> <operation> <column> [<column> ...]"),
+])
+def test_compute_errors(data, commands, tmp_path, args, expected):
+    """Test the messages for missing files, columns and unsupported arguments."""
+    args = [arg.format(data=data) for arg in args]
+    assert ComputeCommand(commands).execute(*args) == expected.format(data=data)
+    assert not (tmp_path / "out.csv").exists()
+
+
+def test_column_function_rejects_other_commands(commands):
+    """Test that commands without column arithmetic are refused."""
+    with pytest.raises(ColumnError):
+        column_function(ComputeCommand(commands), ["a"])
+
+
+def test_compute_through_app(data, tmp_path, monkeypatch):
+    """Test that the compute plugin uses the application's commands."""
+    monkeypatch.chdir(tmp_path)
+    app = App()
+    result = app.process_command(f"compute {data} out.csv add a c")
+    assert result.startswith("Computed add of a, c for 5 rows")
+    assert read_results(tmp_path / "out.csv") == [5.0, 5.0, None, None, 11.0]
+
+
+def test_compute_into_its_source(data, commands):
+    """Test that writing the results over the input reads the whole input first."""
+    result = ComputeCommand(commands).execute(str(data), str(data), "divide", "a", "b")
+    assert result.startswith("Computed divide of a, b for 5 rows")
+    assert read_results(data) == [0.5, None, None, None, 3.0]
+    assert [path.name for path in data.parent.iterdir()] == ["data.csv"]
+
+
+def test_failed_compute_keeps_the_target(data, commands, tmp_path):
+    """Test that an existing output is left untouched when the input cannot be read."""
+    output = tmp_path / "out.csv"
+    output.write_text("result\n1\n")
+    assert ComputeCommand(commands).execute(str(data), str(output), "divide", "a", "z").startswith("Error")
+    assert output.read_text() == "result\n1\n"
@@ -0,0 +1,109 @@
+'''test_compiler.py'''
+import io
+import pytest
+from app import App
+from app.command import CommandHandler
+from app.compiler import CommandCompiler, CommandRecord
+from app.numeric import FloatBackend
+from app.pluggin.add import AddCommand
+
+LINES = [
+    "add 2 3",
+    "subtract 10 4.5",
+    "multiply 1e2 3",
+    "divide 1 0",
+    "divide 7 2",
+    "add 1 x",
+    "add 1",
+    "mean 1 2 3",
+    "unknown 1",
+    "divide inf inf",
+]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an App working in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return App()
+
+
+def test_compile_parses_arithmetic_operands(app):
+    """Test that binary arithmetic lines get pre-parsed Decimal operands."""
+    compiler = CommandCompiler(app.command_handler)
+    record = compiler.compile("add 2 3.5")
+    assert record.fast
+    assert [str(operand) for operand in record.operands] == ["2", "3.5"]
+    assert compiler.names[record.opcode] == "add"
+    assert record.text == "add 2 3.5"
+    assert compiler.compile("   ") is None
+    assert not compiler.compile("add 1 x").fast
+    assert compiler.compile("mean 1 2").operands == ("1", "2")
+
+
+def test_compiled_records_match_regular_dispatch(app):
+    """Test that executing records gives the same output as process_command."""
+    compiler = CommandCompiler(app.command_handler)
+    records = [compiler.compile(line) for line in LINES]
+    assert app.process_records(records, compiler) == [app.process_command(line) for line in LINES]
+
+
+def test_records_are_reusable(app):
+    """Test that one record can be executed several times."""
+    compiler = CommandCompiler(app.command_handler)
+    record = compiler.compile("multiply 3 4")
+    assert compiler.execute(record) == compiler.execute(record) == "The result of multiplying 3 and 4 is equal to 12."
+
+
+def test_binary_round_trip(app):
+    """Test that records read back from a compiled file are equal to the originals."""
+    compiler = CommandCompiler(app.command_handler)
+    file = io.BytesIO()
+    assert compiler.write_records((compiler.compile(line) for line in LINES), file) == len(LINES)
+    file.seek(0)
+
+    replayed = list(CommandCompiler(app.command_handler).read_records(file))
+    assert [record.text for record in replayed] == LINES
+    assert all(isinstance(record, CommandRecord) for record in replayed)
+    assert replayed[0].fast and replayed[0].operands == compiler.compile("add 2 3").operands
+
+
+def test_decimal_operands_are_stored_parsed(app):
+    """Test that Decimal operands come back in their exact form, and are parsed again by another backend."""
+    lines = ["add 2 3", "add 1e2 -0", "add 1.50 -7", "add inf -1E-30"]
+    compiler = CommandCompiler(app.command_handler)
+    file = io.BytesIO()
+    compiler.write_records((compiler.compile(line) for line in lines), file)
+
+    file.seek(0)
+    replayed = list(CommandCompiler(app.command_handler).read_records(file))
+    assert [tuple(map(str, record.operands)) for record in replayed] == [
+        tuple(map(str, compiler.compile(line).operands)) for line in lines
+    ]
+    assert str(replayed[1].operands[1]) == "-0" and str(replayed[2].operands[0]) == "1.50"
+    file.seek(0)
+    handler = CommandHandler()
+    handler.register_command("add", AddCommand(FloatBackend()))
+    replayed = list(CommandCompiler(handler).read_records(file))
+    assert [record.operands for record in replayed] == [(2.0, 3.0), (100.0, -0.0), (1.5, -7.0), (float("inf"), -1e-30)]
+
+
+def test_read_records_rejects_other_files(app):
+    """Test that a file without the record header is refused."""
+    with pytest.raises(ValueError):
+        list(CommandCompiler(app.command_handler).read_records(io.BytesIO(b"add 1 2\n")))
+
+
+def test_run_compiled_replays_file(app):
+    """Test that a compiled file replays with the batch output and history."""
+    file = io.BytesIO()
+    app.compile_commands(io.StringIO("\n".join(LINES) + "\n"), file)
+    file.seek(0)
+    output = io.StringIO()
+    report = app.run_compiled(file, output, chunk_size=3)
+
+    expected = io.StringIO()
+    App().run_batch(io.StringIO("\n".join(LINES) + "\n"), expected)
+    assert output.getvalue() == expected.getvalue()
+    assert report.lines == len(LINES)
+    assert app.history[-1] == "divide inf inf"
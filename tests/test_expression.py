@@ -0,0 +1,100 @@
+'''test_expression.py'''
+from decimal import Decimal
+import numpy as np
+import pytest
+from app.bulk import BulkEngine
+from app.expression import Expression, ExpressionError, compile_expression, split_bindings
+from app.pluggin.eval import EvalCommand
+
+
+@pytest.mark.parametrize("args, expected", [
+    (("(a+b)*c/d", "a=1", "b=2", "c=3", "d=4"), "The result of (a+b)*c/d with a=1, b=2, c=3, d=4 is equal to 2.25."),
+    (("1", "+", "2", "*", "3"), "The result of 1 + 2 * 3 is equal to 7."),
+    (("0.1+0.2",), "The result of 0.1+0.2 is equal to 0.3."),
+    (("-a/3", "a=10"), "The result of -a/3 with a=10 is equal to -3.333333333333333333333333333."),
+    (("a/(b-b)", "a=1", "b=2"), "Error: Division by zero is not allowed."),
+    (("a-a", "a=inf"), "Error: Invalid operation in a-a."),
+    (("a*2",), "Error: Variable 'a' is not bound."),
+    (("a", "a=x"), "Error: Invalid number input: 'x' is not a valid number."),
+    (("2**3",), "Error: Invalid expression: 2**3"),
+    (("a(1)",), "Error: Invalid expression: a(1)"),
+    ((), "Please provide an expression to evaluate."),
+])
+def test_eval_command(args, expected):
+    """Test eval results and errors, which follow the arithmetic plugins' messages."""
+    assert EvalCommand().execute(*args) == expected
+
+
+def test_constant_folding():
+    """Test that sub-expressions without variables are computed at compile time."""
+    assert compile_expression("(1+2)*3/4").is_constant
+    assert compile_expression("(1+2)*3/4").evaluate() == Decimal("2.25")
+    assert not compile_expression("(1+2)*x").is_constant
+    # A constant division by zero is left to fail when the expression is evaluated
+    with pytest.raises(ZeroDivisionError):
+        compile_expression("1/0").evaluate()
+
+
+def test_compiled_expressions_are_cached():
+    """Test that the same source text is only compiled once."""
+    expression = compile_expression("x*y+1")
+    assert isinstance(expression, Expression)
+    assert compile_expression("x*y+1") is expression
+    assert expression.variables == ("x", "y")
+
+
+def test_compile_rejects_invalid_text():
+    """Test that syntax errors and unsupported nodes raise ExpressionError."""
+    for source in ("1 +", "a.b", "'text'", "a < b"):
+        with pytest.raises(ExpressionError):
+            compile_expression(source)
+
+
+@pytest.mark.parametrize("source, message", [
+    ("0x10+1", "Invalid expression"), ("+".join(["1"] * 3000), "Expression too long"),
+])
+def test_compile_rejects_unparsable_literals_and_long_chains(source, message):
+    """Test that literals the backend cannot parse and too long expressions raise ExpressionError."""
+    with pytest.raises(ExpressionError, match=message):
+        compile_expression(source)
+    assert compile_expression("+".join(["1"] * 257)).evaluate({}) == 257
+
+
+def test_split_bindings():
+    """Test that name=value arguments are separated from the expression."""
+    assert split_bindings(["(a", "+", "b)", "a=1", "b=-2"]) == ("(a + b)", {"a": "1", "b": "-2"})
+
+
+def test_evaluate_columns():
+    """Test vectorized evaluation, with divisions by zero marked per row."""
+    expression = compile_expression("(a+b)/c")
+    columns = {"a": np.array([1.0, 2.0, 3.0]), "b": np.array([1.0, 1.0, 1.0]), "c": np.array([2.0, 0.0, 4.0])}
+    values, zeros = expression.evaluate_columns(columns, 3, float)
+    assert zeros.tolist() == [False, True, False]
+    assert values[[0, 2]].tolist() == [1.0, 1.0]
+
+    decimals = {name: np.array([Decimal(str(v)) for v in column], dtype=object) for name, column in columns.items()}
+    values, zeros = expression.evaluate_columns(decimals, 3)
+    assert values[0] == Decimal(1) and zeros[1]
+
+
+@pytest.mark.parametrize("mode", ["decimal", "float"])
+def test_bulk_engine_evaluates_expressions(mode):
+    """Test that batch eval lines give the per-command results, or None when left to the regular path."""
+    command = EvalCommand()
+    lines = [
+        "eval (a+b)*c a=1 b=2 c=3",
+        "eval (a+b)*c a=2 b=2 c=0.5",
+        "eval (a+b)*c a=1 b=x c=3",
+        "eval a/b a=1 b=0",
+        "eval a/b a=1",
+        "eval 1+",
+    ]
+    outputs = BulkEngine(mode).execute_lines(lines, {"eval": command})
+    if mode == "decimal":
+        assert outputs[:2] == [command.execute(*line.split()[1:]) for line in lines[:2]]
+    else:
+        assert outputs[0] == "The result of (a+b)*c with a=1, b=2, c=3 is equal to 9.0."
+    assert outputs[2] is None
+    assert outputs[3] == "Error: Division by zero is not allowed."
+    assert outputs[4:] == [None, None]
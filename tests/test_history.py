@@ -0,0 +1,205 @@
+'''test_history.py'''
+import pandas as pd
+import pytest
+from app import App
+from app.history import HistoryBuffer, read_history_csv
+from app.history.journal import HistoryJournal
+from app.pluggin.history import HistoryCommand
+
+
+def test_buffer_keeps_insertion_order():
+    """Test that commands come back from oldest to newest."""
+    buffer = HistoryBuffer(5)
+    buffer.extend(["add 1 2", "subtract 3 1", "multiply 2 2"])
+    assert buffer.to_list() == ["add 1 2", "subtract 3 1", "multiply 2 2"]
+    assert buffer[0] == "add 1 2"
+    assert buffer[-1] == "multiply 2 2"
+
+
+def test_buffer_evicts_oldest_when_full():
+    """Test that the capacity is enforced by overwriting the oldest entries."""
+    buffer = HistoryBuffer(3)
+    buffer.extend(f"add {i} 1" for i in range(7))
+    assert len(buffer) == 3
+    assert buffer.to_list() == ["add 4 1", "add 5 1", "add 6 1"]
+
+
+def test_buffer_rejects_invalid_capacity():
+    """Test that a buffer needs room for at least one command."""
+    with pytest.raises(ValueError):
+        HistoryBuffer(0)
+
+
+def test_dataframe_view_is_cached_until_changed():
+    """Test that the DataFrame view is only rebuilt after a mutation."""
+    buffer = HistoryBuffer(3)
+    buffer.append("add 1 2")
+    view = buffer.to_dataframe()
+    assert buffer.to_dataframe() is view
+    buffer.append("add 3 4")
+    assert list(buffer.to_dataframe()["Command"]) == ["add 1 2", "add 3 4"]
+
+
+def test_history_command_accepts_dataframe():
+    """Test the DataFrame constructor kept for backwards compatibility."""
+    history_df = pd.DataFrame({"Command": ["add 2 3", "divide 4 2"]})
+    history_command = HistoryCommand(history_df)
+    assert history_command.history.to_list() == ["add 2 3", "divide 4 2"]
+
+
+def test_history_command_enforces_max_size():
+    """Test that the history command only keeps the configured number of commands."""
+    history_command = HistoryCommand(max_size=2)
+    for command in ["add 1 1", "add 2 2", "add 3 3"]:
+        history_command.add_to_history(command)
+    assert list(history_command.history_df["Command"]) == ["add 2 2", "add 3 3"]
+
+
+def test_save_and_load_history_round_trip(tmpdir):
+    """Test that a saved history loads back into the same buffer."""
+    filepath = str(tmpdir.join("history.csv"))
+    history_command = HistoryCommand()
+    history_command.add_to_history("add 2 3")
+    history_command.add_to_history("multiply 2 3")
+    buffer = history_command.history
+    assert history_command.save_history(filepath) == f"History saved to {filepath}."
+
+    history_command.clear_history()
+    assert history_command.load_history(filepath) == f"History loaded from {filepath}."
+    assert history_command.history is buffer
+    assert buffer.to_list() == ["add 2 3", "multiply 2 3"]
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Create a journal that fsyncs after every record."""
+    journal = HistoryJournal(str(tmp_path / "history.journal"), fsync="always", compact_every=5)
+    yield journal
+    journal.close()
+
+
+def test_journal_replays_appends_and_clears(journal):
+    """Test that replaying the journal rebuilds the history."""
+    history_command = HistoryCommand(journal=journal)
+    history_command.add_to_history("add 1 1")
+    history_command.clear_history()
+    history_command.add_to_history("add 2 2")
+    history_command.add_to_history("multiply 2\\n3")
+
+    restored = HistoryBuffer(10)
+    assert journal.replay(restored) == 4
+    assert restored.to_list() == ["add 2 2", "multiply 2\\n3"]
+
+
+def test_journal_compacts_periodically(journal):
+    """Test that the journal is rewritten once enough records were appended."""
+    history_command = HistoryCommand(max_size=2, journal=journal)
+    for i in range(5):
+        history_command.add_to_history(f"add {i} 1")
+
+    with open(journal.path, encoding="utf-8") as file:
+        assert file.read() == "A\tadd 3 1\nA\tadd 4 1\n"
+    assert not journal.needs_compaction
+
+
+def test_journal_ignores_torn_record(journal):
+    """Test that an incomplete last record from a crash is skipped."""
+    journal.append("add 1 1")
+    journal.flush()
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write("A\tadd 2")
+    restored = HistoryBuffer(10)
+    journal.replay(restored)
+    assert restored.to_list() == ["add 1 1"]
+
+
+def test_reopened_journal_drops_torn_record(tmp_path):
+    """Test that reopening a journal after a torn write keeps the next record on its own line."""
+    path = tmp_path / "history.journal"
+    path.write_text("A\tadd 1 1\nA\tadd 2")
+    journal = HistoryJournal(str(path), fsync="never")
+    journal.append("add 3 3")
+    restored = HistoryBuffer(10)
+    assert journal.replay(restored) == 2
+    assert restored.to_list() == ["add 1 1", "add 3 3"]
+    journal.close()
+    assert path.read_text() == "A\tadd 1 1\nA\tadd 3 3\n"
+
+    path.write_text("A\t" + "x" * 10000)
+    HistoryJournal(str(path), fsync="never").close()
+    assert path.read_text() == ""
+
+
+def test_journal_rejects_unknown_fsync_policy(tmp_path):
+    """Test that only the documented fsync policies are accepted."""
+    with pytest.raises(ValueError):
+        HistoryJournal(str(tmp_path / "history.journal"), fsync="sometimes")
+
+
+def test_app_replays_journal_at_startup(tmp_path, monkeypatch):
+    """Test that an App with a journal restores the previous session without a CSV."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HISTORY_JOURNAL", "history.journal")
+    app = App()
+    app.process_command("add 1 2")
+    app.process_command("divide 4 2")
+    app.shutdown()
+    assert not (tmp_path / "history.csv").exists()
+
+    assert App().history.to_list() == ["add 1 2", "divide 4 2"]
+
+
+def test_app_appends_new_commands_at_shutdown(tmp_path, monkeypatch):
+    """Test that shutdown keeps the entries of history.csv beyond the buffer and adds the new commands once."""
+    monkeypatch.chdir(tmp_path)
+    commands = [f"add {i} 1" for i in range(15)]
+    write_history(tmp_path / "history.csv", commands)
+    app = App()
+    app.process_command("divide 4 2")
+    app.shutdown()
+    assert read_history_csv(str(tmp_path / "history.csv")) == commands + ["divide 4 2"]
+
+    App().shutdown()
+    assert read_history_csv(str(tmp_path / "history.csv")) == commands + ["divide 4 2"]
+
+
+def test_dataframe_history_is_copied():
+    """Test that a DataFrame seeds the buffer once and history_df is a snapshot."""
+    frame = pd.DataFrame({"Command": ["add 1 2"]})
+    history_command = HistoryCommand(frame)
+    history_command.add_to_history("divide 4 2")
+    assert frame["Command"].tolist() == ["add 1 2"]
+    assert history_command.history_df["Command"].tolist() == ["add 1 2", "divide 4 2"]
+
+
+def write_history(path, commands):
+    """Write a history CSV file the way save_history does."""
+    pd.DataFrame({"Command": commands}).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("rows", [5, 50_000])
+def test_read_history_csv_tail_matches_full_read(tmp_path, rows):
+    """Test that the tail read (streamed or memory-mapped) matches a full read."""
+    path = str(tmp_path / "history.csv")
+    write_history(path, [f"add {i} 1" if i % 3 else f"note {i}, \"quoted\"" for i in range(rows)])
+    everything = read_history_csv(path)
+    assert len(everything) == rows
+    assert read_history_csv(path, tail=10) == everything[-10:]
+
+
+def test_read_history_csv_falls_back_on_multiline_fields(tmp_path):
+    """Test that a quoted field spanning lines is still read correctly."""
+    path = str(tmp_path / "history.csv")
+    write_history(path, [f"add {i} 1" for i in range(20_000)] + ["multi\nline"])
+    assert read_history_csv(path, tail=2) == ["add 19999 1", "multi\nline"]
+
+
+def test_load_history_keeps_only_the_tail_in_place(tmp_path):
+    """Test that loading a large file fills the same buffer with the last commands."""
+    path = str(tmp_path / "history.csv")
+    write_history(path, [f"add {i} 1" for i in range(100_000)])
+    history_command = HistoryCommand(max_size=3)
+    buffer = history_command.history
+    history_command.load_history(path)
+    assert history_command.history is buffer
+    assert buffer.to_list() == ["add 99997 1", "add 99998 1", "add 99999 1"]
@@ -0,0 +1,118 @@
+'''test_history_store.py'''
+import pytest
+from app import App
+from app.history.store import HistoryStore
+from app.pluggin.history import HistoryCommand
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a history database that inserts every few entries."""
+    store = HistoryStore(str(tmp_path / "history.db"), flush_every=3)
+    yield store
+    store.close()
+
+
+def test_store_keeps_result_timestamp_and_latency(store):
+    """Test that every entry is stored with its metadata."""
+    store.append("add 1 2", "The result of 1 and 2 is equal to 3.", 0.002, timestamp=1000.0)
+    entry, = store.last(1)
+    assert entry.timestamp == 1000.0
+    assert entry.command == "add 1 2"
+    assert entry.result == "The result of 1 and 2 is equal to 3."
+    assert entry.latency == 0.002
+
+
+def test_store_last_and_pages_count_back_from_newest(store):
+    """Test that the last entries and pages are returned oldest first."""
+    for number in range(10):
+        store.append(f"add {number} 1")
+    assert len(store) == 10
+    assert [entry.command for entry in store.last(3)] == ["add 7 1", "add 8 1", "add 9 1"]
+    assert [entry.command for entry in store.page(2, 4)] == ["add 2 1", "add 3 1", "add 4 1", "add 5 1"]
+    assert [entry.command for entry in store.page(3, 4)] == ["add 0 1", "add 1 1"]
+    assert not store.page(4, 4)
+
+
+def test_store_search_matches_prefix_only(store):
+    """Test that search returns the commands starting with the prefix."""
+    for command in ["add 1 1", "divide 4 2", "add 2 2", "multiply 3 3", "divide 1 0"]:
+        store.append(command)
+    assert [entry.command for entry in store.search("divide")] == ["divide 4 2", "divide 1 0"]
+    assert [entry.command for entry in store.search("add", limit=1)] == ["add 2 2"]
+    assert not store.search("subtract")
+
+
+def test_store_persists_buffered_entries_on_close(tmp_path):
+    """Test that entries still buffered are written when the store is closed."""
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path, flush_every=100)
+    store.append("add 1 1")
+    store.close()
+    reopened = HistoryStore(path)
+    assert [entry.command for entry in reopened.last(5)] == ["add 1 1"]
+    reopened.close()
+
+
+def test_history_command_show_and_search_use_store(store):
+    """Test the show --last, show --page and search subcommands."""
+    history_command = HistoryCommand(max_size=2, store=store)
+    for number in range(5):
+        history_command.add_to_history(f"add {number} 1", f"result {number}", 0.001)
+    history_command.add_to_history("history show")
+
+    last = history_command.execute("show", "--last", "3")
+    assert "add 2 1" in last and "add 4 1" in last and "add 1 1" not in last
+    assert "result 4" in last and "1.000" in last
+    assert "add 0 1" in history_command.execute("show", "--page", "2", "--page-size", "3")
+    assert history_command.execute("show", "--page", "9") == "No history entries on page 9."
+    assert "add 3 1" in history_command.execute("search", "add", "3")
+    assert history_command.execute("search", "divide") == "No history entries start with 'divide'."
+    assert len(store) == 5
+
+
+@pytest.mark.parametrize("args, message", [
+    (("show", "--last", "0"), "Error: --last expects a positive integer."),
+    (("show", "--page"), "Error: --page expects a positive integer."),
+    (("show", "--first", "2"), "Error: Unknown history option: --first"),
+    (("search",), "Error: Please provide a command prefix to search for."),
+])
+def test_history_command_rejects_invalid_options(args, message):
+    """Test the messages for invalid show and search options."""
+    assert HistoryCommand().execute(*args) == message
+
+
+def test_history_command_search_without_store():
+    """Test that show --last and search work on the in-memory buffer."""
+    history_command = HistoryCommand()
+    for command in ["add 1 1", "divide 4 2", "add 2 2"]:
+        history_command.add_to_history(command)
+    result = history_command.execute("search", "add", "--last", "1")
+    assert "add 2 2" in result and "add 1 1" not in result
+    assert "divide 4 2" in history_command.execute("show", "--last", "2")
+
+
+def test_clear_history_clears_store(store):
+    """Test that clearing the history also empties the database."""
+    history_command = HistoryCommand(store=store)
+    history_command.add_to_history("add 1 1")
+    history_command.execute("clear")
+    assert len(store) == 0
+
+
+def test_app_records_history_in_database(tmp_path, monkeypatch):
+    """Test that an App with HISTORY_DB restores its history from the database."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HISTORY_DB", "history.db")
+    app = App()
+    app.process_command("add 1 2")
+    app.process_command("divide 4 0")
+    app.shutdown()
+    assert not (tmp_path / "history.csv").exists()
+
+    restored = App()
+    assert restored.history.to_list() == ["add 1 2", "divide 4 0"]
+    entry = restored.history_store.last(1)[0]
+    assert entry.result == "Error: Division by zero is not allowed."
+    assert entry.latency >= 0
+    restored.shutdown()
@@ -0,0 +1,215 @@
+'''test_logqueue.py'''
+import io
+import logging
+import threading
+import time
+import pytest
+from app import App
+from app.logqueue import DuplicateFilter, LogWriter, install_queue_logging
+
+LOGGING_CONF = (
+    "[loggers]\nkeys=root\n[handlers]\nkeys=file\n[formatters]\nkeys=plain\n"
+    "[logger_root]\nlevel=INFO\nhandlers=file\n"
+    "[handler_file]\nclass=FileHandler\nlevel=INFO\nformatter=plain\nargs=('app.log', 'a')\n"
+    "[formatter_plain]\nformat=%(levelname)s %(message)s\n"
+)
+
+
+class CountingStream(io.StringIO):
+    """Text stream counting its writes and flushes."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class RecordingHandler(logging.Handler):
+    """Handler keeping the messages it receives and counting flushes."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.flushes = 0
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+    def flush(self):
+        self.flushes += 1
+
+
+def make_record(message, level=logging.ERROR):
+    """Create a log record with the given message."""
+    return logging.LogRecord("test", level, __file__, 1, message, None, None)
+
+
+def test_duplicate_filter_limits_bursts():
+    """Test that identical errors beyond the burst are suppressed, then reported."""
+    duplicates = DuplicateFilter(burst=2, interval=0.05)
+    assert [duplicates.filter(make_record("boom")) for _ in range(5)] == [True, True, False, False, False]
+    assert duplicates.filter(make_record("other"))
+    assert duplicates.filter(make_record("info", logging.INFO))
+
+    time.sleep(0.06)
+    record = make_record("boom")
+    assert duplicates.filter(record)
+    assert record.getMessage() == "boom (3 identical messages suppressed)"
+
+
+def test_duplicate_filter_is_thread_safe():
+    """Test that threads logging the same message together let exactly one burst through."""
+    duplicates = DuplicateFilter(burst=100, interval=60.0, max_keys=16)
+    passed = []
+
+    def log():
+        passed.append(sum(duplicates.filter(make_record("boom")) for _ in range(1000)))
+        for i in range(200):
+            duplicates.filter(make_record(f"other {i}"))
+
+    threads = [threading.Thread(target=log) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(passed) == 100
+    assert (logging.ERROR, "boom", 7900) in duplicates.pop_suppressed()
+
+
+def test_duplicate_filter_pop_suppressed():
+    """Test that messages still being suppressed can be reported at shutdown."""
+    duplicates = DuplicateFilter(burst=1)
+    for _ in range(4):
+        duplicates.filter(make_record("boom"))
+    assert duplicates.pop_suppressed() == [(logging.ERROR, "boom", 3)]
+    assert not duplicates.pop_suppressed()
+
+
+@pytest.fixture
+def logger():
+    """Return an isolated logger that does not propagate to root."""
+    logger = logging.getLogger("test-logqueue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    yield logger
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+
+def test_writer_writes_in_order_and_flushes_per_batch(logger):
+    """Test that queued records are written in order by the background thread."""
+    handler = RecordingHandler()
+    writer = install_queue_logging([handler], logger, batch_size=1000)
+    assert writer.running
+    for i in range(500):
+        logger.info("message %d", i)
+    assert writer.flush()
+
+    assert handler.messages == [f"message {i}" for i in range(500)]
+    assert handler.flushes < 500
+    writer.stop()
+    assert not writer.running
+
+
+def test_stream_handlers_get_one_write_per_batch(logger):
+    """Test that console and file handlers are written and flushed per batch, without being patched."""
+    stream = CountingStream()
+    handler = logging.StreamHandler(stream)
+    writer = install_queue_logging([handler], logger, batch_size=1000)
+    for i in range(500):
+        logger.info("message %d", i)
+    assert writer.flush()
+    writer.stop()
+
+    assert stream.getvalue().splitlines() == [f"message {i}" for i in range(500)]
+    assert stream.writes < 500 and stream.flushes < 500
+    assert "flush" not in vars(handler)
+
+
+def test_writer_respects_handler_levels(logger):
+    """Test that handler levels still apply behind the queue."""
+    handler = RecordingHandler()
+    handler.setLevel(logging.ERROR)
+    writer = install_queue_logging([handler], logger)
+    logger.info("skipped")
+    logger.error("kept")
+    writer.stop()
+    assert handler.messages == ["kept"]
+
+
+def test_flush_reports_suppressed_duplicates(logger):
+    """Test that the final flush writes how many duplicates were dropped."""
+    handler = RecordingHandler()
+    writer = LogWriter([handler], duplicate_filter=DuplicateFilter(burst=1))
+    logger.addHandler(writer.handler)
+    writer.start()
+    for _ in range(3):
+        logger.error("boom")
+    writer.flush()
+    writer.stop()
+    assert handler.messages == ["boom", "boom (2 identical messages suppressed)"]
+
+
+def test_reinstalling_keeps_the_current_writer(logger):
+    """Test that configuring logging again without new handlers reuses the writer."""
+    writer = install_queue_logging([RecordingHandler()], logger)
+    assert install_queue_logging([], logger) is writer
+    writer.stop()
+
+
+def test_closed_streams_are_skipped(logger):
+    """Test that records for a stream closed under the writer are dropped without a logging error."""
+    errors = []
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.handleError = errors.append
+    writer = install_queue_logging([handler], logger)
+    stream.close()
+    logger.error("lost")
+    assert writer.flush()
+    writer.stop()
+    assert not errors
+
+
+def test_reconfiguring_writes_the_queued_records_first(tmp_path, monkeypatch):
+    """Test that a new logging configuration does not close the handlers under the previous writer."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logging.conf").write_text(LOGGING_CONF)
+    app = App()
+    app.process_command("bogus")
+    App().shutdown()
+
+    assert "ERROR Unknown command: bogus" in (tmp_path / "app.log").read_text().splitlines()
+
+
+def test_app_flushes_log_at_shutdown(tmp_path, monkeypatch):
+    """Test that log records are on disk once the application has shut down."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logging.conf").write_text(LOGGING_CONF)
+    app = App()
+    for _ in range(20):
+        app.process_command("bogus")
+    app.shutdown()
+
+    lines = (tmp_path / "app.log").read_text().splitlines()
+    assert lines.count("ERROR Unknown command: bogus") == 5
+    assert "ERROR Unknown command: bogus (15 identical messages suppressed)" in lines
+    assert "INFO Application shutdown." in lines
+
+
+def test_batch_run_logs_its_end_before_shutdown(tmp_path, monkeypatch):
+    """Test that the end of a batch run is logged before the log is flushed at shutdown."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logging.conf").write_text(LOGGING_CONF)
+    App().run_batch(io.StringIO("add 1 2\n"), io.StringIO())
+
+    lines = (tmp_path / "app.log").read_text().splitlines()
+    finished = next(i for i, line in enumerate(lines) if line.startswith("INFO Batch run finished"))
+    assert finished < lines.index("INFO Application shutdown.")
@@ -0,0 +1,159 @@
+'''test_metrics.py'''
+import io
+import json
+import pytest
+from app import App
+from app.command import Command, CommandHandler
+from app.metrics import LatencyHistogram, Metrics, Profiler
+from app.pluggin.add import AddCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.mean import MeanCommand
+from app.pluggin.stats import StatsCommand
+
+
+class BrokenCommand(Command):
+    """Command that always raises."""
+
+    def execute(self, *args):
+        return 1 / 0
+
+
+@pytest.fixture
+def handler():
+    """Create a command handler recording metrics."""
+    handler = CommandHandler(metrics=Metrics())
+    handler.register_command("add", AddCommand())
+    handler.register_command("divide", DivideCommand())
+    return handler
+
+
+def test_histogram_buckets_bound_the_relative_error():
+    """Test that every value falls in a bucket whose upper bound is within 12.5%."""
+    for value in list(range(0, 100)) + [1000, 123_456, 10**9, 2**40 + 12345]:
+        index = LatencyHistogram.bucket_index(value)
+        upper = LatencyHistogram.bucket_upper_bound(index)
+        assert value <= upper <= value * 1.125 + 1
+        assert index == 0 or LatencyHistogram.bucket_upper_bound(index - 1) < value
+
+
+def test_histogram_percentiles():
+    """Test percentiles and cumulative bucket counts."""
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    assert histogram.count == 1000
+    assert 500_000 <= histogram.percentile(50) <= 500_000 * 1.125
+    assert 990_000 <= histogram.percentile(99) <= 1_000_000
+    assert histogram.percentile(100) == histogram.maximum == 1_000_000
+    assert list(histogram.buckets())[-1][1] == 1000
+
+
+def test_execute_command_records_calls_and_errors(handler):
+    """Test that calls are counted and error results or exceptions counted as errors."""
+    handler.execute_command("add", "1", "2")
+    handler.execute_command("add", "1", "x")
+    handler.execute_command("divide", "1", "0")
+    handler.register_command("broken", BrokenCommand())
+    with pytest.raises(ZeroDivisionError):
+        handler.execute_command("broken")
+
+    snapshot = handler.metrics.snapshot()
+    assert snapshot["add"]["calls"] == 2 and snapshot["add"]["errors"] == 1
+    assert snapshot["divide"]["errors"] == 1
+    assert snapshot["broken"] == {**snapshot["broken"], "calls": 1, "errors": 1}
+    assert snapshot["add"]["max_ms"] >= snapshot["add"]["p50_ms"] > 0
+
+
+def test_failures_are_counted_whatever_their_wording(handler):
+    """Test that arity, invalid input and empty input messages count as errors on both paths."""
+    handler.register_command("mean", MeanCommand())
+    for run in (handler.execute_command, handler.evaluate_command):
+        run("divide", "1")
+        run("divide", "1", "x")
+        run("mean")
+        run("divide", "4", "2")
+    snapshot = handler.metrics.snapshot()
+    assert snapshot["divide"]["calls"] == 6 and snapshot["divide"]["errors"] == 4
+    assert snapshot["mean"]["calls"] == 2 and snapshot["mean"]["errors"] == 2
+    assert handler.evaluate_command("divide", "1").failed
+    assert not handler.evaluate_command("divide", "4", "2").failed
+
+
+def test_exports(handler, tmp_path):
+    """Test the JSON and Prometheus text exports and the dump files."""
+    handler.execute_command("add", "1", "2")
+    assert json.loads(handler.metrics.to_json())["commands"]["add"]["calls"] == 1
+    text = handler.metrics.to_prometheus()
+    assert 'calculator_command_calls_total{command="add"} 1' in text
+    assert 'calculator_command_latency_seconds_bucket{command="add",le="+Inf"} 1' in text
+    assert 'calculator_command_latency_seconds_count{command="add"} 1' in text
+
+    handler.metrics.dump(str(tmp_path / "metrics.json"))
+    handler.metrics.dump(str(tmp_path / "metrics.prom"))
+    assert json.loads((tmp_path / "metrics.json").read_text())["commands"]["add"]["errors"] == 0
+    assert (tmp_path / "metrics.prom").read_text() == text
+
+
+def test_stats_command(handler, tmp_path):
+    """Test the stats subcommands."""
+    command = StatsCommand(handler.metrics)
+    assert command.execute() == "No commands executed yet."
+    handler.execute_command("add", "1", "2")
+    assert command.execute("show").splitlines()[2].split()[:3] == ["add", "1", "0"]
+    assert command.execute("dump") == "Please provide a file name or set METRICS_FILE."
+    assert command.execute("dump", str(tmp_path / "m.prom")) == f"Metrics written to {tmp_path / 'm.prom'}."
+    assert command.execute("reset") == "Metrics reset."
+    assert command.execute("show") == "No commands executed yet."
+    assert command.execute("bogus").startswith("Invalid stats command.")
+    assert StatsCommand().execute() == "Metrics are disabled. Unset METRICS or set it to 'on' to enable them."
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_profiler_toggles(mode):
+    """Test that profiling can be started and stopped at runtime."""
+    command = StatsCommand(Metrics())
+    assert command.execute("profile", "start", mode) == f"Profiling started in {mode} mode."
+    assert command.execute("profile", "start").startswith("Error: Profiling is already running")
+    sum(i * i for i in range(200_000))
+    report = command.execute("profile", "stop")
+    assert "function" in report or "calls" in report
+    assert not command.profiler.running
+    assert command.execute("profile", "stop") == "Error: Profiling is not running."
+
+
+def test_profiler_rejects_unknown_mode():
+    """Test that an unknown profile mode is refused."""
+    with pytest.raises(ValueError):
+        Profiler().start("perf")
+
+
+def test_app_metrics_settings(tmp_path, monkeypatch):
+    """Test that METRICS turns instrumentation off and METRICS_FILE is written at shutdown."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("METRICS_FILE", "metrics.json")
+    app = App()
+    app.process_command("add 1 2")
+    app.shutdown()
+    assert json.loads((tmp_path / "metrics.json").read_text())["commands"]["add"]["calls"] == 1
+
+    monkeypatch.setenv("METRICS", "off")
+    assert App().command_handler.metrics is None
+
+
+@pytest.mark.parametrize("options", [{"mode": "decimal"}, {"mode": "float"}, {"workers": 2}, {"compiled": True}])
+def test_batch_paths_record_metrics(tmp_path, monkeypatch, options):
+    """Test that the bulk engine, the worker pool and compiled records count their calls and errors."""
+    monkeypatch.chdir(tmp_path)
+    script = "add 1 2\nadd 3 4\ndivide 1 0\ndivide 4 2\nmultiply 2 x\n"
+    app = App()
+    if options.pop("compiled", False):
+        with open("commands.rec", "wb") as file:
+            app.compile_commands(io.StringIO(script), file)
+        with open("commands.rec", "rb") as file:
+            app.run_compiled(file, io.StringIO())
+    else:
+        app.run_batch(io.StringIO(script), io.StringIO(), chunk_size=8, **options)
+    snapshot = app.command_handler.metrics.snapshot()
+    assert snapshot["add"]["calls"] == 2 and snapshot["add"]["errors"] == 0
+    assert snapshot["divide"]["calls"] == 2 and snapshot["divide"]["errors"] == 1
+    assert snapshot["multiply"] == {**snapshot["multiply"], "calls": 1, "errors": 1}
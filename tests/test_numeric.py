@@ -0,0 +1,131 @@
+'''test_numeric.py'''
+import io
+import pickle
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+from app import App
+from app.bulk import BulkEngine
+from app.compiler import CommandCompiler
+from app.command import CommandHandler
+from app.numeric import (
+    DEFAULT_BACKEND, DecimalBackend, FloatBackend, FractionBackend, create_backend,
+)
+from app.pluggin.add import AddCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.eval import EvalCommand
+from app.pluggin.mean import MeanCommand
+from app.pluggin.multiply import MultiplyCommand
+
+
+@pytest.mark.parametrize("backend, expected", [
+    (None, "The result of adding 0.1 and 0.2 is equal to 0.3."),
+    (FloatBackend(), "The result of adding 0.1 and 0.2 is equal to 0.30000000000000004."),
+    (DecimalBackend(), "The result of adding 0.1 and 0.2 is equal to 0.3."),
+    (FractionBackend(), "The result of adding 1/10 and 1/5 is equal to 3/10."),
+])
+def test_add_uses_backend(backend, expected):
+    """Test that the arithmetic plugins parse and compute with their backend."""
+    assert AddCommand(backend).execute("0.1", "0.2") == expected
+
+
+@pytest.mark.parametrize("backend", [FloatBackend(), DecimalBackend(), FractionBackend()])
+def test_backends_report_invalid_numbers_and_division_by_zero(backend):
+    """Test that every backend keeps the plugins' error messages."""
+    divide = DivideCommand(backend)
+    assert divide.execute("1", "0") == "Error: Division by zero is not allowed."
+    assert divide.execute("1", "x") == "Invalid number input: '1' or 'x' is not a valid number."
+
+
+def test_decimal_backend_applies_precision_and_rounding():
+    """Test that results are rounded with the configured context."""
+    backend = DecimalBackend(precision=4, rounding="ROUND_HALF_UP")
+    assert DivideCommand(backend).execute("2", "3") == "The result of dividing 2 by 3 is equal to 0.6667."
+    assert MultiplyCommand(backend).execute("1.0005", "1") == (
+        "The result of multiplying 1.0005 and 1 is equal to 1.001."
+    )
+    assert backend.mean([Decimal("1"), Decimal("2"), Decimal("2")]) == Decimal("1.667")
+    assert DivideCommand(create_backend("decimal", "4", "down")).execute("2", "3").endswith("0.6666.")
+
+
+def test_fraction_backend_is_exact():
+    """Test that fractions keep results exact where floats round."""
+    assert DivideCommand(FractionBackend()).execute("1", "3") == "The result of dividing 1 by 3 is equal to 1/3."
+    assert FractionBackend().mean([Fraction(1), Fraction(2)]) == Fraction(3, 2)
+
+
+@pytest.mark.parametrize("backend, expected", [
+    (None, "The mean of 1.0, 2.0, 2.0 is 1.6666666666666667."),
+    (FloatBackend(), "The mean of 1.0, 2.0, 2.0 is 1.6666666666666667."),
+    (DecimalBackend(precision=5), "The mean of 1, 2, 2 is 1.6667."),
+    (FractionBackend(), "The mean of 1, 2, 2 is 5/3."),
+])
+def test_mean_uses_backend(backend, expected):
+    """Test that mean computes with its backend, or with floats when it has none."""
+    assert MeanCommand(backend).execute("1", "2", "2") == expected
+
+
+def test_mean_reports_invalid_numbers_with_backend():
+    """Test the invalid input message of mean with a backend."""
+    assert MeanCommand(DecimalBackend()).execute("1", "x") == "Error: Invalid input. Please provide valid numbers."
+
+
+def test_eval_uses_backend():
+    """Test that eval parses literals and bindings with its backend."""
+    assert EvalCommand(FractionBackend()).execute("a/3+0.5", "a=1") == "The result of a/3+0.5 with a=1 is equal to 5/6."
+    assert EvalCommand(DecimalBackend(precision=3)).execute("2/3") == "The result of 2/3 is equal to 0.667."
+    assert EvalCommand(FloatBackend()).execute("x*2", "x=y") == "Error: Invalid number input: 'y' is not a valid number."
+
+
+@pytest.mark.parametrize("args, message", [
+    (("double",), "Unknown numeric backend: double. Available backends: float, decimal, fraction."),
+    (("decimal", "0"), "The decimal precision must be a positive number of digits."),
+    (("decimal", "many"), "Invalid decimal precision: many"),
+    (("decimal", None, "sideways"), "Unknown rounding mode: ROUND_SIDEWAYS."),
+])
+def test_create_backend_rejects_invalid_settings(args, message):
+    """Test the errors for invalid backend settings."""
+    with pytest.raises(ValueError, match=message):
+        create_backend(*args)
+
+
+def test_backend_commands_can_be_pickled():
+    """Test that commands with a backend can be sent to worker processes."""
+    command = pickle.loads(pickle.dumps(DivideCommand(DecimalBackend(precision=3))))
+    assert command.execute("2", "3") == "The result of dividing 2 by 3 is equal to 0.667."
+
+
+def test_compiled_records_are_parsed_by_the_replaying_backend():
+    """Test that a record file compiled with one backend replays with another."""
+    handler = CommandHandler()
+    handler.register_command("divide", DivideCommand(FractionBackend()))
+    compiler = CommandCompiler(handler)
+    file = io.BytesIO()
+    compiler.write_records([compiler.compile("divide 1 3")], file)
+    assert compiler.execute(compiler.compile("divide 1 3")).endswith("1/3.")
+
+    handler.register_command("divide", DivideCommand(DecimalBackend(precision=2)))
+    file.seek(0)
+    record, = CommandCompiler(handler).read_records(file)
+    assert record.fast and record.operands == (Decimal(1), Decimal(3))
+
+
+def test_bulk_decimal_mode_leaves_other_backends_to_the_command():
+    """Test that the decimal bulk mode only computes commands using the default backend."""
+    engine = BulkEngine("decimal")
+    lines = ["divide 2 3", "mean 1 2"]
+    commands = {"divide": DivideCommand(DecimalBackend(precision=3)), "mean": MeanCommand(FractionBackend())}
+    assert engine.execute_lines(lines, commands) == [None, None]
+    assert engine.execute_lines(lines, {"divide": DivideCommand(DEFAULT_BACKEND), "mean": MeanCommand()})[0] == (
+        DivideCommand().execute("2", "3")
+    )
+
+
+def test_app_selects_backend_from_settings(tmp_path, monkeypatch):
+    """Test that NUMERIC_BACKEND configures the arithmetic commands."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("NUMERIC_BACKEND", "decimal")
+    monkeypatch.setenv("DECIMAL_PRECISION", "3")
+    app = App()
+    assert app.process_command("divide 2 3") == "The result of dividing 2 by 3 is equal to 0.667."
+    assert app.process_command("eval 1/3") == "The result of 1/3 is equal to 0.333."
@@ -0,0 +1,86 @@
+'''test_parallel.py'''
+import io
+import pytest
+from app import App
+from app.command import ParallelCommandHandler
+from app.pluggin.add import AddCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.mean import MeanCommand
+from app.pluggin.history import HistoryCommand
+
+
+class ReloadedAddCommand(AddCommand):
+    """Stand-in for a new version of the add plugin."""
+
+    def execute(self, *args):
+        return "reloaded"
+
+
+def make_handler(executor):
+    """Create a parallel handler with the arithmetic and history commands."""
+    handler = ParallelCommandHandler(executor=executor, max_workers=2, chunk_size=3)
+    handler.register_command("add", AddCommand())
+    handler.register_command("divide", DivideCommand())
+    handler.register_command("mean", MeanCommand())
+    handler.register_command("history", HistoryCommand())
+    return handler
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_execute_many_keeps_input_order(executor):
+    """Test that results come back in input order whatever the worker."""
+    calls = [("add", (str(i), "1")) for i in range(10)] + [("divide", ("1", "0"))]
+    with make_handler(executor) as handler:
+        results = handler.execute_many(calls)
+    assert results[:10] == [f"The result of adding {i} and 1 is equal to {i + 1}." for i in range(10)]
+    assert results[10] == "Error: Division by zero is not allowed."
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_execute_many_returns_exceptions(executor):
+    """Test that a failing call returns its exception without stopping the others."""
+    with make_handler(executor) as handler:
+        results = handler.execute_many([("mean", ("x",)), ("unknown", ()), ("mean", ("1", "3"))])
+    assert isinstance(results[0], ValueError)
+    assert isinstance(results[1], KeyError)
+    assert results[2] == "The mean of 1.0, 3.0 is 2.0."
+
+
+def test_workers_see_reloaded_commands():
+    """Test that the pool is started again when a command is replaced, as by a plugin reload."""
+    with make_handler("process") as handler:
+        assert handler.execute_many([("add", ("1", "2"))]) == ["The result of adding 1 and 2 is equal to 3."]
+        pool = handler._pool  # pylint: disable=protected-access
+        handler.execute_many([("add", ("1", "2"))])
+        assert handler._pool is pool  # pylint: disable=protected-access
+        handler.register_command("add", ReloadedAddCommand())
+        assert handler.execute_many([("add", ("1", "2"))]) == ["reloaded"]
+
+
+def test_stateful_commands_run_in_the_main_process():
+    """Test that history is never sent to a worker."""
+    handler = make_handler("process")
+    history_command = handler.commands["history"]
+    history_command.add_to_history("add 1 1")
+    with handler:
+        results = handler.execute_many([("history", ("clear",)), ("add", ("1", "1"))])
+    assert results[0] == "History cleared."
+    assert not history_command.history
+
+
+def test_unknown_executor_is_rejected():
+    """Test that only process and thread pools are supported."""
+    with pytest.raises(ValueError):
+        ParallelCommandHandler(executor="gpu")
+
+
+def test_run_batch_with_workers_matches_serial_output(tmp_path, monkeypatch):
+    """Test that a batch run with workers gives the same output as a serial run."""
+    monkeypatch.chdir(tmp_path)
+    script = "add 1 2\nmean 1 x\nhistory clear\ndivide 3 0\nunknown\nmultiply 2 4\n"
+    serial, parallel = io.StringIO(), io.StringIO()
+    App().run_batch(io.StringIO(script), serial)
+    app = App()
+    app.run_batch(io.StringIO(script), parallel, workers=2)
+    assert parallel.getvalue() == serial.getvalue()
+    assert app.history.to_list() == ["divide 3 0", "multiply 2 4"]
@@ -0,0 +1,120 @@
+'''test_pipeline.py'''
+import io
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+from app import App
+from app.command import CommandHandler, CommandResult
+from app.compiler import CommandCompiler
+from app.metrics import Metrics
+from app.numeric import FractionBackend
+from app.pipeline import PipelineError, run_pipeline, split_stages
+from app.pluggin.add import AddCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.eval import EvalCommand
+from app.pluggin.mean import MeanCommand
+from app.pluggin.multiply import MultiplyCommand
+
+
+@pytest.fixture
+def handler():
+    """Create a handler with the arithmetic commands."""
+    handler = CommandHandler(metrics=Metrics())
+    for name, command in [
+        ("add", AddCommand()), ("multiply", MultiplyCommand()), ("divide", DivideCommand()),
+        ("mean", MeanCommand()), ("eval", EvalCommand()),
+    ]:
+        handler.register_command(name, command)
+    return handler
+
+
+def test_command_result_formats_message_lazily():
+    """Test that the message is only built when it is read."""
+    calls = []
+
+    def formatter(*args):
+        calls.append(args)
+        return "formatted"
+
+    result = CommandResult(5, formatter, (1, 2))
+    assert result.value == 5 and not calls
+    assert str(result) == "formatted" and result.message == "formatted"
+    assert calls == [(1, 2)]
+
+
+def test_evaluate_keeps_value_and_message():
+    """Test that evaluate returns the number and the same message as execute."""
+    result = AddCommand().evaluate("2", "3.5")
+    assert result.value == Decimal("5.5")
+    assert result.message == AddCommand().execute("2", "3.5")
+    failed = DivideCommand().evaluate("1", "0")
+    assert failed.value is None and failed.message == "Error: Division by zero is not allowed."
+
+
+def test_split_stages_rejects_empty_stage():
+    """Test that a pipeline stage without a command is an error."""
+    assert split_stages("add 1 2 | multiply _ 3") == [["add", "1", "2"], ["multiply", "_", "3"]]
+    with pytest.raises(PipelineError):
+        split_stages("add 1 2 | | multiply _ 3")
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("add 2 3 | multiply _ 4 | divide _ 8", "The result of dividing 20 by 8 is equal to 2.5."),
+    ("add 2 3 | multiply 4 _", "The result of multiplying 4 and 5 is equal to 20."),
+    ("mean 1 2 | add _ 0.5", "The result of adding 1.5 and 0.5 is equal to 2.0."),
+    ("add 1 2 | eval _*x x=2", "The result of _*x with x=2, _=3 is equal to 6."),
+    ("divide 1 0 | add _ 1", "Error: Division by zero is not allowed."),
+    ("add 1 x | add _ 1", "Error: Invalid input. Please provide valid numbers."),
+    ("add 1 2 | unknown _", "No such command: unknown"),
+])
+def test_run_pipeline(handler, line, expected):
+    """Test that values flow between stages and the first failure stops the pipeline."""
+    assert run_pipeline(handler, line) == expected
+
+
+def test_pipeline_converts_values_between_backends(handler):
+    """Test that a value is converted to the numeric backend of the next command."""
+    handler.register_command("divide", DivideCommand(FractionBackend()))
+    assert run_pipeline(handler, "add 1 2 | divide _ 9") == "The result of dividing 3 by 9 is equal to 1/3."
+    assert FractionBackend().convert(0.1) == Fraction(1, 10)
+
+
+def test_pipeline_rejects_commands_without_value(handler):
+    """Test that a command without numeric result cannot feed the next stage."""
+    handler.register_command("echo", EchoCommand())
+    assert run_pipeline(handler, "echo hi | add _ 1") == "Error: echo has no numeric result to pass to add."
+    assert run_pipeline(handler, "add 1 2 | echo _") == "3"
+
+
+def test_pipeline_records_metrics_per_stage(handler):
+    """Test that every stage is counted by the metrics."""
+    run_pipeline(handler, "add 1 2 | divide _ 0")
+    assert handler.metrics.commands["add"].calls == 1
+    assert handler.metrics.commands["divide"].errors == 1
+
+
+def test_app_processes_pipelines(tmp_path, monkeypatch):
+    """Test pipelines through the App, its history and compiled replay."""
+    monkeypatch.chdir(tmp_path)
+    app = App()
+    line = "add 2 3 | multiply _ 4"
+    assert app.process_command(line) == "The result of multiplying 5 and 4 is equal to 20."
+    assert app.history.to_list()[-1] == line
+    assert app.process_command("add 1 | | add _ 1") == "Error: Every stage of a pipeline needs a command."
+
+    compiler = CommandCompiler(app.command_handler)
+    file = io.BytesIO()
+    compiler.write_records([compiler.compile(line)], file)
+    file.seek(0)
+    record, = compiler.read_records(file)
+    assert compiler.execute(record) == "The result of multiplying 5 and 4 is equal to 20."
+
+
+class EchoCommand:
+    """Command returning its arguments, without an evaluate method."""
+
+    stateful = False
+
+    def execute(self, *args):
+        """Join the arguments."""
+        return " ".join(map(str, args))
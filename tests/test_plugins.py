@@ -0,0 +1,195 @@
+'''test_plugins.py'''
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+import pytest
+from app.bulk import BulkEngine
+from app.cache import ResultCache
+from app.command import CommandHandler
+from app.compiler import CommandCompiler
+from app.numeric import FloatBackend
+from app.pluggin import PluginRegistry, load_command
+from app.pluggin.add import AddCommand
+from app.pluggin.median import MedianCommand
+
+PLUGIN_SOURCE = """
+import operator
+from app.command import Command
+
+class EchoCommand(Command):
+    pure = True
+    operation = staticmethod(operator.add)
+
+    def execute(self, *args):
+        return "{text}"
+"""
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    """Create an empty plugin package importable as ``hotplugins``."""
+    package = tmp_path / "hotplugins"
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Bytecode is written, so that reloads must not pick up stale bytecode
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    yield package
+    for module in [module for module in sys.modules if module.split(".")[0] == "hotplugins"]:
+        del sys.modules[module]
+
+
+def write_plugin(package, name, text):
+    """Write a plugin whose command returns ``text``, keeping the file's mtime within the same second."""
+    path = package / name / "__init__.py"
+    path.parent.mkdir(exist_ok=True)
+    previous = path.stat().st_mtime_ns if path.exists() else None
+    path.write_text(PLUGIN_SOURCE.format(text=text), encoding="utf-8")
+    if previous is not None:
+        # Same size and second as before: only a changed mtime_ns tells the versions apart
+        os.utime(path, ns=(previous + 1000, previous + 1000))
+
+
+def create_registry(package, handler=None):
+    """Create a registry for the plugin package and register its plugins."""
+    registry = PluginRegistry(handler or CommandHandler(), directory=str(package), package=package.name)
+    registry.register_all()
+    return registry
+
+
+def test_scan_lists_every_plugin():
+    """Test that plugins are found by scanning the app.pluggin package."""
+    plugins = PluginRegistry(CommandHandler()).scan()
+    for name in ["add", "subtract", "multiply", "divide", "mean", "history", "cache"]:
+        assert name in plugins
+
+
+def test_load_command_instantiates_the_plugin_class():
+    """Test that a plugin without a create_command hook is instantiated directly."""
+    assert isinstance(load_command("median"), MedianCommand)
+
+
+def test_load_command_calls_create_command_hook():
+    """Test that a plugin's create_command hook receives the application."""
+    app = MagicMock(numeric_backend=FloatBackend())
+    command = load_command("add", app)
+    assert isinstance(command, AddCommand)
+    assert command.backend is app.numeric_backend
+
+
+def test_load_command_rejects_unknown_plugin():
+    """Test that loading a missing plugin fails."""
+    with pytest.raises(ImportError):
+        load_command("no_such_plugin")
+
+
+def test_factory_runs_only_on_first_use():
+    """Test that a lazily registered command is created once, when first used."""
+    handler = CommandHandler()
+    command = MagicMock()
+    command.execute.return_value = "Executed"
+    factory = MagicMock(return_value=command)
+    handler.register_factory("mock", factory)
+
+    assert "mock" in handler.commands
+    factory.assert_not_called()
+    assert handler.execute_command("mock") == "Executed"
+    assert handler.execute_command("mock") == "Executed"
+    factory.assert_called_once()
+    assert handler.commands.names() == ["mock"]
+
+
+def test_app_startup_does_not_import_heavy_dependencies(tmp_path):
+    """Test that creating an App imports neither pandas, numpy nor tabulate."""
+    code = (
+        "import sys; import app; app.App(); "
+        "print(sorted(m for m in ('pandas', 'numpy', 'tabulate') if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])},
+    )
+    assert completed.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_registry_reloads_changed_plugins(plugin_dir):
+    """Test that a changed plugin is swapped in while running calls keep the previous command."""
+    write_plugin(plugin_dir, "echo", "one")
+    registry = create_registry(plugin_dir)
+    commands = registry.command_handler.commands
+    previous = commands["echo"]
+    assert previous.execute() == "one" and registry.poll() == []
+
+    write_plugin(plugin_dir, "echo", "two")
+    assert registry.poll() == [("echo", "reloaded")]
+    assert commands["echo"].execute() == "two"
+    assert previous.execute() == "one"
+
+
+def test_registry_keeps_previous_command_when_reload_fails(plugin_dir):
+    """Test that a plugin with an error keeps serving its previous version."""
+    write_plugin(plugin_dir, "echo", "one")
+    registry = create_registry(plugin_dir)
+    assert registry.command_handler.execute_command("echo") == "one"
+    (plugin_dir / "echo" / "__init__.py").write_text("def broken(:\n", encoding="utf-8")
+    assert registry.poll() == [("echo", "failed")]
+    assert registry.command_handler.execute_command("echo") == "one"
+
+
+def test_registry_adds_and_removes_plugins(plugin_dir):
+    """Test that new plugins are registered and deleted ones unregistered."""
+    registry = create_registry(plugin_dir)
+    write_plugin(plugin_dir, "echo", "new")
+    assert registry.poll() == [("echo", "added")]
+    assert registry.command_handler.execute_command("echo") == "new"
+    shutil.rmtree(plugin_dir / "echo")
+    assert registry.poll() == [("echo", "removed")]
+    assert "echo" not in registry.command_handler.commands
+
+
+def test_reload_refreshes_cached_results_and_compiled_commands(plugin_dir):
+    """Test that cached results and compiled opcodes do not outlive the previous version."""
+    write_plugin(plugin_dir, "echo", "one")
+    registry = create_registry(plugin_dir, CommandHandler(cache=ResultCache()))
+    handler = registry.command_handler
+    compiler = CommandCompiler(handler)
+    record = compiler.compile("echo")
+    assert handler.execute_command("echo") == "one" and compiler.execute(record) == "one"
+
+    write_plugin(plugin_dir, "echo", "two")
+    registry.poll()
+    assert handler.execute_command("echo") == "two" and compiler.execute(record) == "two"
+
+
+def test_registry_polls_in_background(plugin_dir):
+    """Test that the polling thread picks up a change."""
+    write_plugin(plugin_dir, "echo", "one")
+    registry = create_registry(plugin_dir)
+    registry.interval = 0.01
+    registry.command_handler.execute_command("echo")
+    registry.start()
+    try:
+        write_plugin(plugin_dir, "echo", "two")
+        deadline = time.monotonic() + 5
+        while registry.command_handler.execute_command("echo") != "two" and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        registry.stop()
+    assert registry.command_handler.execute_command("echo") == "two"
+
+
+def test_capabilities_route_commands(plugin_dir):
+    """Test that routing follows the declared capabilities rather than the methods a command has."""
+    write_plugin(plugin_dir, "echo", "one")
+    handler = create_registry(plugin_dir).command_handler
+    handler.register_command("add", AddCommand())
+    commands = handler.commands
+    assert commands.has_capability("echo", "pure") and not commands.has_capability("echo", "vectorizable")
+    assert commands.capabilities["add"] == {"pure", "vectorizable"}
+    assert not commands.has_capability("missing", "pure")
+    # echo has an operation but does not declare itself vectorizable
+    assert BulkEngine("float").execute_lines(["echo 1 2", "add 1 2"], commands)[0] is None
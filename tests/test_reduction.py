@@ -0,0 +1,164 @@
+'''test_reduction.py'''
+import operator
+from decimal import Decimal, localcontext
+from fractions import Fraction
+import pytest
+from app import App
+from app.numeric import DecimalBackend, FloatBackend, FractionBackend, tree_reduce
+from app.operands import OperandSourceError, iter_operand_tokens
+from app.pluggin.add import AddCommand
+from app.pluggin.multiply import MultiplyCommand
+from app.pluggin.product import ProductCommand
+from app.pluggin.sum import SumCommand
+from app import reduction
+from app.reduction import ReductionError, reduce_operands, split_workers
+
+
+@pytest.fixture
+def values_file(tmp_path):
+    """Write a file with the numbers 1 to 1000."""
+    path = tmp_path / "values.txt"
+    path.write_text("\n".join(str(i) for i in range(1, 1001)), encoding="utf-8")
+    return path
+
+
+def test_tree_reduce_combines_neighbours():
+    """Test that values are combined pairwise, carrying an odd value to the next round."""
+    assert tree_reduce(lambda a, b: f"({a}{b})", list("abcde")) == "(((ab)(cd))e)"
+    assert tree_reduce(operator.add, [7]) == 7
+
+
+def test_iter_operand_tokens_names_chunks(values_file):
+    """Test that literals and sources are yielded as named token chunks."""
+    chunks = list(iter_operand_tokens(["1", "2", f"@{values_file}", "3"], block_size=1000))
+    assert chunks[0] == (["1", "2"], "arguments") and chunks[-1] == (["3"], "arguments")
+    assert all(name == str(values_file) for _, name in chunks[1:-1]) and len(chunks) > 3
+
+
+@pytest.mark.parametrize("command, expected", [
+    (AddCommand(), "The sum of 4 numbers is equal to 10."),
+    (MultiplyCommand(), "The product of 4 numbers is equal to 24."),
+    (SumCommand(FractionBackend()), "The sum of 4 numbers is equal to 10."),
+    (ProductCommand(FloatBackend()), "The product of 4 numbers is equal to 24.0."),
+])
+def test_n_ary_commands(command, expected):
+    """Test add, multiply and their aliases with more than two operands."""
+    assert command.execute("1", "2", "3", "4") == expected
+
+
+def test_two_operands_keep_binary_message():
+    """Test that two operands are still reported as a binary operation."""
+    assert SumCommand().execute("2", "3") == "The result of adding 2 and 3 is equal to 5."
+
+
+def test_decimal_reduction_is_rounded_once():
+    """Test that Decimal results are the exact result rounded in the current context."""
+    args = ["1e30", "1", "-1e30"] + ["0.1"] * 10
+    assert AddCommand().evaluate(*args).value == Decimal("2.0")
+    factors = ["1.1"] * 50
+    with localcontext() as context:
+        context.prec = 500
+        exact = tree_reduce(operator.mul, [Decimal(f) for f in factors])
+    assert MultiplyCommand().evaluate(*factors).value == +exact
+    backend = DecimalBackend(precision=3)
+    assert AddCommand(backend).evaluate("1.004", "1.004", "1.004").value == Decimal("3.01")
+
+
+def test_decimal_reduction_bounds_the_digits():
+    """Test that operands with far apart exponents are reduced without exact arithmetic."""
+    assert AddCommand().evaluate("1e5000", "1e-5000", "1").value == Decimal("1.000000000000000000000000000E+5000")
+    assert AddCommand().execute("1e5000000000", "1e-5000000000", "1") == (
+        "Error: The sum of these numbers is undefined or out of range."
+    )
+    assert AddCommand().evaluate("1e5000", "1e-5000", "-1e5000", "2").value == Decimal(2)
+
+
+def test_binary_results_match_reduction():
+    """Test that reducing two operands gives the two-operand result of each backend."""
+    for backend in (DecimalBackend(), DecimalBackend(precision=5, rounding="ROUND_DOWN"), FloatBackend()):
+        for operation, a, b in [(operator.add, "0.1", "0.2"), (operator.mul, "2.345678", "3.456789")]:
+            _, value = reduce_operands(backend, operation, (a, b))
+            assert value == backend.apply(operation)(backend.parse(a), backend.parse(b))
+
+
+def test_reduction_reads_sources(values_file):
+    """Test sums and products of literal numbers and @file sources."""
+    assert AddCommand().execute("0.5", f"@{values_file}") == "The sum of 1001 numbers is equal to 500500.5."
+    assert SumCommand().execute(f"@{values_file}") == "The sum of 1000 numbers is equal to 500500."
+    assert ProductCommand(FractionBackend()).evaluate(f"@{values_file}").value == Fraction(
+        tree_reduce(operator.mul, list(range(1, 1001)))
+    )
+    assert not AddCommand().is_cacheable(f"@{values_file}") and AddCommand().is_cacheable("1", "2")
+
+
+def test_parallel_reduction_matches_sequential(values_file):
+    """Test that reducing chunks in worker processes gives the same result."""
+    args = (f"@{values_file}", "0.25")
+    for backend, operation in [(DecimalBackend(), operator.add), (FractionBackend(), operator.mul)]:
+        sequential = reduce_operands(backend, operation, args)
+        assert reduce_operands(backend, operation, args, workers=2, block_size=100) == sequential
+    assert AddCommand().execute("workers=2", f"@{values_file}") == "The sum of 1000 numbers is equal to 500500."
+
+
+def test_worker_pool_is_bounded(values_file, monkeypatch):
+    """Test that literal operands never start a pool, and that pools have at most one worker per CPU."""
+    sizes = []
+
+    class RecordingPool(reduction.ProcessPoolExecutor):
+        """Pool recording its number of workers."""
+
+        def __init__(self, max_workers):
+            sizes.append(max_workers)
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(reduction, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(reduction.os, "cpu_count", lambda: 2)
+    assert AddCommand().execute("workers=64", "1", "2", "3") == "The sum of 3 numbers is equal to 6."
+    assert not sizes
+    assert reduce_operands(DecimalBackend(), operator.add, (f"@{values_file}",), 64, 100) == (1000, 500500)
+    assert sizes == [2]
+
+
+@pytest.mark.parametrize("args, expected", [
+    (("3",), "Error: Please provide at least two numbers to add."),
+    (("workers=2", "3"), "Error: Please provide at least two numbers to add."),
+    (("1", "x", "3"), "Error: Invalid number 'x' in arguments."),
+    (("workers=0", "1", "2"), "Error: workers expects a positive integer."),
+    (("1", "@missing.txt"), "Error: Operand file 'missing.txt' not found."),
+    (("Infinity", "-Infinity", "1"), "Error: The sum of these numbers is undefined or out of range."),
+])
+def test_reduction_errors(args, expected):
+    """Test the error messages of n-ary add."""
+    assert AddCommand().execute(*args) == expected
+
+
+def test_empty_source(tmp_path):
+    """Test that a source without numbers is an arity error."""
+    empty = tmp_path / "empty.txt"
+    empty.write_text("", encoding="utf-8")
+    assert MultiplyCommand().execute(f"@{empty}") == "Please provide at least two numbers to multiply."
+
+
+def test_invalid_number_in_source(tmp_path):
+    """Test that an invalid number is reported with its file."""
+    bad = tmp_path / "bad.txt"
+    bad.write_text("1 2 oops", encoding="utf-8")
+    with pytest.raises(OperandSourceError, match=f"Invalid number 'oops' in {bad}"):
+        reduce_operands(DecimalBackend(), operator.add, (f"@{bad}",))
+
+
+def test_split_workers():
+    """Test the leading workers option."""
+    assert split_workers(("workers=3", "1")) == (3, ("1",))
+    assert split_workers(("1", "2")) == (None, ("1", "2"))
+    with pytest.raises(ReductionError):
+        split_workers(("workers=many",))
+
+
+def test_app_registers_aliases(tmp_path, monkeypatch):
+    """Test sum and product through the App, with its numeric backend and pipelines."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("NUMERIC_BACKEND", "fraction")
+    app = App()
+    assert app.process_command("sum 1/2 1/3 1/6") == "The sum of 3 numbers is equal to 1."
+    assert app.process_command("product 2 3 4 | add _ 1 1") == "The sum of 3 numbers is equal to 26."
@@ -0,0 +1,140 @@
+'''test_render.py'''
+import csv
+import io
+import json
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+from app import App
+from app.command import CommandResult
+from app.history import HistoryBuffer
+from app.pluggin.history import HistoryCommand
+from app.render import OUTPUT_MODES, OutputBuffer, create_renderer, json_number
+
+COMMANDS = "add 2 3\ndivide 1 0\nmean 1 2 3\neval (a+b)*c a=1 b=2 c=3\nadd 1 2 | multiply _ 4\nunknown 1\n"
+VALUES = [5, None, 2.0, 9, 12, None]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an App working in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return App()
+
+
+def unformatted(value):
+    """Return a result whose message fails the test when it is formatted."""
+    return CommandResult(value, pytest.fail, ("The message was formatted.",))
+
+
+@pytest.mark.parametrize("value, expected", [
+    (5, "5"), (2.5, "2.5"), (Decimal("1.50"), "1.50"), (Decimal("1E+3"), "1E+3"),
+    (Fraction(5, 6), '"5/6"'), (float("inf"), '"inf"'), (Decimal("NaN"), '"NaN"'),
+    ((1.0, 5.0), "[1.0,5.0]"), ([2, float("nan")], '[2,"nan"]'),
+])
+def test_json_number(value, expected):
+    """Test that finite numbers are JSON numbers and the other values strings."""
+    assert json_number(value) == expected
+    json.loads(expected)
+
+
+def test_machine_modes_never_format_messages():
+    """Test that the value, JSONL and CSV renderers only read the values."""
+    results = [unformatted(Decimal("0.1")), "Error: Division by zero is not allowed."]
+    commands = ["add 0.05 0.05", "divide 1 0"]
+    assert create_renderer("value").render(commands, results) == "0.1\nError: Division by zero is not allowed.\n"
+    lines = create_renderer("jsonl").render(commands, results).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"command": "add 0.05 0.05", "value": 0.1},
+        {"command": "divide 1 0", "message": "Error: Division by zero is not allowed."},
+    ]
+    renderer = create_renderer("csv")
+    rows = list(csv.reader(io.StringIO(renderer.header() + renderer.render(commands, results))))
+    assert rows == [
+        ["command", "value", "message"], ["add 0.05 0.05", "0.1", ""],
+        ["divide 1 0", "", "Error: Division by zero is not allowed."],
+    ]
+
+
+def test_unknown_output_mode():
+    """Test that an unknown mode lists the available ones."""
+    with pytest.raises(ValueError, match="Available modes: text, value, jsonl, csv"):
+        create_renderer("xml")
+
+
+def test_output_buffer_writes_blocks():
+    """Test that text is written once the buffer is full, and on flush."""
+    stream = io.StringIO()
+    buffer = OutputBuffer(stream, size=10)
+    buffer.write("12345")
+    assert stream.getvalue() == ""
+    buffer.write("67890")
+    assert stream.getvalue() == "1234567890"
+    buffer.write("x")
+    buffer.flush()
+    assert stream.getvalue() == "1234567890x"
+
+
+@pytest.mark.parametrize("mode, workers", [(None, None), ("decimal", None), ("decimal", 2), ("float", None)])
+def test_batch_jsonl_matches_every_path(app, mode, workers):
+    """Test that JSONL values are the same with and without the bulk engine and workers."""
+    output = io.StringIO()
+    app.run_batch(io.StringIO(COMMANDS), output, chunk_size=4, mode=mode, workers=workers, output_mode="jsonl")
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record.get("value") for record in records] == VALUES
+    assert records[1]["message"] == "Error: Division by zero is not allowed."
+    assert records[5] == {"command": "unknown 1", "message": "No such command: unknown"}
+
+
+def test_batch_value_and_csv_modes(app):
+    """Test the bare values and the CSV table of a batch run."""
+    output = io.StringIO()
+    app.run_batch(io.StringIO(COMMANDS), output, output_mode="value")
+    assert output.getvalue().splitlines()[0] == "5" and output.getvalue().splitlines()[2] == "2.0"
+
+    output = io.StringIO()
+    App().run_batch(io.StringIO(COMMANDS), output, output_mode="csv")
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [row["command"] for row in rows] == COMMANDS.splitlines()
+    assert rows[4]["value"] == "12" and rows[4]["message"] == ""
+
+
+def test_statistics_have_values(app):
+    """Test that the statistics commands give their values to the machine modes."""
+    lines = "variance 2 4 4 4 5 5 7 9\nminmax 1 5 3\nquantile p=50,100 1 2 3 4\nhistogram bins=2 1 2 3 4\nmedian 1 x\n"
+    output = io.StringIO()
+    app.run_batch(io.StringIO(lines), output, output_mode="jsonl")
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record.get("value") for record in records] == [4.571428571428571, [1.0, 5.0], [2.5, 4.0], [2, 2], None]
+    assert records[4]["message"] == "Error: Invalid number 'x' in arguments."
+
+    output = io.StringIO()
+    app.run_batch(io.StringIO(lines), output, output_mode="value")
+    assert output.getvalue().splitlines()[1:4] == ["1.0 5.0", "2.5 4.0", "2 2"]
+
+
+def test_replay_in_every_mode(app, tmp_path):
+    """Test that compiled records render the same values as the batch run."""
+    path = tmp_path / "commands.rec"
+    with open(path, "wb") as file:
+        app.compile_commands(io.StringIO(COMMANDS), file)
+    for output_mode in OUTPUT_MODES:
+        output = io.StringIO()
+        with open(path, "rb") as file:
+            App().run_compiled(file, output, output_mode=output_mode)
+        if output_mode == "jsonl":
+            assert [json.loads(line).get("value") for line in output.getvalue().splitlines()] == VALUES
+        elif output_mode == "text":
+            assert output.getvalue().splitlines()[0] == "The result of adding 2 and 3 is equal to 5."
+
+
+def test_history_table_is_cached_until_the_history_changes():
+    """Test that showing an unchanged history does not render the table again."""
+    command = HistoryCommand(HistoryBuffer(5))
+    command.add_to_history("add 1 2")
+    table = command.show_history()
+    assert command.show_history() is table
+    command.add_to_history("add 3 4")
+    assert "add 3 4" in command.show_history()
+    command.history.clear()
+    assert command.show_history() == "No command history available."
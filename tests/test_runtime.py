@@ -0,0 +1,68 @@
+'''test_runtime.py'''
+import pytest
+from app import App
+from app.runtime import Runtime, get_runtime
+from app.session import Session
+
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    """Create a runtime in a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    runtime = Runtime()
+    yield runtime
+    runtime.close()
+
+
+def test_sessions_keep_their_own_history(runtime):
+    """Test that sessions share the commands but not their history."""
+    first, second = runtime.session(), runtime.session()
+    assert first.process_command("add 2 3") == "The result of adding 2 and 3 is equal to 5."
+    assert second.process_command("multiply 2 3") == "The result of multiplying 2 and 3 is equal to 6."
+    assert first.history.to_list() == ["add 2 3"] and second.history.to_list() == ["multiply 2 3"]
+    assert "multiply" not in first.process_command("history")
+    assert first.session_id != second.session_id
+
+
+def test_session_context_and_history_size(tmp_path, monkeypatch):
+    """Test that sessions get the runtime's history size and their own context."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HISTORY_MAX_SIZE", "2")
+    runtime = Runtime()
+    session = runtime.session(tenant="acme")
+    for i in range(3):
+        session.process_command(f"add {i} 1")
+    assert session.history.to_list() == ["add 1 1", "add 2 1"]
+    assert session.context == {"tenant": "acme"} and runtime.session().context == {}
+    runtime.close()
+
+
+def test_plugins_use_the_runtime_settings(tmp_path, monkeypatch):
+    """Test that plugin factories are bound to a bare runtime, without the App's history."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("NUMERIC_BACKEND", "fraction")
+    runtime = Runtime()
+    assert runtime.session().process_command("add 1/2 1/3") == "The result of adding 1/2 and 1/3 is equal to 5/6."
+    assert runtime.command_handler.commands["history"].execute() == "No command history available."
+    runtime.close()
+
+
+def test_get_runtime_is_created_once(tmp_path, monkeypatch):
+    """Test that the process-wide runtime is shared."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("app.runtime._RUNTIME", None)
+    runtime = get_runtime()
+    assert get_runtime() is runtime
+    runtime.close()
+
+
+def test_app_is_a_runtime_with_a_main_history(tmp_path, monkeypatch):
+    """Test that the App keeps its history apart from the sessions it opens."""
+    monkeypatch.chdir(tmp_path)
+    app = App()
+    session = app.session()
+    assert isinstance(session, Session)
+    session.process_command("add 1 1")
+    app.process_command("subtract 3 1")
+    assert app.history.to_list() == ["subtract 3 1"] and session.history.to_list() == ["add 1 1"]
+    app.shutdown()
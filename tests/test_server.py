@@ -0,0 +1,176 @@
+'''test_server.py'''
+import asyncio
+import csv
+import threading
+from app.command import CommandHandler
+from app.pluggin.add import AddCommand
+from app.pluggin.compute import ComputeCommand
+from app.pluggin.divide import DivideCommand
+from app.pluggin.history import HistoryCommand
+from app.server import TOO_MANY_CONNECTIONS, CalculatorServer
+from app.session import FILE_ERROR, HISTORY_ERROR, SHARED_ERROR, SOURCE_ERROR, WORKERS_ERROR, Session
+
+
+def make_server(tmp_path, **kwargs):
+    """Create a server on a free local port with the add and divide commands."""
+    handler = CommandHandler()
+    handler.register_command("add", AddCommand())
+    handler.register_command("divide", DivideCommand())
+    return CalculatorServer(handler, port=0, history_file=str(tmp_path / "history.csv"), **kwargs)
+
+
+async def request(reader, writer, line):
+    """Send one command line and return the response line."""
+    writer.write(f"{line}\n".encode())
+    await writer.drain()
+    return (await reader.readline()).decode().rstrip("\n")
+
+
+def test_server_answers_one_line_per_command(tmp_path):
+    """Test the line protocol for results, errors and unknown commands."""
+    async def scenario():
+        server = make_server(tmp_path)
+        await server.start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        responses = [
+            await request(reader, writer, line)
+            for line in ["add 2 3", "divide 1 0", "nope 1", "history"]
+        ]
+        writer.close()
+        await server.stop()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert responses[:3] == [
+        "The result of adding 2 and 3 is equal to 5.",
+        "Error: Division by zero is not allowed.",
+        "No such command: nope",
+    ]
+    assert "add 2 3" in responses[3] and "\\n" in responses[3]
+
+
+def test_sessions_have_separate_histories(tmp_path):
+    """Test that each connection only sees its own history."""
+    async def scenario():
+        server = make_server(tmp_path)
+        await server.start()
+        first = await asyncio.open_connection(*server.address)
+        second = await asyncio.open_connection(*server.address)
+        await request(*first, "add 1 1")
+        await request(*second, "add 2 2")
+        histories = [await request(*first, "history"), await request(*second, "history")]
+        await server.stop()
+        return histories
+
+    first, second = asyncio.run(scenario())
+    assert "add 1 1" in first and "add 2 2" not in first
+    assert "add 2 2" in second and "add 1 1" not in second
+
+
+def test_connection_limit(tmp_path):
+    """Test that clients beyond the limit are refused with an error line."""
+    async def scenario():
+        server = make_server(tmp_path, max_connections=1)
+        await server.start()
+        first = await asyncio.open_connection(*server.address)
+        await request(*first, "add 1 1")
+        reader, _writer = await asyncio.open_connection(*server.address)
+        refused = (await reader.readline()).decode().strip()
+        await server.stop()
+        return refused
+
+    assert asyncio.run(scenario()) == TOO_MANY_CONNECTIONS
+
+
+def test_stop_persists_session_histories(tmp_path):
+    """Test that a graceful shutdown appends every open session's history."""
+    async def scenario():
+        server = make_server(tmp_path)
+        await server.start()
+        for line in ["add 1 2", "divide 4 2"]:
+            await request(*await asyncio.open_connection(*server.address), line)
+        await server.stop()
+
+    asyncio.run(scenario())
+    with open(tmp_path / "history.csv", newline="", encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["Command"]
+    assert sorted(row[0] for row in rows[1:]) == ["add 1 2", "divide 4 2"]
+
+
+def test_histories_are_persisted_off_the_event_loop(tmp_path):
+    """Test that the history of a closed session is appended on a worker thread."""
+    threads = []
+
+    async def scenario():
+        server = make_server(tmp_path)
+        persist = server.persist
+        server.persist = lambda session: threads.append(threading.current_thread()) or persist(session)
+        await server.start()
+        await request(*await asyncio.open_connection(*server.address), "add 1 2")
+        await server.stop()
+
+    asyncio.run(scenario())
+    assert threads and threading.main_thread() not in threads
+
+
+def test_sessions_cannot_touch_server_files(tmp_path):
+    """Test that network clients cannot read, write or delete files on the server."""
+    secret = tmp_path / "secret.txt"
+    secret.write_text("hunter2", encoding="utf-8")
+    session = Session(1, make_server(tmp_path).command_handler, 5)
+    session.command_handler.register_command("history", HistoryCommand())
+    session.command_handler.register_command("compute", ComputeCommand())
+    for line in [f"history delete {secret}", f"history save {secret}", f"history load {secret}"]:
+        assert session.process_command(line) == HISTORY_ERROR
+    assert session.process_command(f"add 1 @{secret}") == SOURCE_ERROR
+    assert session.process_command("add 1 @-") == SOURCE_ERROR
+    assert session.process_command(f"compute {secret} {secret} add a b") == FILE_ERROR.format("compute")
+    assert session.process_command(f"add 1 2 | history delete {secret}") == FILE_ERROR.format("history")
+    assert secret.read_text(encoding="utf-8") == "hunter2"
+    assert session.process_command("history clear") == "History cleared."
+
+
+def test_sessions_cannot_change_shared_state(tmp_path):
+    """Test that a client cannot reset the metrics, clear the cache or profile the server."""
+    session = Session(1, make_server(tmp_path).command_handler, 5)
+    for line, (name, action) in [
+        ("stats reset", ("stats", "reset")), ("cache clear", ("cache", "clear")),
+        ("stats profile start", ("stats", "profile")), ("add 1 2 | stats RESET", ("stats", "reset")),
+    ]:
+        assert session.process_command(line) == SHARED_ERROR.format(name, action)
+
+
+def test_sessions_cannot_start_worker_processes(tmp_path):
+    """Test that a client cannot fork worker processes from the server with workers=N."""
+    session = Session(1, make_server(tmp_path).command_handler, 5)
+    assert session.process_command("add workers=64 1 2") == WORKERS_ERROR
+    assert session.process_command("add 1 2 | add WORKERS=2 3") == WORKERS_ERROR
+    assert session.process_command("add 1 2") == "The result of adding 1 and 2 is equal to 3."
+
+
+def test_slow_command_does_not_block_other_clients(tmp_path):
+    """Test that commands run off the event loop, so one slow command leaves the others served."""
+    release = threading.Event()
+
+    class SlowCommand(AddCommand):
+        """Command blocking until released."""
+
+        def execute(self, *args):
+            release.wait(5)
+            return "done"
+
+    async def scenario():
+        server = make_server(tmp_path)
+        server.command_handler.register_command("slow", SlowCommand())
+        await server.start()
+        slow = await asyncio.open_connection(*server.address)
+        slow[1].write(b"slow\n")
+        fast = await asyncio.open_connection(*server.address)
+        answer = await asyncio.wait_for(request(*fast, "add 1 1"), 5)
+        release.set()
+        late = (await slow[0].readline()).decode().strip()
+        await server.stop()
+        return answer, late
+
+    assert asyncio.run(scenario()) == ("The result of adding 1 and 1 is equal to 2.", "done")
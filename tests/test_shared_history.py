@@ -0,0 +1,189 @@
+'''test_shared_history.py'''
+import csv
+import multiprocessing
+import os
+import tempfile
+import uuid
+from multiprocessing import shared_memory
+import pytest
+from app import App
+from app.history.shared import SharedHistory, append_history_csv
+
+WRITERS = 8
+APPENDS = 2000
+
+
+@pytest.fixture
+def name():
+    """Return a unique segment name and remove the segment after the test."""
+    name = f"calc_test_{uuid.uuid4().hex[:12]}"
+    yield name
+    try:
+        history = SharedHistory(name)
+    except ValueError:
+        return
+    history.unlink()
+    history.close()
+    remove_lock_files(name)
+
+
+def remove_lock_files(name):
+    """Remove the lock files of a segment."""
+    for suffix in (".lock", ".flush.lock"):
+        path = os.path.join(tempfile.gettempdir(), name + suffix)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def append_many(name, writer, count):
+    """Worker process appending ``count`` entries whose result repeats the command."""
+    history = SharedHistory(name)
+    for i in range(count):
+        command = f"add {writer} {i}"
+        history.append(command, f"result of {command}", 0.001)
+    history.close()
+
+
+def read_while_writing(name, total, errors):
+    """Worker process reading concurrently, counting entries whose fields do not match."""
+    history = SharedHistory(name)
+    position = 0
+    while position < total:
+        entries, position = history.read(position)
+        errors.value += sum(entry.result != f"result of {entry.command}" for entry in entries)
+    history.close()
+
+
+def append_and_flush(name, writer, count, filename):
+    """Worker process appending entries and flushing them to a shared CSV file."""
+    history = SharedHistory(name)
+    for i in range(count):
+        history.append(f"multiply {writer} {i}")
+        if i % 50 == 0:
+            history.flush(lambda entries: append_history_csv(filename, entries), blocking=False)
+    history.flush(lambda entries: append_history_csv(filename, entries))
+    history.close()
+
+
+def test_entries_round_trip(name):
+    """Test that entries keep their command, result and latency."""
+    history = SharedHistory(name, capacity=8)
+    history.append("add 1 2", "3", 0.25, timestamp=100.0)
+    history.append("history show")
+    history.append("eval x", "")
+    first, second, third = history.entries()
+    assert first.timestamp == 100.0 and first[1:] == ("add 1 2", "3", 0.25)
+    assert second.result is None and second.latency is None
+    assert third.result == ""
+    history.close()
+
+
+def test_ring_keeps_the_latest_entries(name):
+    """Test that old records are overwritten and reads continue from a position."""
+    history = SharedHistory(name, capacity=4)
+    for i in range(6):
+        history.append(f"add {i} 0")
+    assert len(history) == 4
+    assert [entry.command for entry in history.entries()] == [f"add {i} 0" for i in range(2, 6)]
+    assert [entry.command for entry in history.last(2)] == ["add 4 0", "add 5 0"]
+    entries, position = history.read(5)
+    assert [entry.command for entry in entries] == ["add 5 0"] and position == 6
+    history.clear()
+    assert len(history) == 0 and history.entries() == []
+    history.close()
+
+
+def test_long_text_is_truncated_on_character_boundaries(name):
+    """Test that text longer than a record is cut without splitting a character."""
+    history = SharedHistory(name, capacity=2, record_size=40)
+    history.append("eval " + "é" * 20, "ignored")
+    entry, = history.entries()
+    # 12 bytes of text: the command comes first, the result gets what is left
+    assert entry.command == "eval " + "é" * 3 and entry.result == "i"
+    history.close()
+
+
+def test_processes_attach_to_the_same_ring(name):
+    """Test that a second instance sees the entries and the layout of the first."""
+    first = SharedHistory(name, capacity=16)
+    first.append("divide 1 2", "0.5")
+    second = SharedHistory(name, capacity=99)
+    assert second.capacity == 16 and second.last(1)[0].command == "divide 1 2"
+    first.close()
+    second.close()
+
+
+def test_rejects_foreign_segments():
+    """Test that a segment with another layout is not used as a history."""
+    segment = shared_memory.SharedMemory(f"calc_test_{uuid.uuid4().hex[:12]}", create=True, size=1024)
+    try:
+        with pytest.raises(ValueError, match="does not hold a history"):
+            SharedHistory(segment.name)
+    finally:
+        segment.close()
+        segment.unlink()
+        remove_lock_files(segment.name)
+    with pytest.raises(ValueError):
+        SharedHistory("calc_test_small", record_size=10)
+
+
+def test_concurrent_appends_from_many_processes(name):
+    """Stress test: processes append at once while another reads, and no entry is lost or torn."""
+    history = SharedHistory(name, capacity=WRITERS * APPENDS)
+    errors = multiprocessing.Value("i", 0)
+    reader = multiprocessing.Process(target=read_while_writing, args=(name, WRITERS * APPENDS, errors))
+    writers = [multiprocessing.Process(target=append_many, args=(name, writer, APPENDS)) for writer in range(WRITERS)]
+    reader.start()
+    for process in writers:
+        process.start()
+    for process in writers + [reader]:
+        process.join(60)
+        assert process.exitcode == 0
+
+    entries = history.entries()
+    assert len(entries) == WRITERS * APPENDS and errors.value == 0
+    for writer in range(WRITERS):
+        # Every writer's entries are all there, in the order it appended them
+        own = [entry.command for entry in entries if entry.command.startswith(f"add {writer} ")]
+        assert own == [f"add {writer} {i}" for i in range(APPENDS)]
+    history.close()
+
+
+def test_flush_writes_every_entry_once(name, tmp_path):
+    """Test that processes flushing concurrently write each entry exactly once."""
+    filename = str(tmp_path / "history.csv")
+    history = SharedHistory(name, capacity=WRITERS * APPENDS)
+    processes = [
+        multiprocessing.Process(target=append_and_flush, args=(name, writer, APPENDS, filename))
+        for writer in range(WRITERS)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    with open(filename, newline="", encoding="utf-8") as file:
+        commands = [row["Command"] for row in csv.DictReader(file)]
+    assert sorted(commands) == sorted(f"multiply {w} {i}" for w in range(WRITERS) for i in range(APPENDS))
+    assert history.flush(lambda entries: None) == 0
+    history.close()
+
+
+def test_apps_share_their_history(name, tmp_path, monkeypatch):
+    """Test that applications sharing a history append to history.csv instead of overwriting it."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HISTORY_SHARED", name)
+    first, second = App(), App()
+    first.process_command("add 1 2")
+    second.process_command("multiply 2 3")
+    assert "multiply 2 3" in second.process_command("history show --last 5")
+    assert "add 1 2" in second.process_command("history search add")
+    first.shutdown()
+    second.shutdown()
+
+    with open("history.csv", newline="", encoding="utf-8") as file:
+        assert [row["Command"] for row in csv.DictReader(file)] == ["add 1 2", "multiply 2 3"]
+    third = App()
+    assert third.history.to_list() == ["add 1 2", "multiply 2 3"]
+    third.shutdown()
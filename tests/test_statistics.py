@@ -0,0 +1,139 @@
+'''test_statistics.py'''
+import statistics
+import numpy as np
+import pytest
+from app.command import CommandHandler
+from app.pluggin import PluginRegistry
+from app.pluggin.histogram import HistogramCommand
+from app.pluggin.median import MedianCommand
+from app.pluggin.minmax import MinmaxCommand
+from app.pluggin.quantile import QuantileCommand
+from app.pluggin.stddev import StddevCommand
+from app.pluggin.variance import VarianceCommand
+from app.streaming import Moments, QuantileSketch, StreamSummary, summarize_parallel
+
+NUMBERS = ["2", "4", "4", "4", "5", "5", "7", "9"]
+
+
+@pytest.fixture
+def values_file(tmp_path):
+    """Write 100,000 normally distributed values to a file."""
+    values = np.random.default_rng(3).normal(50, 10, 100_000)
+    path = tmp_path / "values.txt"
+    np.savetxt(path, values)
+    return path, values
+
+
+def test_statistics_plugins_are_discovered():
+    """Test that the statistics plugins register like the other plugins."""
+    for name in ["variance", "stddev", "median", "quantile", "minmax", "histogram"]:
+        assert name in PluginRegistry(CommandHandler()).scan()
+
+
+def test_inline_statistics_match_the_statistics_module():
+    """Test the exact results for small inline inputs."""
+    numbers = [float(n) for n in NUMBERS]
+    assert VarianceCommand().execute(*NUMBERS) == f"The variance of 8 values is {statistics.variance(numbers)}."
+    assert StddevCommand().execute(*NUMBERS) == f"The standard deviation of 8 values is {statistics.stdev(numbers)}."
+    assert MedianCommand().execute(*NUMBERS) == "The median of 8 values is 4.5."
+    assert MinmaxCommand().execute(*NUMBERS) == "The minimum of 8 values is 2.0 and the maximum is 9.0."
+    assert QuantileCommand().execute("p=0,100", *NUMBERS) == "The quantiles of 8 values are p0=2.0, p100=9.0."
+
+
+def test_statistics_are_evaluated():
+    """Test that the statistics are the values of their results, with lazily formatted messages."""
+    result = MinmaxCommand().evaluate(*NUMBERS)
+    assert result.value == (2.0, 9.0) and not result.failed
+    assert HistogramCommand().evaluate("bins=2", *NUMBERS).value == [6, 2]
+    assert QuantileCommand().evaluate("p=50", *NUMBERS).value == [4.5]
+    assert VarianceCommand().evaluate("1").failed
+
+
+def test_statistics_errors():
+    """Test the messages for missing or invalid input."""
+    assert VarianceCommand().execute("1") == "Please provide at least two numbers to calculate the variance."
+    assert MedianCommand().execute() == "Please provide at least one number to calculate the median."
+    assert MedianCommand().execute("1", "x") == "Error: Invalid number 'x' in arguments."
+    assert QuantileCommand().execute("p=150", "1") == "Error: Percentiles must be between 0 and 100."
+    assert HistogramCommand().execute("bins=0", "1") == "Error: The number of bins must be between 1 and 1000."
+    assert HistogramCommand().execute("bins=1000000000", "1") == "Error: The number of bins must be between 1 and 1000."
+
+
+def test_statistics_reject_non_finite_numbers(tmp_path, recwarn):
+    """Test that infinities, NaN and overflows are reported without NumPy warnings."""
+    source = tmp_path / "values.txt"
+    source.write_text("1 2 nan", encoding="utf-8")
+    assert HistogramCommand().execute("1", "inf") == "Error: Statistics need finite numbers, not inf."
+    assert MedianCommand().execute(f"@{source}") == "Error: Statistics need finite numbers, not nan."
+    assert VarianceCommand().execute("1e308", "-1e308", "1e308") == (
+        "Error: The variance of these numbers is out of range."
+    )
+    assert StddevCommand().execute("1e308", "1e308") == "Error: The standard deviation of these numbers is out of range."
+    assert HistogramCommand().execute("1e308", "-1e308") == (
+        "Error: The range of these numbers is too wide for a histogram."
+    )
+    assert not [warning for warning in recwarn if issubclass(warning.category, RuntimeWarning)]
+
+
+def test_statistics_options_are_checked():
+    """Test that unknown option names and invalid worker counts are reported instead of raising."""
+    assert HistogramCommand().execute("bin=3", "1") == "Error: Unknown option 'bin'. Available options: bins, workers."
+    assert MedianCommand().execute("p=50", "1") == "Error: Unknown option 'p'. Available options: workers."
+    assert MinmaxCommand().execute("workers=0", "1") == "Error: workers expects a positive integer."
+    assert MinmaxCommand().execute("workers=x", "1") == "Error: workers expects a positive integer."
+
+
+def test_histogram_counts_every_value():
+    """Test the histogram bins of an inline input."""
+    result = HistogramCommand().execute("bins=2", *NUMBERS)
+    assert result.splitlines() == ["Histogram of 8 values:", "[2, 5.5): 6", "[5.5, 9]: 2"]
+
+
+def test_file_statistics_are_accurate(values_file):
+    """Test moments exactly and quantiles within the sketch error on a large file."""
+    path, values = values_file
+    result = VarianceCommand().execute(f"@{path}")
+    assert result.startswith("The variance of 100000 values is ")
+    variance = float(result.rsplit(" ", 1)[1].rstrip("."))
+    assert variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+
+    sketch = QuantileSketch(seed=1)
+    for chunk in np.array_split(values, 10):
+        sketch.update(chunk)
+    assert not sketch.exact
+    ordered = np.sort(values)
+    for fraction, estimate in zip([0.5, 0.95, 0.99], sketch.quantiles([0.5, 0.95, 0.99])):
+        rank = np.searchsorted(ordered, estimate) / values.size
+        assert abs(rank - fraction) < 0.01
+
+
+def test_partial_summaries_merge(values_file):
+    """Test that summaries of separate chunks merge into the whole-stream result."""
+    _, values = values_file
+    merged = StreamSummary(seed=2)
+    for chunk in np.array_split(values, 4):
+        partial = StreamSummary(seed=2)
+        partial.update(chunk)
+        merged.merge(partial)
+
+    whole = Moments()
+    whole.update(values)
+    assert merged.count == values.size
+    assert merged.moments.variance() == pytest.approx(whole.variance(), rel=1e-12)
+    assert merged.sketch.count == values.size
+    (median,) = merged.sketch.quantiles([0.5])
+    assert abs(np.searchsorted(np.sort(values), median) / values.size - 0.5) < 0.01
+
+
+def test_summarize_parallel_merges_worker_results(tmp_path):
+    """Test that sources summarized in worker processes merge into one result, also through workers=N."""
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("1 2 3", encoding="utf-8")
+    second.write_text("4 5 6 7", encoding="utf-8")
+    summary = summarize_parallel([f"@{first}", f"@{second}"], workers=2)
+    assert summary.count == 7
+    assert summary.moments.mean == 4.0
+    assert summary.sketch.quantiles([0.5]) == [4.0]
+    args = ("p=50", f"@{first}", "8", f"@{second}")
+    result = QuantileCommand().execute("workers=2", *args)
+    assert result == QuantileCommand().execute(*args) == "The quantiles of 8 values are p50=4.5."
@@ -0,0 +1,90 @@
+'''test_streaming.py'''
+import math
+import numpy as np
+import pytest
+from app.operands import OperandSourceError, is_source, read_operand_chunks
+from app.pluggin.mean import MeanCommand
+from app.streaming import NeumaierSum, RunningMean
+
+
+@pytest.fixture
+def values_file(tmp_path):
+    """Write a file of numbers split over lines, spaces and commas."""
+    path = tmp_path / "values.txt"
+    path.write_text("1 2 3\n4,5\n\n  6\n7 8 9 10", encoding="utf-8")
+    return path
+
+
+def test_is_source():
+    """Test that only @-prefixed arguments name a source."""
+    assert is_source("@values.txt")
+    assert is_source("@-")
+    assert not is_source("@")
+    assert not is_source("12")
+    assert not is_source(12)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 7, 1 << 20])
+def test_read_operand_chunks_across_block_boundaries(values_file, block_size):
+    """Test that numbers cut by a block boundary are read whole."""
+    chunks = list(read_operand_chunks(f"@{values_file}", block_size))
+    assert np.concatenate(chunks).tolist() == [float(i) for i in range(1, 11)]
+
+
+def test_read_operand_chunks_errors(tmp_path):
+    """Test the errors for missing files and invalid numbers."""
+    with pytest.raises(OperandSourceError, match="not found"):
+        list(read_operand_chunks(f"@{tmp_path / 'missing.txt'}"))
+    bad = tmp_path / "bad.txt"
+    bad.write_text("1 2 oops 4", encoding="utf-8")
+    with pytest.raises(OperandSourceError, match="Invalid number 'oops'"):
+        list(read_operand_chunks(f"@{bad}"))
+
+
+def test_neumaier_sum_is_compensated():
+    """Test that compensated summation keeps the small terms a naive sum loses."""
+    compensated = NeumaierSum()
+    naive = 0.0
+    for value in [1.0, 1e100, 1.0, -1e100] * 1000:
+        compensated.add(value)
+        naive += value
+    assert compensated.value == 2000.0
+    assert naive != 2000.0
+
+
+def test_running_mean_merges_partial_results():
+    """Test that partial results merged across chunks match a single pass."""
+    values = np.random.default_rng(7).normal(100, 15, 10_000)
+    whole = RunningMean()
+    whole.update(values)
+    merged = RunningMean()
+    for chunk in np.array_split(values, 7):
+        partial = RunningMean()
+        partial.update(chunk)
+        merged.merge(partial)
+    assert merged.count == whole.count == 10_000
+    assert math.isclose(merged.mean, whole.mean, rel_tol=1e-12)
+    assert merged.minimum == values.min() and merged.maximum == values.max()
+
+
+def test_mean_command_with_file_source(values_file):
+    """Test that @file sources report count, mean, min and max only."""
+    result = MeanCommand().execute(f"@{values_file}")
+    assert result == "The mean of 10 values is 5.5 (min 1.0, max 10.0)."
+
+
+def test_mean_command_mixes_literals_and_sources(values_file):
+    """Test that literal numbers and sources are summarized together."""
+    result = MeanCommand().execute("11", f"@{values_file}", "12")
+    assert result == "The mean of 12 values is 6.5 (min 1.0, max 12.0)."
+
+
+def test_mean_command_source_errors(tmp_path):
+    """Test the error messages of unreadable or empty sources."""
+    empty = tmp_path / "empty.txt"
+    empty.write_text("\n", encoding="utf-8")
+    command = MeanCommand()
+    assert command.execute(f"@{tmp_path / 'missing.txt'}").startswith("Error: Operand file")
+    assert command.execute(f"@{empty}") == command.empty_error
+    assert not command.is_cacheable(f"@{empty}")
+    assert command.is_cacheable("1", "2")